@@ -4,11 +4,15 @@ import MetaTrader5 as mt5
 import pytz
 import logging
 import time
+from concurrent.futures import Future
 
 import datetime as dt
 
 import constants.credentials as credentials
 import constants.defs as defs
+from api.order_execution import is_success
+from utils.execution_file import CANCEL, CLOSE, MODIFY, ORDER, PARTIAL_CLOSE
+from constants.granularities import get_granularity
 
 class MT5:
     MAX_LOGIN_ATTEMPTS = 3  # Define the max number of login attempts
@@ -17,9 +21,94 @@ class MT5:
     ORDER_TYPE_BUY = mt5.ORDER_TYPE_BUY
     ORDER_TYPE_SELL = mt5.ORDER_TYPE_SELL
 
+    ORDER_TYPES = {
+        "SELL_STOP": mt5.ORDER_TYPE_SELL_STOP,
+        "BUY_STOP": mt5.ORDER_TYPE_BUY_STOP,
+        "BUY_MARKET": mt5.ORDER_TYPE_BUY,
+        "SELL_MARKET": mt5.ORDER_TYPE_SELL,
+        "BUY_LIMIT": mt5.ORDER_TYPE_BUY_LIMIT,
+        "SELL_LIMIT": mt5.ORDER_TYPE_SELL_LIMIT,
+    }
+    # Order types sent as TRADE_ACTION_PENDING, they rest on the server until triggered
+    PENDING_ORDER_TYPES = {
+        mt5.ORDER_TYPE_BUY_STOP,
+        mt5.ORDER_TYPE_SELL_STOP,
+        mt5.ORDER_TYPE_BUY_LIMIT,
+        mt5.ORDER_TYPE_SELL_LIMIT,
+    }
+    MAGIC = 234000
+    BUY_ORDER_TYPES = {mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_BUY_STOP, mt5.ORDER_TYPE_BUY_LIMIT}
+
     def __init__(self) -> None:
         logging.basicConfig(level=logging.INFO) 
         self.mt5 = mt5
+        self.gateway = None
+        self.execution = None
+        self.journal = None
+        # Cleared when order submission is handed to another process
+        self.orders_enabled = True
+        # Handoff whose orders lock must name this process for orders to be sent
+        self.orders_lock = None
+
+    def attach_execution(self, execution):
+        """Sends deals through an ExecutionEngine that retries transient failures."""
+        self.execution = execution
+
+    def send_deal(self, request):
+        """Sends a TRADE_ACTION_DEAL request, with retries when an execution engine is attached."""
+        if self.execution is not None:
+            return self.execution.send(request)
+        return self.order_send(request)
+
+    def attach_journal(self, journal):
+        """Records every order, modification and close in an ExecutionFileWriter."""
+        self.journal = journal
+
+    def record_execution(self, action, request, result, started, signal_id=None):
+        """Appends one request and its result to the execution journal, never failing the trade."""
+        if self.journal is None:
+            return
+        try:
+            order_type = request.get("type")
+            side = 0 if order_type is None else (1 if order_type in self.BUY_ORDER_TYPES else -1)
+            ticket = request.get("position") or request.get("order") or (result.order if result is not None else 0)
+            self.journal.append(
+                action,
+                request.get("symbol", ""),
+                side,
+                int(ticket or 0),
+                signal_id,
+                result.retcode if result is not None else -1,
+                float(request.get("volume") or math.nan),
+                float(result.volume) if result is not None else math.nan,
+                float(request.get("price") or math.nan),
+                float(result.price or math.nan) if result is not None else math.nan,
+                (time.perf_counter() - started) * 1000,
+            )
+        except Exception as error:
+            logging.error(f"record_execution: Failed recording {request}: {error}")
+
+    def attach_orders_lock(self, handoff):
+        """Refuses to send orders while another process holds the handoff's orders lock."""
+        self.orders_lock = handoff
+
+    def check_orders_owned(self):
+        """Raises ConnectionError unless this process may send orders."""
+        if not self.orders_enabled:
+            raise ConnectionError("Order submission has been handed over to another process")
+        if self.orders_lock is not None and not self.orders_lock.owns_orders():
+            raise ConnectionError(f"Order submission is owned by process {self.orders_lock.owner()}")
+
+    def attach_gateway(self, gateway):
+        """Routes every order_send through an OrderGateway."""
+        self.gateway = gateway
+
+    def order_send(self, request):
+        """Sends a trade request, through the order gateway when one is attached."""
+        self.check_orders_owned()
+        if self.gateway is not None:
+            return self.gateway.submit(request).result()
+        return self.mt5.order_send(request)
         
     def attempt_login(self) -> bool:
         """Attempts to log in to the MT5 account with retry logic."""
@@ -78,7 +167,7 @@ class MT5:
         return hist_data_df
     def get_account_info(self):
         """Fetch and display account information."""
-        account_info = mt5.account_info()
+        account_info = self.mt5.account_info()
         if account_info is None:
             logging.error("Failed to get account info")
             return None
@@ -98,26 +187,13 @@ class MT5:
         comment,
         log_message,
         log_to_error,
+        signal_id=None,
     ):
         try:
-            # If order type SELL_STOP
-            if order_type == "SELL_STOP":
-                order_type = self.mt5.ORDER_TYPE_SELL_STOP
-            elif order_type == "BUY_STOP":
-                order_type = self.mt5.ORDER_TYPE_BUY_STOP
-            elif order_type == "BUY_MARKET":
-                order_type = self.mt5.ORDER_TYPE_BUY
-            elif order_type == "SELL_MARKET":
-                order_type = self.mt5.ORDER_TYPE_SELL
-            elif order_type == "BUY_LIMIT":
-                order_type = self.mt5.ORDER_TYPE_BUY_LIMIT
-            elif order_type == "SELL_LIMIT":
-                order_type = self.mt5.ORDER_TYPE_SELL_LIMIT
-    
-            
-            
-           
-            symbol_info = mt5.symbol_info(symbol)
+            # Order type names ("BUY_MARKET", ...) map to MT5 constants, constants pass through
+            order_type = self.ORDER_TYPES.get(order_type, order_type)
+
+            symbol_info = self.mt5.symbol_info(symbol)
             if not symbol_info:
                 raise ValueError(f"Could not get symbol info for {symbol}")
             
@@ -166,30 +242,39 @@ class MT5:
                 "sl": stop_loss,
                 "tp": take_profit,
                 "deviation": deviation,
-                "magic": 234000,
+                "magic": self.MAGIC,
                 "comment": comment,
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
+
+            if order_type in self.PENDING_ORDER_TYPES:
+                # price is the trigger price, the order waits on the server
+                request["action"] = mt5.TRADE_ACTION_PENDING
+                request["type_filling"] = mt5.ORDER_FILLING_RETURN
+                del request["deviation"]
             
             print(f"palce_order: {request}")
 
-            # Send the order to MT5
-            order_result = self.mt5.order_send(request)
+            # Send the order to MT5, only deals are retried by the execution engine
+            started = time.perf_counter()
+            order_result = self.send_deal(request) if request["action"] == mt5.TRADE_ACTION_DEAL else self.order_send(request)
+            self.record_execution(ORDER, request, order_result, started, signal_id)
 
             # Notify based on return outcomes
-            if order_result[0] == 10009:
+            if is_success(order_result):
                 log_message(
                     f"metatrader_api.place_order(): Order for {symbol} successful",
                     symbol,
                 )
             else:
+                retcode = order_result[0] if order_result is not None else None
                 log_message(
-                    f"Error placing order. ErrorCode {order_result[0]}, Error Details: {order_result}",
+                    f"Error placing order. ErrorCode {retcode}, Error Details: {order_result}",
                     symbol,
                 )
                 log_to_error(
-                    f"Error placing order. {symbol} ErrorCode {order_result[0]}, Error Details: {order_result}"
+                    f"Error placing order. {symbol} ErrorCode {retcode}, Error Details: {order_result}"
                 )
 
             return order_result
@@ -203,50 +288,7 @@ class MT5:
 
     # Function to convert a timeframe string in MetaTrader 5 friendly format
     def set_query_timeframe(self, timeframe):
-        # Implement a Pseudo Switch statement. Note that Python 3.10 implements match / case but have kept it this way for
-        # backwards integration
-        if timeframe == "S20" or timeframe == "M1":  # S20 maps to M1 since MT5 doesn't support seconds
-            return mt5.TIMEFRAME_M1
-        elif timeframe == "M2":
-            return mt5.TIMEFRAME_M2
-        elif timeframe == "M3":
-            return mt5.TIMEFRAME_M3
-        elif timeframe == "M4":
-            return mt5.TIMEFRAME_M4
-        elif timeframe == "M5":
-            return mt5.TIMEFRAME_M5
-        elif timeframe == "M6":
-            return mt5.TIMEFRAME_M6
-        elif timeframe == "M10":
-            return mt5.TIMEFRAME_M10
-        elif timeframe == "M12":
-            return mt5.TIMEFRAME_M12
-        elif timeframe == "M15":
-            return mt5.TIMEFRAME_M15
-        elif timeframe == "M20":
-            return mt5.TIMEFRAME_M20
-        elif timeframe == "M30":
-            return mt5.TIMEFRAME_M30
-        elif timeframe == "H1":
-            return mt5.TIMEFRAME_H1
-        elif timeframe == "H2":
-            return mt5.TIMEFRAME_H2
-        elif timeframe == "H3":
-            return mt5.TIMEFRAME_H3
-        elif timeframe == "H4":
-            return mt5.TIMEFRAME_H4
-        elif timeframe == "H6":
-            return mt5.TIMEFRAME_H6
-        elif timeframe == "H8":
-            return mt5.TIMEFRAME_H8
-        elif timeframe == "H12":
-            return mt5.TIMEFRAME_H12
-        elif timeframe == "D1":
-            return mt5.TIMEFRAME_D1
-        elif timeframe == "W1":
-            return mt5.TIMEFRAME_W1
-        elif timeframe == "MN1":
-            return mt5.TIMEFRAME_MN1
+        return get_granularity(timeframe).mt5_timeframe
     
     # Function to cancel an order
     def cancel_order(self, order_number):
@@ -257,9 +299,24 @@ class MT5:
             "comment": "Order Removed",
         }
         # Send order to MT5
-        order_result = self.mt5.order_send(request)
+        started = time.perf_counter()
+        order_result = self.order_send(request)
+        self.record_execution(CANCEL, request, order_result, started)
         return order_result
 
+    # Function to move the price, stop loss and take profit of a pending order
+    def modify_order(self, order_number, price, stop_loss, take_profit):
+        request = {
+            "action": self.mt5.TRADE_ACTION_MODIFY,
+            "order": order_number,
+            "price": price,
+            "sl": stop_loss,
+            "tp": take_profit,
+            "type_time": self.mt5.ORDER_TIME_GTC,
+        }
+        order_result = self.order_send(request)
+        return is_success(order_result)
+
     # Function to modify an open position
     def modify_position(self, order_number, stop_loss, take_profit=None):
         """Modifies an open position with new stop loss and take profit values."""
@@ -271,12 +328,44 @@ class MT5:
         if take_profit is not None:
             request["tp"] = take_profit
  
-        order_result = self.mt5.order_send(request)
+        started = time.perf_counter()
+        order_result = self.order_send(request)
+        self.record_execution(MODIFY, request, order_result, started)
 
-        if order_result[0] == 10009:
-            return True
-        else:
-            return False
+        return is_success(order_result)
+
+    def modify_position_async(self, order_number, stop_loss, take_profit=None) -> Future:
+        """Like modify_position but returns a Future, letting the gateway coalesce modifications of the same position."""
+        request = {
+            "action": self.mt5.TRADE_ACTION_SLTP,
+            "position": order_number,
+            "sl": stop_loss,
+        }
+        if take_profit is not None:
+            request["tp"] = take_profit
+
+        future = Future()
+        started = time.perf_counter()
+
+        def resolve(sent: Future):
+            if sent.exception() is not None:
+                future.set_exception(sent.exception())
+                return
+            order_result = sent.result()
+            self.record_execution(MODIFY, request, order_result, started)
+            future.set_result(is_success(order_result))
+
+        sent = Future()
+        try:
+            self.check_orders_owned()
+            if self.gateway is not None:
+                sent = self.gateway.submit(request)
+            else:
+                sent.set_result(self.mt5.order_send(request))
+        except Exception as error:
+            sent.set_exception(error)
+        sent.add_done_callback(resolve)
+        return future
 
     def fetch_candles(
         self,
@@ -311,6 +400,10 @@ class MT5:
 
         return rates
 
+    # Function to query ticks from MT5, date_from in seconds since 1970.01.01
+    def query_ticks(self, symbol, date_from, count):
+        return self.mt5.copy_ticks_from(symbol, date_from, count, self.mt5.COPY_TICKS_ALL)
+
     # Function to retrieve all open orders from MT5
     def get_open_orders(self):
         orders = self.mt5.orders_get()
@@ -319,6 +412,13 @@ class MT5:
             order_array.append(order[0])
         return order_array
 
+    # Function to retrieve the pending orders placed by this bot
+    def get_pending_orders(self):
+        orders = self.mt5.orders_get()
+        if orders is None:
+            return None
+        return [order for order in orders if order.magic == self.MAGIC]
+
     # Function to retrieve all open positions
     def get_open_positions(self):
         # Get position objects
@@ -364,20 +464,22 @@ class MT5:
             "position": ticket,
             "price": price,
             "deviation": deviation,
-            "magic": 234000,
+            "magic": self.MAGIC,
             "comment": "partial close",
             "type_time": self.mt5.ORDER_TIME_GTC,
             "type_filling": self.mt5.ORDER_FILLING_FOK,
         }
         
         print(f"partial_close_position: {request}")
-        order_result = self.mt5.order_send(request)
+        started = time.perf_counter()
+        order_result = self.send_deal(request)
+        self.record_execution(PARTIAL_CLOSE, request, order_result, started)
 
-        if order_result[0] == 10009:
+        if is_success(order_result):
             logging.info(f"Partial close for ticket #{ticket} successful")
             return order_result
         else:
-            logging.error(f"Error partially closing ticket #{ticket}. ErrorCode: {order_result[0]}, Error Details: {order_result}")
+            logging.error(f"Error partially closing ticket #{ticket}. Error Details: {order_result}")
             return None
 
     def get_closed_deals(self):
@@ -417,20 +519,22 @@ class MT5:
             "position": ticket,
             "price": price,
             "deviation": deviation,
-            "magic": 234000,
+            "magic": self.MAGIC,
             "comment": "full close",
             "type_time": self.mt5.ORDER_TIME_GTC,
             "type_filling": self.mt5.ORDER_FILLING_FOK,
         }
         
         print(f"close_order: {request}")
-        order_result = self.mt5.order_send(request)
+        started = time.perf_counter()
+        order_result = self.send_deal(request)
+        self.record_execution(CLOSE, request, order_result, started)
 
-        if order_result[0] == 10009:
+        if is_success(order_result):
             logging.info(f"Close order for ticket #{ticket} successful")
             return order_result
         else:
-            logging.error(f"Error closing ticket #{ticket}. ErrorCode: {order_result[0]}, Error Details: {order_result}")
+            logging.error(f"Error closing ticket #{ticket}. Error Details: {order_result}")
             return None
 
     def symbol_info(self, symbol):
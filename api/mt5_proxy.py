@@ -0,0 +1,79 @@
+import collections
+import threading
+
+import MetaTrader5 as mt5
+
+from api.metatrader_api import MT5
+
+_NAMEDTUPLE_TYPES = {}
+
+
+def to_wire(value):
+    """Converts terminal results (namedtuples from MetaTrader5) into plain picklable values."""
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return ("__namedtuple__", type(value).__name__, tuple(value._fields), tuple(to_wire(v) for v in value))
+    if isinstance(value, (tuple, list)):
+        return type(value)(to_wire(v) for v in value)
+    return value
+
+
+def from_wire(value):
+    """Rebuilds namedtuples sent with to_wire so attribute access keeps working in the worker."""
+    if isinstance(value, tuple) and len(value) == 4 and value[0] == "__namedtuple__":
+        _, type_name, fields, values = value
+        key = (type_name, fields)
+        if key not in _NAMEDTUPLE_TYPES:
+            _NAMEDTUPLE_TYPES[key] = collections.namedtuple(type_name, fields)
+        return _NAMEDTUPLE_TYPES[key](*(from_wire(v) for v in values))
+    if isinstance(value, (tuple, list)):
+        return type(value)(from_wire(v) for v in value)
+    return value
+
+
+class RemoteTerminal:
+    """Looks like the MetaTrader5 module but forwards every call to the coordinator process."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Constants (TIMEFRAME_M1, ORDER_TYPE_BUY, ...) are resolved locally
+        if name.isupper():
+            return getattr(mt5, name)
+
+        def call(*args, **kwargs):
+            with self.lock:
+                self.conn.send(("call", name, args, kwargs))
+                status, payload = self.conn.recv()
+            if status == "error":
+                raise ConnectionError(f"RemoteTerminal.{name}: {payload}")
+            return from_wire(payload)
+
+        return call
+
+
+class MT5Proxy(MT5):
+    """MT5 wrapper used inside shard workers. The coordinator owns the real terminal session."""
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.mt5 = RemoteTerminal(conn)
+        # The coordinator's MT5 applies the gateway, execution engine and orders lock to forwarded orders
+        self.gateway = None
+        self.execution = None
+        self.journal = None
+        self.orders_enabled = True
+        self.orders_lock = None
+
+    def attempt_login(self) -> bool:
+        # The coordinator is already logged in
+        return True
+
+    def send_signal(self, symbol, index, signal_decision):
+        with self.mt5.lock:
+            self.conn.send(("signal", symbol, index, signal_decision))
+
+    def send_log(self, msg, key):
+        with self.mt5.lock:
+            self.conn.send(("log", str(msg), key))
@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+from collections import Counter
+
+# Trade server return codes (see MetaTrader5 TRADE_RETCODE_*)
+RETCODE_REQUOTE = 10004
+RETCODE_PLACED = 10008
+RETCODE_DONE = 10009
+RETCODE_DONE_PARTIAL = 10010
+RETCODE_TIMEOUT = 10012
+RETCODE_PRICE_CHANGED = 10020
+RETCODE_PRICE_OFF = 10021
+RETCODE_TOO_MANY_REQUESTS = 10024
+RETCODE_LOCKED = 10028
+RETCODE_INVALID_FILL = 10030
+RETCODE_CONNECTION = 10031
+
+SUCCESS = "success"
+REPRICE = "reprice"
+BACKOFF = "backoff"
+FILLING = "filling"
+# The request may have been executed, sending it again could open a second position
+UNKNOWN = "unknown"
+FATAL = "fatal"
+
+RETCODE_CLASSES = {
+    RETCODE_DONE: SUCCESS,
+    RETCODE_PLACED: SUCCESS,
+    RETCODE_DONE_PARTIAL: SUCCESS,
+    RETCODE_REQUOTE: REPRICE,
+    RETCODE_PRICE_CHANGED: REPRICE,
+    RETCODE_PRICE_OFF: REPRICE,
+    RETCODE_TIMEOUT: UNKNOWN,
+    RETCODE_TOO_MANY_REQUESTS: BACKOFF,
+    RETCODE_LOCKED: BACKOFF,
+    RETCODE_CONNECTION: UNKNOWN,
+    RETCODE_INVALID_FILL: FILLING,
+}
+SUCCESS_RETCODES = tuple(retcode for retcode, kind in RETCODE_CLASSES.items() if kind == SUCCESS)
+
+# symbol_info.filling_mode is a bit mask of SYMBOL_FILLING_FOK (1) and SYMBOL_FILLING_IOC (2)
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+
+
+def classify_retcode(retcode) -> str:
+    """Returns how a retcode should be handled: success, reprice, backoff, filling, unknown or fatal."""
+    return RETCODE_CLASSES.get(retcode, FATAL)
+
+
+def is_success(result) -> bool:
+    """True for an order_send result the trade server accepted, False for None (no answer from the terminal)."""
+    return result is not None and classify_retcode(result[0]) == SUCCESS
+
+
+class ExecutionEngine:
+    """Retcode-aware order_send for deals.
+
+    Requotes and price changes are re-sent at a fresh tick price, requests the
+    server refused for load are retried with jittered exponential backoff, and an
+    invalid filling mode falls through to the next mode the symbol allows.
+    Everything happens within `deadline` seconds of the first attempt.
+
+    A timeout, a lost connection or no answer at all leave the outcome unknown:
+    the deal may have been filled, so it is never sent again. The caller treats it
+    as failed and RiskModel.sync() picks up the position if it exists.
+    """
+
+    def __init__(self, mt5, max_retries: int = 3, deadline: float = 2.0, base_backoff: float = 0.05, max_backoff: float = 0.5):
+        self.mt5 = mt5
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.lock = threading.Lock()
+        self.retcode_counts = Counter()
+        self.retries = Counter()
+        self.orders = 0
+
+    def filling_modes(self, symbol_info, requested):
+        """Filling modes to try, starting with the requested one."""
+        modes = [requested]
+        if symbol_info is not None:
+            if symbol_info.filling_mode & SYMBOL_FILLING_IOC:
+                modes.append(self.mt5.mt5.ORDER_FILLING_IOC)
+            if symbol_info.filling_mode & SYMBOL_FILLING_FOK:
+                modes.append(self.mt5.mt5.ORDER_FILLING_FOK)
+        modes.append(self.mt5.mt5.ORDER_FILLING_RETURN)
+
+        # Keep order, drop duplicates
+        return list(dict.fromkeys(modes))
+
+    def reprice(self, request):
+        tick = self.mt5.mt5.symbol_info_tick(request["symbol"])
+        if tick is None:
+            return False
+        request["price"] = tick.ask if request["type"] == self.mt5.ORDER_TYPE_BUY else tick.bid
+        return True
+
+    def backoff(self, attempt, started) -> bool:
+        """Sleeps before the next attempt, returns False if that would cross the deadline."""
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        if time.monotonic() + delay - started > self.deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+    def record(self, retcode, kind):
+        with self.lock:
+            self.retcode_counts[retcode] += 1
+            if kind in (REPRICE, BACKOFF, FILLING):
+                self.retries[kind] += 1
+
+    def send(self, request: dict):
+        """Sends a deal request, retrying transient failures. Returns the last order_send result."""
+        request = dict(request)
+        started = time.monotonic()
+        is_market = request.get("type") in (self.mt5.ORDER_TYPE_BUY, self.mt5.ORDER_TYPE_SELL)
+        symbol_info = self.mt5.mt5.symbol_info(request["symbol"]) if "symbol" in request else None
+        filling_modes = self.filling_modes(symbol_info, request.get("type_filling"))
+        filling_index = 0
+
+        with self.lock:
+            self.orders += 1
+
+        result = None
+        for attempt in range(self.max_retries + 1):
+            result = self.mt5.order_send(request)
+            retcode = result[0] if result is not None else None
+            kind = classify_retcode(retcode) if result is not None else UNKNOWN
+            self.record(retcode, kind)
+
+            if kind in (SUCCESS, UNKNOWN, FATAL) or attempt == self.max_retries:
+                return result
+
+            if kind == REPRICE:
+                if not is_market or not self.reprice(request):
+                    return result
+            elif kind == FILLING:
+                filling_index += 1
+                if filling_index >= len(filling_modes):
+                    return result
+                request["type_filling"] = filling_modes[filling_index]
+                # A new filling mode can be tried right away
+                continue
+
+            if not self.backoff(attempt, started):
+                return result
+
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "orders": self.orders,
+                "retcodes": dict(self.retcode_counts),
+                "retries": dict(self.retries),
+            }
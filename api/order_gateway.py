@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+
+class PendingRequest:
+    def __init__(self, request: dict, not_before: float):
+        self.request = request
+        self.not_before = not_before
+        self.futures: List[Future] = []
+
+
+class OrderGateway:
+    """Serializes every order_send through one queue and worker thread.
+
+    SL/TP modifications (TRADE_ACTION_SLTP) for the same position are held for
+    `coalesce_window` seconds and merged, so only the latest values reach the
+    terminal. Sends are capped at `max_requests_per_second` with a token bucket.
+    Once stopped, the worker drains the queue and new requests are sent right
+    away in the caller's thread.
+    """
+
+    def __init__(self, order_send, action_sltp, max_requests_per_second: float = 10, coalesce_window: float = 0.25):
+        self.order_send = order_send
+        self.action_sltp = action_sltp
+        self.max_requests_per_second = max_requests_per_second
+        self.coalesce_window = coalesce_window
+
+        self.queue: List[PendingRequest] = []
+        self.pending_sltp: Dict[int, PendingRequest] = {}
+        self.condition = threading.Condition()
+        self.tokens = max_requests_per_second
+        self.last_refill = time.monotonic()
+        self.is_running = False
+        self.thread: Optional[threading.Thread] = None
+
+        self.sent = 0
+        self.coalesced = 0
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self.run, name="order_gateway_thread", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def submit(self, request: dict) -> Future:
+        """Queues a request for order_send and returns a Future with the terminal result."""
+        future = Future()
+        with self.condition:
+            stopped = not self.is_running
+            if not stopped:
+                self.enqueue(request, future)
+
+        if stopped:
+            # Nothing would take it off the queue anymore
+            self.send([future], request)
+        return future
+
+    def enqueue(self, request: dict, future: Future):
+        """Call with the condition held"""
+        now = time.monotonic()
+        ticket = request.get("position")
+
+        if request.get("action") == self.action_sltp and ticket in self.pending_sltp:
+            # Merge into the modification still waiting for this position
+            pending = self.pending_sltp[ticket]
+            pending.request["sl"] = request.get("sl", pending.request.get("sl"))
+            if "tp" in request:
+                pending.request["tp"] = request["tp"]
+            pending.futures.append(future)
+            self.coalesced += 1
+            return
+
+        if request.get("action") == self.action_sltp:
+            pending = PendingRequest(dict(request), now + self.coalesce_window)
+            self.pending_sltp[ticket] = pending
+        else:
+            pending = PendingRequest(request, now)
+            # A deal against the position must not overtake its pending SL/TP change
+            if ticket in self.pending_sltp:
+                self.pending_sltp[ticket].not_before = now
+
+        pending.futures.append(future)
+        self.queue.append(pending)
+        self.condition.notify_all()
+
+    def next_ready(self, now: float) -> Optional[PendingRequest]:
+        for index, pending in enumerate(self.queue):
+            if pending.not_before <= now:
+                return self.queue.pop(index)
+        return None
+
+    def take_token(self, now: float) -> float:
+        """Returns 0 if a token was taken, otherwise the seconds until one is available."""
+        elapsed = now - self.last_refill
+        self.tokens = min(self.max_requests_per_second, self.tokens + elapsed * self.max_requests_per_second)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.max_requests_per_second
+
+    def run(self):
+        while True:
+            with self.condition:
+                if not self.is_running and not self.queue:
+                    return
+
+                now = time.monotonic()
+                pending = self.next_ready(now)
+                if pending is None:
+                    wait = min((p.not_before for p in self.queue), default=now + 1) - now
+                    self.condition.wait(timeout=max(wait, 0.001))
+                    continue
+
+                wait = self.take_token(now)
+                if wait > 0:
+                    self.queue.insert(0, pending)
+                    self.condition.wait(timeout=wait)
+                    continue
+
+                ticket = pending.request.get("position")
+                if self.pending_sltp.get(ticket) is pending:
+                    del self.pending_sltp[ticket]
+
+            self.send(pending.futures, pending.request)
+
+    def send(self, futures: List[Future], request: dict):
+        try:
+            result = self.order_send(request)
+            self.sent += 1
+            for future in futures:
+                future.set_result(result)
+        except Exception as error:
+            for future in futures:
+                future.set_exception(error)
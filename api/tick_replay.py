@@ -0,0 +1,65 @@
+import bisect
+import time
+from typing import Dict, List, Optional
+
+from utils.tick_file import TickFileReader
+
+
+class TickReplay:
+    """Replays a recorded tick file behind the MetaTrader5 module interface.
+
+    Assign it to MT5.mt5 to run the bot against recorded ticks: symbol_info_tick
+    and copy_ticks_from answer from the recording according to a replay clock,
+    every other attribute is looked up on `terminal` (the real module or a test double).
+
+    speed=1 replays in real time, speed=100 at 100x. With speed=None the clock
+    only moves through advance_to, for deterministic benchmarks.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, terminal=None, start_msc: Optional[int] = None, end_msc: Optional[int] = None):
+        self.terminal = terminal
+        self.speed = speed
+        self.times: Dict[str, List[int]] = {}
+        self.ticks: Dict[str, list] = {}
+
+        for symbol, tick in TickFileReader(path).read(start_msc, end_msc):
+            self.times.setdefault(symbol, []).append(tick.time_msc)
+            self.ticks.setdefault(symbol, []).append(tick)
+
+        first_times = [times[0] for times in self.times.values()]
+        self.start_msc = start_msc if start_msc is not None else min(first_times, default=0)
+        self.clock_msc = self.start_msc
+        self.started = time.monotonic()
+
+    def __getattr__(self, name):
+        if self.terminal is None:
+            raise AttributeError(f"TickReplay has no terminal to provide {name}")
+        return getattr(self.terminal, name)
+
+    def now_msc(self) -> int:
+        if self.speed is None:
+            return self.clock_msc
+        return self.start_msc + int((time.monotonic() - self.started) * 1000 * self.speed)
+
+    def advance_to(self, time_msc: int):
+        self.clock_msc = time_msc
+
+    def end_msc(self) -> int:
+        return max((times[-1] for times in self.times.values()), default=self.start_msc)
+
+    def symbol_info_tick(self, symbol):
+        """Latest recorded tick at the replay clock, None before the first one."""
+        times = self.times.get(symbol)
+        if not times:
+            return None
+        position = bisect.bisect_right(times, self.now_msc())
+        return self.ticks[symbol][position - 1] if position > 0 else None
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=None):
+        """Ticks from date_from (seconds) up to the replay clock, as dicts keyed like the terminal's array."""
+        times = self.times.get(symbol)
+        if not times:
+            return []
+        start = bisect.bisect_left(times, int(date_from) * 1000)
+        end = bisect.bisect_right(times, self.now_msc())
+        return [tick._asdict() for tick in self.ticks[symbol][start:min(end, start + count)]]
@@ -0,0 +1,157 @@
+import datetime as dt
+from collections import deque
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from constants.granularities import get_granularity
+from models.bar import Bar
+from models.granularity import Granularity
+
+# Epoch day 0 is a Thursday, weekly bars open on Sunday
+WEEK_OFFSET = 3 * 86400
+
+
+def bucket_start(granularity: Granularity, timestamp: int) -> int:
+    """Open time of the bar of `granularity` containing `timestamp` (epoch seconds)."""
+    if granularity.name == "MN1":
+        moment = dt.datetime.fromtimestamp(timestamp, dt.timezone.utc)
+        return int(dt.datetime(moment.year, moment.month, 1, tzinfo=dt.timezone.utc).timestamp())
+    if granularity.name == "W1":
+        return timestamp - (timestamp - WEEK_OFFSET) % granularity.seconds
+    return timestamp - timestamp % granularity.seconds
+
+
+def bar_from_rate(rate) -> Bar:
+    """Converts a row of copy_rates_from_pos into a Bar"""
+    return Bar(
+        time=int(rate["time"]),
+        open=float(rate["open"]),
+        high=float(rate["high"]),
+        low=float(rate["low"]),
+        close=float(rate["close"]),
+        tick_volume=int(rate["tick_volume"]),
+        spread=int(rate["spread"]),
+        real_volume=int(rate["real_volume"]),
+    )
+
+
+class BarSeries:
+    """Bars of one granularity, built incrementally from a finer input stream."""
+
+    def __init__(self, granularity: Granularity, history: int):
+        self.granularity = granularity
+        self.closed: deque = deque(maxlen=history)
+        # Final inputs of the current bucket, and the same plus the latest live input
+        self.partial: Optional[Bar] = None
+        self.forming: Optional[Bar] = None
+        # Inputs starting before this time are already part of the series
+        self.fed_until = 0
+
+    def seed(self, bars: List[Bar], fed_until: int, current: Optional[Bar] = None):
+        """Seeds the series with bars fetched from the terminal, the last one still forming.
+
+        current is the forming minute, fetched with the bars, whose inputs are fed
+        again from fed_until on. Its volume is taken out of the forming bar so the
+        minute only counts once. Its high and low stay, the fed minute covers them.
+        """
+        self.closed.clear()
+        self.closed.extend(bars[:-1])
+        self.partial = replace(bars[-1]) if bars else None
+        self.forming = replace(bars[-1]) if bars else None
+        if self.partial is not None and current is not None and current.time >= self.partial.time:
+            self.partial.tick_volume = max(self.partial.tick_volume - current.tick_volume, 0)
+            self.partial.real_volume = max(self.partial.real_volume - current.real_volume, 0)
+        self.fed_until = fed_until
+
+    def add(self, bar: Bar, final: bool, end: int) -> Optional[Bar]:
+        """Adds an input bar or tick, returning the bar it closed if it starts a new bucket."""
+        if bar.time < self.fed_until:
+            return None
+
+        start = bucket_start(self.granularity, bar.time)
+        if self.closed and start <= self.closed[-1].time:
+            return None
+
+        closed = None
+        if self.forming is not None and start > self.forming.time:
+            closed = self.forming
+            self.closed.append(closed)
+            self.partial = None
+            self.forming = None
+
+        if self.partial is None:
+            merged = replace(bar, time=start)
+        else:
+            merged = replace(self.partial)
+            merged.merge(bar)
+
+        if final:
+            self.partial = merged
+            self.fed_until = end
+        self.forming = merged
+
+        return closed
+
+    def bars(self, count: int) -> List[Bar]:
+        bars = list(self.closed)
+        if self.forming is not None:
+            bars.append(self.forming)
+        return bars[-count:]
+
+
+class BarAggregator:
+    """Builds bars of every granularity configured for a symbol from one base stream.
+
+    The base stream is M1 rates, or ticks when a sub-minute granularity (S20) is
+    configured. Each input updates every series, and a closed bar is reported
+    as a (granularity, bar) event when the first input of the next bucket arrives.
+    """
+
+    def __init__(self, symbol: str, granularities: List[str], history: int = 200):
+        self.symbol = symbol
+        self.series: Dict[str, BarSeries] = {}
+        for name in granularities:
+            self.series[name] = BarSeries(get_granularity(name), history)
+
+        self.uses_ticks = any(s.granularity.seconds < 60 for s in self.series.values())
+        self.last_tick_msc = 0
+
+    def feed(self, bar: Bar, final: bool, end: int) -> List[Tuple[str, Bar]]:
+        events = []
+        for name, series in self.series.items():
+            closed = series.add(bar, final, end)
+            if closed is not None:
+                events.append((name, closed))
+        return events
+
+    def on_rates(self, rates) -> List[Tuple[str, Bar]]:
+        """Feeds M1 rates in time order, the last row being the still forming minute."""
+        events = []
+        for index, rate in enumerate(rates):
+            bar = bar_from_rate(rate)
+            final = index < len(rates) - 1
+            events.extend(self.feed(bar, final, bar.time + 60))
+        return events
+
+    def on_ticks(self, ticks) -> List[Tuple[str, Bar]]:
+        """Feeds ticks from copy_ticks_from. Bars are built on bid prices like the terminal's."""
+        events = []
+        for tick in ticks:
+            time_msc = int(tick["time_msc"])
+            bid = float(tick["bid"])
+            if time_msc <= self.last_tick_msc or bid == 0:
+                continue
+
+            self.last_tick_msc = time_msc
+            timestamp = int(tick["time"])
+            events.extend(self.feed(Bar(timestamp, bid, bid, bid, bid, tick_volume=1), True, timestamp))
+        return events
+
+    def latest(self, granularity: str) -> Optional[Bar]:
+        series = self.series[granularity]
+        if series.forming is not None:
+            return series.forming
+        return series.closed[-1] if series.closed else None
+
+    def bars(self, granularity: str, count: int) -> List[Bar]:
+        return self.series[granularity].bars(count)
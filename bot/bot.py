@@ -1,4 +1,4 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import json
 from queue import Queue
 import time
@@ -8,32 +8,60 @@ import threading
 import logging
 
 from api.metatrader_api import MT5
-from bot.signal_management import process_signal
-from bot.strategy_manager import StrategyManager
+from api.order_execution import ExecutionEngine, is_success
+from api.order_gateway import OrderGateway
+from bot.entry_engine import EntryEngine
+from bot.pre_trade_gate import PreTradeGate
+from bot.risk_model import RiskModel
+from bot.shard_coordinator import ShardCoordinator
+from bot.signal_index import SignalIndex
+from bot.watcher_manager import WatcherManager
+from bot.checkpointer import Checkpointer
+from bot.stop_levels import StopLevelService
+from bot.state_snapshot import load_candle_cache, restore_checkpoint, save_candle_cache
+from bot.tick_recorder import TickRecorder
+from bot.strategy_manager import StrategyManager, build_strategy_managers
+from strategy.registry import get_strategy
 from core.log_wrapper import LogWrapper
+from bot.channel_stats import open_channel_stats
+from db.journal import open_journal
+from utils.execution_file import ExecutionFileWriter
 
 from bot.candle_manager import CandleManager
 
 from models.bot_config import BotConfig
+from models.checkpoint_config import CheckpointConfig
 from models.error_handling import ErrorHandling
-from models.indicators import Indicators
+from models.evaluation import Evaluation
+from models.channel_stats_config import ChannelStatsConfig
+from models.execution_journal_config import ExecutionJournalConfig
+from models.journal_config import JournalConfig
 from models.logging import CloudLogging, Logging, LoggingConfig
+from models.order_execution import OrderExecution
+from models.order_gateway_config import OrderGatewayConfig
 from models.risk_management import RiskManagement
-from models.individual_strategy import IndividualStrategy
+from models.sharding import Sharding
 from models.signal_decision import SignalDecision
 from models.signal_managment import SignalManagement
+from models.tick_recording import TickRecording
 from models.strategy_configuration import StrategyConfiguration
 import bot.trade_manager as trade_manager
 
 from models.trade_management import TradeManagement
 
-from utils.utils import granularity_to_minutes
+from constants.granularities import get_granularity
+from utils.utils import get_next_interval
 
 class Bot:
     ERROR_LOG = "error"
     MAIN_LOG = "main"
 
-    def __init__(self):
+    def __init__(self, state=None):
+        self.started = time.perf_counter()
+        self.last_mark = self.started
+        self.startup_timings: Dict[str, float] = {}
+        self.first_trade_at = None
+
         self.mt5 = MT5()
 
         # Attempt login
@@ -42,33 +70,89 @@ class Bot:
             return  # Exit the constructor if login fails
 
         logging.info("Login successful, proceeding with bot initialization.")
+        self.mark_startup("login")
         
         self.load_settings()
         self.set_bot_configuration()
         self.set_bot_variables()
+        self.mark_startup("settings")
         self.setup_logs()
+        self.journal = None
+        if self.journal_config.enabled:
+            # Before any strategy runs, t_signals updates go through it from the start
+            self.journal = open_journal(self.journal_config.path, batch_size=self.journal_config.batch_size,
+                                        interval=self.journal_config.interval, log_to_error=self.log_to_error)
+        self.channel_stats = None
+        if self.channel_stats_config.enabled:
+            self.channel_stats = open_channel_stats(self.mt5, interval=self.channel_stats_config.interval,
+                                                    lookback_days=self.channel_stats_config.lookback_days,
+                                                    min_trades=self.channel_stats_config.min_trades,
+                                                    min_average_r=self.channel_stats_config.min_average_r,
+                                                    log_to_error=self.log_to_error)
+        self.mark_startup("logs")
+        self.setup_order_gateway()
+        self.setup_order_execution()
+        self.mark_startup("order_execution")
+
+        if self.sharding.enabled:
+            # Worker processes own the candle managers, this process only coordinates
+            self.shard_coordinator = ShardCoordinator(self.mt5, self.tradable_symbols, self.sharding.workers, self.on_shard_signal, self.log_message, self.log_to_error, self.bot_config.strategy_name,
+                                                     self.journal_config.path if self.journal_config.enabled else None)
+        else:
+            candle_state = state
+            if candle_state is None:
+                # Polling can only fill a gap of HISTORY minutes, older caches are warmed up again
+                candle_state = load_candle_cache((CandleManager.HISTORY - 3) * 60, self.log_to_error)
+            self.candle_manager = CandleManager(self.mt5, self.trading_symbols, self.log_message, state=candle_state)
+            self.stop_levels.attach(self.candle_manager)
+        self.mark_startup("candles")
+        self.trade_manager = trade_manager.TradeManager(self.mt5, self.risk_management, self.log_to_main, self.log_message, self.log_to_error, risk_model=self.risk_model, trade_management=self.trade_management, stop_levels=self.stop_levels)
+        self.risk_model.sync(self.mt5.get_open_positions())
+        self.pre_trade_gate = PreTradeGate(self.mt5, self.risk_management, self.risk_model, self.trade_manager, self.log_to_main, self.log_to_error)
+        self.entry_engine = EntryEngine(self.mt5, self.risk_model, self.signal_management.entry_expiry_candles, self.log_message, self.log_to_error)
+        self.watcher_manager = WatcherManager(self.mt5, self.risk_model, self.signal_management.watcher_capacity,
+                                              self.signal_management.entry_expiry_candles, self.log_message, self.log_to_error)
+        # Breakout watchers submitted by run_signal_processor, future -> signal_container
+        self.watchers = self.watcher_manager.watchers
+        self.mark_startup("positions")
+
+        # A handed over state is newer than the last checkpoint
+        if self.checkpoint_config.enabled and state is None:
+            restore_checkpoint(self, self.checkpoint_config.path)
+        if self.uses_entry_engine() and state is None:
+            # Without a handed over or checkpointed book nothing manages these orders anymore
+            self.entry_engine.cancel_orphans()
+        self.mark_startup("checkpoint")
+
+        timings = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings.items())
+        self.log_to_main(f"Bot started in {time.perf_counter() - self.started:.2f}s ({timings})")
+        self.log_to_error("Bot started")
 
-        self.candle_manager = CandleManager(self.mt5, self.trading_symbols, self.log_message)
-        self.trade_manager = trade_manager.TradeManager(self.mt5, self.risk_management, self.log_to_main, self.log_message, self.log_to_error)
+    CONFIGURATION_PATH = "./bot/configuration.json"
+    # Seconds between two reconciliations of the pending entry book
+    ENTRY_ENGINE_INTERVAL = 0.5
 
-        self.log_to_main("Bot started")
-        self.log_to_error("Bot started")
+    def mark_startup(self, phase):
+        now = time.perf_counter()
+        self.startup_timings[phase] = now - self.last_mark
+        self.last_mark = now
 
     def load_settings(self):
-        with open("./bot/configuration.json", "r") as f:
+        with open(self.CONFIGURATION_PATH, "r") as f:
             data = json.loads(f.read())
+            self.settings_data = data
             self.risk_management = RiskManagement(**data["risk_management"])
+            self.risk_model = RiskModel(self.mt5, self.risk_management, self.log_message, self.log_to_error)
+            self.stop_levels = StopLevelService(self.mt5, self.log_to_error)
             self.error_handling = ErrorHandling(**data["error_handling"])
             
             self.logging: Dict[str, Logging] = {}
             for logging_name, logging_config in data["logging"]["directories"].items():
                 self.logging[logging_name] = Logging(**logging_config)
                 
-            error_log = Logging(name=data["logging"]["directories"]["error"]["name"],
-                         log_file_path=data["logging"]["directories"]["error"]["log_file_path"])
-
-            main_log = Logging(name=data["logging"]["directories"]["main"]["name"],
-                                    log_file_path=data["logging"]["directories"]["main"]["log_file_path"])
+            # Reuse the loggers above, a second Logging would add a second handler
+            error_log = self.logging["error"]
+            main_log = self.logging["main"]
 
             cloud_logging = CloudLogging(enabled=data["logging"]["cloud_logging"]["enabled"])
 
@@ -82,29 +166,27 @@ class Bot:
 
             self.trade_management = TradeManagement(**data["trade_management"])
             self.signal_management = SignalManagement(**data["signal_management"])
+            self.tick_recording = TickRecording(**data.get("tick_recording", {"enabled": False, "path": "./data/ticks.bin", "interval": 0.1}))
+            self.sharding = Sharding(**data.get("sharding", {"enabled": False, "workers": 1}))
+            self.evaluation = Evaluation(**data.get("evaluation", {"workers": 4, "timeout": 30}))
+            self.order_execution = OrderExecution(**data.get("order_execution", {"max_retries": 3, "deadline_ms": 2000, "base_backoff_ms": 50}))
+            self.journal_config = JournalConfig(**data.get("journal", {"enabled": False, "path": "./state/journal.db", "batch_size": 100, "interval": 1}))
+            self.channel_stats_config = ChannelStatsConfig(**data.get("channel_stats", {"enabled": False, "interval": 30, "lookback_days": 30, "min_trades": 20, "min_average_r": -0.2}))
+            self.execution_journal_config = ExecutionJournalConfig(**data.get("execution_journal", {"enabled": False, "path": "./data/executions", "chunk_rows": 4096}))
+            self.checkpoint_config = CheckpointConfig(**data.get("checkpoint", {"enabled": False, "path": "./state/checkpoint.bin", "interval": 5}))
+            self.order_gateway_config = OrderGatewayConfig(**data.get("order_gateway", {"enabled": False, "max_requests_per_second": 10, "coalesce_window": 0.25}))
             
+            self.tradable_symbols = data["tradable_symbols"]
             self.trading_symbols: Dict[str, List[StrategyManager]] = {}
             self.trading_times = set()
             
-            for symbol, strategy_configurations in data["tradable_symbols"].items():
-                self.trading_symbols[symbol] = []
-                
+            for symbol, strategy_configurations in self.tradable_symbols.items():
                 for strategy_configuration in strategy_configurations:
-                    granularities_in_minutes = granularity_to_minutes(strategy_configuration["granularity"])
-                    self.trading_times.add(granularities_in_minutes)
-                    
-                    indicators = Indicators(**strategy_configuration["indicators"])
-                    strategy = IndividualStrategy(indicators=indicators, granularity=strategy_configuration["granularity"], risk=strategy_configuration["risk"], profit_ratio=strategy_configuration["profit_ratio"])
-
-                    strategy_manager = StrategyManager(
-                        symbol=symbol,
-                        strategy=strategy,
-                        mt5=self.mt5,
-                        log_message=self.log_message,
-                        log_to_error=self.log_to_error
-                    )
-                    
-                    self.trading_symbols[symbol].append(strategy_manager)
+                    # Raises ValueError for unsupported granularities so the bot fails at startup
+                    granularity = get_granularity(strategy_configuration["granularity"])
+                    self.trading_times.add(granularity.seconds)
+
+                self.trading_symbols[symbol] = build_strategy_managers(symbol, strategy_configurations, self.mt5, self.log_message, self.log_to_error, self.risk_model, self.stop_levels, data["strategy_name"])
                     
             
             self.bot_config = BotConfig(
@@ -118,7 +200,8 @@ class Bot:
                 logging_config=self.logging_config,
                 error_handling=self.error_handling,
                 trade_management=self.trade_management,
-                signal_management=self.signal_management
+                signal_management=self.signal_management,
+                sharding=self.sharding
             )
             
             self.strategy_configuration = StrategyConfiguration(
@@ -126,8 +209,88 @@ class Bot:
                 trading_symbols=self.trading_symbols
             )
 
+    def apply_settings(self, data):
+        """Applies a changed configuration.json in place, without touching positions or caches."""
+        for symbol, strategy_configurations in data["tradable_symbols"].items():
+            for strategy_configuration in strategy_configurations:
+                # Reject the whole configuration before changing anything
+                get_granularity(strategy_configuration["granularity"])
+                get_strategy(strategy_configuration.get("strategy", data["strategy_name"]))
+
+        previous = self.settings_data
+
+        if data["risk_management"] != previous["risk_management"]:
+            self.set_risk_management(RiskManagement(**data["risk_management"]))
+
+        if data["trade_management"] != previous["trade_management"]:
+            self.set_trade_management(TradeManagement(**data["trade_management"]))
+
+        if data["tradable_symbols"] != previous["tradable_symbols"] or data["strategy_name"] != previous["strategy_name"]:
+            if self.sharding.enabled:
+                self.log_to_error("apply_settings: tradable_symbols changes need a restart in sharded mode")
+            else:
+                self.apply_tradable_symbols(data["tradable_symbols"], data["strategy_name"])
+
+        self.bot_config.sleep_time = data["sleep_time"]
+        self.bot_config.start_time = data["start_time"]
+        self.bot_config.end_time = data["end_time"]
+        self.bot_config.active_status = data["active_status"]
+
+        self.settings_data = data
+        self.log_to_main(f"apply_settings: Configuration reloaded {StrategyConfiguration.settings_to_str(self.strategy_configuration)}")
+
+    def set_risk_management(self, risk_management: RiskManagement):
+        # Each component holds a reference, swapping it is atomic for readers
+        self.risk_management = risk_management
+        self.risk_model.risk_management = risk_management
+        self.trade_manager.risk_management = risk_management
+        self.pre_trade_gate.risk_management = risk_management
+        self.strategy_configuration.risk_management = risk_management
+        # Percentage trailing defaults to max_stop_loss_percentage
+        self.trade_manager.compile_policies()
+        self.log_to_main(f"set_risk_management: {risk_management}")
+
+    def set_trade_management(self, trade_management: TradeManagement):
+        self.trade_management = trade_management
+        self.bot_config.trade_management = trade_management
+        self.trade_manager.trade_management = trade_management
+        self.trade_manager.compile_policies()
+        self.log_to_main(f"set_trade_management: {trade_management}")
+
+    def apply_tradable_symbols(self, tradable_symbols, strategy_name):
+        previous = self.tradable_symbols
+        # A new default strategy rebuilds every symbol
+        if strategy_name != self.bot_config.strategy_name:
+            previous = {}
+        trading_symbols = dict(self.trading_symbols)
+
+        for symbol in self.tradable_symbols.keys() - tradable_symbols.keys():
+            trading_symbols.pop(symbol)
+            self.candle_manager.remove_symbol(symbol)
+            self.stop_levels.remove_symbol(symbol)
+            self.log_to_main(f"apply_tradable_symbols: removed {symbol}")
+
+        for symbol, strategy_configurations in tradable_symbols.items():
+            if previous.get(symbol) == strategy_configurations:
+                continue
+
+            if symbol not in self.logs:
+                self.logs[symbol] = LogWrapper(symbol, betterstack_token=self.betterstack_token)
+
+            trading_symbols[symbol] = build_strategy_managers(symbol, strategy_configurations, self.mt5, self.log_message, self.log_to_error, self.risk_model, self.stop_levels, strategy_name)
+            self.candle_manager.add_symbol(symbol, trading_symbols[symbol])
+            self.log_to_main(f"apply_tradable_symbols: updated {symbol}")
+
+        self.trading_times = {get_granularity(c["granularity"]).seconds for configurations in tradable_symbols.values() for c in configurations}
+        self.tradable_symbols = tradable_symbols
+        self.trading_symbols = trading_symbols
+        self.bot_config.strategy_name = strategy_name
+        self.candle_manager.trading_symbols = trading_symbols
+        self.strategy_configuration.trading_symbols = trading_symbols
+
     def setup_logs(self):
         betterstack_token = self.logging_config.cloud_logging.betterstack_token if self.logging_config.cloud_logging.enabled else None
+        self.betterstack_token = betterstack_token
         self.logs: Dict[str, LogWrapper] = {}
         
        # Create log wrappers for all symbols and components
@@ -148,13 +311,48 @@ class Bot:
             f"Bot started with {StrategyConfiguration.settings_to_str(self.strategy_configuration)}"
         )
             
+    def setup_order_gateway(self):
+        self.order_gateway = None
+        if not self.order_gateway_config.enabled:
+            return
+
+        self.order_gateway = OrderGateway(
+            self.mt5.mt5.order_send,
+            self.mt5.mt5.TRADE_ACTION_SLTP,
+            max_requests_per_second=self.order_gateway_config.max_requests_per_second,
+            coalesce_window=self.order_gateway_config.coalesce_window,
+        )
+        self.order_gateway.start()
+        self.mt5.attach_gateway(self.order_gateway)
+        self.log_to_main(f"setup_order_gateway: {self.order_gateway_config}")
+
+    def setup_order_execution(self):
+        self.execution_engine = ExecutionEngine(
+            self.mt5,
+            max_retries=self.order_execution.max_retries,
+            deadline=self.order_execution.deadline_ms / 1000,
+            base_backoff=self.order_execution.base_backoff_ms / 1000,
+        )
+        self.mt5.attach_execution(self.execution_engine)
+
+        self.execution_journal = None
+        if self.execution_journal_config.enabled:
+            self.execution_journal = ExecutionFileWriter(self.execution_journal_config.path, chunk_rows=self.execution_journal_config.chunk_rows)
+            self.mt5.attach_journal(self.execution_journal)
+
     def set_bot_configuration(self):
         self.is_running = True
+        self.is_stopped = False
         self.lock = threading.Lock()
         self.error_count = 0
         
     def set_bot_variables(self):
         self.current_signals = Queue()
+        self.signal_index = SignalIndex(self.signal_management.signal_ttl, self.signal_management.max_signal_age)
+        # Strategy evaluations of process_candles, a strategy runs at most once at a time
+        self.evaluator = ThreadPoolExecutor(max_workers=self.evaluation.workers, thread_name_prefix="evaluation")
+        self.evaluating = set()
+        self.evaluation_started = {}
 
     def log_message(self, msg, key):
         if key in self.logs:
@@ -169,45 +367,110 @@ class Bot:
         self.log_message(msg, 'error')
         
     def get_next_interval(self):
-        now = dt.datetime.now()
-        minimum_duration = min(self.trading_times)
-        
-        # Convert current time to total seconds since last full hour
-        current_seconds = (now.minute * 60) + now.second
-        seconds_to_add = minimum_duration - (current_seconds % minimum_duration)
-        
-        next_interval = now + dt.timedelta(seconds=seconds_to_add)
-        # Set microseconds to zero
-        next_interval = next_interval.replace(microsecond=0)
-        
-        return next_interval
+        return get_next_interval(self.trading_times)
 
     def process_candles(self, triggered):
         try:
             if len(triggered) > 0:
                 self.log_to_main(f"process_candles: triggered {triggered}")
+                evaluations = {}
                 
                 while len(triggered) > 0:
-                    print(triggered)
                     symbol = triggered.pop(0)
                     
-                    print(self.trading_symbols[symbol])
+                    # The symbol may have been removed by a configuration reload
+                    strategy_managers = self.trading_symbols.get(symbol, [])
                     
-                    for strategy_manager in self.trading_symbols[symbol]:
-                        print(f'process_candles: strategy_manager {strategy_manager}')
-                        signal_decision = strategy_manager.generate_signal()
-                        
-                        if signal_decision == None or signal_decision.signal == 0:
+                    # Candles and indicators are built once per granularity and shared by its strategies
+                    frames = {}
+                    for strategy_manager in strategy_managers:
+                        if strategy_manager in self.evaluating:
+                            self.log_to_error(f"process_candles: {symbol} {strategy_manager.strategy.granularity} still running from a previous candle, skipped")
                             continue
-                        
-                        print(f'process_candles: signal_decision {signal_decision}')
-                        signal_container = (signal_decision, strategy_manager)
-                        
-                        self.current_signals.put(signal_container)
+
+                        granularity = strategy_manager.strategy.granularity
+                        if granularity not in frames:
+                            frames[granularity] = self.candle_manager.get_features(symbol, granularity)
+                        self.evaluating.add(strategy_manager)
+                        future = self.evaluator.submit(self.evaluate_strategy, strategy_manager, frames[granularity])
+                        evaluations[future] = strategy_manager
+
+                self.collect_signals(evaluations)
         except Exception as error:
             self.log_to_error(f'process_candles: Error {error}')
             raise error
 
+    def evaluate_strategy(self, strategy_manager: StrategyManager, features):
+        self.evaluation_started[strategy_manager] = time.monotonic()
+        return strategy_manager.generate_signal(features.candles if features else None, features)
+
+    def collect_signals(self, evaluations):
+        """Queues the signals of a pass as their evaluations complete, until every one completed or timed out.
+
+        Each signal is gated as soon as it is produced, so a slow evaluation doesn't make the
+        others stale. The gate counts the slots and risk already reserved by the signals
+        queued earlier in the pass. The timeout runs from the start of the evaluation, or
+        from the start of the pass for one still waiting for a worker.
+        """
+        submitted = time.monotonic()
+        pending = set(evaluations)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                strategy_manager = evaluations[future]
+                self.finish_evaluation(strategy_manager)
+                try:
+                    signal_decision = future.result()
+                except Exception as error:
+                    self.log_to_error(f"process_candles: {strategy_manager.symbol} evaluation failed {error}")
+                    continue
+
+                if signal_decision == None or signal_decision.signal == 0:
+                    continue
+
+                # Admitted against the slots and risk of the signals already queued this pass
+                self.enqueue_signals([(signal_decision, strategy_manager)])
+
+            now = time.monotonic()
+            for future in list(pending):
+                strategy_manager = evaluations[future]
+                started = self.evaluation_started.get(strategy_manager, submitted)
+                if now - started > self.evaluation.timeout:
+                    pending.discard(future)
+                    self.log_to_error(f"process_candles: {strategy_manager.symbol} evaluation timed out after {self.evaluation.timeout}s")
+                    if future.cancel():
+                        self.finish_evaluation(strategy_manager)
+                    else:
+                        future.add_done_callback(lambda f, sm=strategy_manager: self.discard_evaluation(f, sm))
+
+    def enqueue_signals(self, signal_containers):
+        """Drops duplicate and stale signals, then queues the ones the pre-trade gate admits."""
+        indexed = []
+        for signal_container in signal_containers:
+            signal_decision, strategy_manager = signal_container
+            if self.signal_index.admit(signal_decision, get_granularity(strategy_manager.strategy.granularity).seconds):
+                indexed.append(signal_container)
+            else:
+                self.log_to_main(f"enqueue_signals: dropped duplicate or stale {signal_decision}")
+                # The signal was sized, give its reservation back
+                self.risk_model.release(signal_decision)
+
+        for signal_container in self.pre_trade_gate.evaluate(indexed):
+            self.current_signals.put(signal_container)
+
+    def finish_evaluation(self, strategy_manager: StrategyManager):
+        self.evaluating.discard(strategy_manager)
+        self.evaluation_started.pop(strategy_manager, None)
+
+    def discard_evaluation(self, future, strategy_manager: StrategyManager):
+        """A timed out evaluation's signal is stale, its sizing reservation is given back."""
+        self.finish_evaluation(strategy_manager)
+        if not future.cancelled() and future.exception() is None:
+            signal_decision = future.result()
+            if signal_decision is not None and signal_decision.signal != 0:
+                self.log_to_error(f"process_candles: Dropped late signal for {strategy_manager.symbol}")
+                self.risk_model.release(signal_decision)
+
                             
     def run_signal_executor(self):
         self.log_to_main("run_signal_executor: Running signal executor...")
@@ -217,6 +480,11 @@ class Bot:
                     time.sleep(0.1)  # Prevent tight loop when no signals are present                        
                     signal_container = self.current_signals.get()
                     signal_decision, strategy_manager = signal_container
+
+                    if not self.signal_index.is_fresh(signal_decision):
+                        self.log_to_main(f"run_signal_executor: dropped stale {signal_decision}")
+                        self.risk_model.release(signal_decision)
+                        continue
                     
                     self.log_to_main("run_signal_executor: Attempting entry of signal")
 
@@ -230,13 +498,19 @@ class Bot:
                             signal_decision.take_profit,
                             signal_decision.comment,
                             log_message=self.log_message,
-                            log_to_error=self.log_to_error
+                            log_to_error=self.log_to_error,
+                            signal_id=signal_decision.id,
                         )
                         
-                        if placed_trade is None:
+                        if not is_success(placed_trade):
+                            self.risk_model.release(signal_decision)
                             raise ValueError(f"Failed to place order for {signal_decision.symbol}")
 
+                        self.risk_model.on_fill(placed_trade.order, signal_decision.symbol, placed_trade.volume, placed_trade.price, signal_decision.stop_loss, signal_decision=signal_decision)
                         self.log_message(f"run_signal_executor: Successfully placed {signal_decision.symbol}", signal_decision.symbol)
+                        if self.first_trade_at is None:
+                            self.first_trade_at = time.perf_counter()
+                            self.log_to_main(f"run_signal_executor: Time to first trade {self.first_trade_at - self.started:.2f}s")
                         self.log_to_main(f"run_signal_executor: Successfully placed {signal_decision.symbol} for {signal_decision.symbol}")
 
                     except ConnectionError as ce:
@@ -256,34 +530,80 @@ class Bot:
             finally:            
                 time.sleep(self.bot_config.sleep_time)
     
+    def uses_entry_engine(self):
+        return self.signal_management.trade_processor and self.signal_management.pending_entries
+
+    def run_entry_engine(self):
+        self.log_message("run_entry_engine: Running entry engine...", "trade_processor")
+        while self.is_running:
+            try:
+                while not self.current_signals.empty():
+                    signal_decision, strategy_manager = self.current_signals.get()
+
+                    if not self.signal_index.is_fresh(signal_decision):
+                        self.log_to_main(f"run_entry_engine: dropped stale {signal_decision}")
+                        self.risk_model.release(signal_decision)
+                        continue
+
+                    self.log_to_main(f"run_entry_engine: Submitting entry of signal for {signal_decision.symbol}")
+                    self.entry_engine.submit(signal_decision, strategy_manager.strategy.granularity)
+
+                self.entry_engine.update()
+            except Exception as e:
+                self.log_to_error(f"Error in run_entry_engine loop: {e}")
+
+            time.sleep(self.ENTRY_ENGINE_INTERVAL)
+
     def run_signal_processor(self):
+        if self.signal_management.pending_entries:
+            return self.run_entry_engine()
+
         self.log_message("run_signal_processor: Running trade processor...", "trade_processor")
 
-        with ThreadPoolExecutor() as executor:
-            while self.is_running:
-                try:
-                    if not self.current_signals.empty():
-                        time.sleep(0.1)  # Prevent tight loop when no signals are present
-                        
-                        while not self.current_signals.empty():
-                            signal_container = self.current_signals.get()
-                            signal_decision, strategy_manager = signal_container
-
-                            self.log_to_main(f"run_signal_executor: Submitting entry of signal for {signal_decision.symbol}")
-
-                            # Submit the task to the thread pool with unpacked parameters
-                            executor.submit(
-                                process_signal,
-                                self.is_running,
-                                signal_decision,
-                                self.mt5,
-                                strategy_manager,
-                                self.log_message,
-                                self.log_to_error
-                            )
-
-                except Exception as e:
-                    self.log_to_error(f"Error in run_signal_processor loop: {e}")
+        while self.is_running:
+            try:
+                while not self.current_signals.empty():
+                    signal_container = self.current_signals.get()
+                    signal_decision, strategy_manager = signal_container
+
+                    if not self.signal_index.is_fresh(signal_decision):
+                        self.log_to_main(f"run_signal_processor: dropped stale {signal_decision}")
+                        self.risk_model.release(signal_decision)
+                        continue
+
+                    self.log_to_main(f"run_signal_executor: Submitting entry of signal for {signal_decision.symbol}")
+                    self.watcher_manager.submit(signal_container)
+
+            except Exception as e:
+                self.log_to_error(f"Error in run_signal_processor loop: {e}")
+
+            time.sleep(0.1)  # Prevent tight loop when no signals are present
+
+    def on_shard_signal(self, symbol, index, signal_decision):
+        # Map the worker's signal back to the coordinator's own StrategyManager
+        strategy_manager = self.trading_symbols[symbol][index]
+        self.log_to_main(f"on_shard_signal: signal_decision {signal_decision}")
+        # Workers leave signals unsized, they are sized here so they hold a reservation like any other
+        lot_size = self.risk_model.size(signal_decision, self.log_message, self.log_to_error)
+        if lot_size is None:
+            self.log_to_main(f"on_shard_signal: {symbol} signal rejected by risk limits")
+            return
+        signal_decision.volume, _, price_decimals = lot_size
+        signal_decision.take_profit = round(signal_decision.take_profit, price_decimals)
+        signal_decision.stop_loss = round(signal_decision.stop_loss, price_decimals)
+        self.enqueue_signals([(signal_decision, strategy_manager)])
+
+    def run_shards(self):
+        self.log_to_main(f"run_shards: Running {len(self.shard_coordinator.groups)} shard workers...")
+        self.shard_coordinator.start()
+        while self.is_running:
+            try:
+                self.shard_coordinator.check_shards()
+            except Exception as e:
+                self.log_to_error(f"run_shards: Critical error in run_shards thread: {e}")
+                self.error_count += 1
+            time.sleep(1)
+        self.shard_coordinator.stop()
 
     def run_bot(self):
         self.log_to_main("run_bot: Running bot...")
@@ -301,20 +621,66 @@ class Bot:
                 self.error_count += 1
 
                     
-    def stop(self):
+    def stop(self, close_positions=True):
+        if self.is_stopped:
+            return
+        self.is_stopped = True
+        if not close_positions:
+            # Positions stay open for the process taking over, which now owns order submission
+            self.mt5.orders_enabled = False
+
         self.log_to_main("stop: Gracefully stop the threads")
         
         # Stop trade manager first to ensure proper trade cleanup
         self.trade_manager.stop_trade_manager()
-        self.trade_manager.close_open_trades()
+        if close_positions:
+            self.trade_manager.close_open_trades()
                 
         self.is_running = False
+        self.evaluator.shutdown(wait=False, cancel_futures=True)
+
+        if getattr(self, "checkpointer", None) is not None:
+            # After a handoff the new process owns the checkpoint
+            self.checkpointer.stop(write=close_positions)
+            self.log_to_main(f"stop: Checkpointer wrote {self.checkpointer.written} checkpoints")
+
+        if getattr(self, "tick_recorder", None) is not None:
+            self.tick_recorder.stop()
+            self.log_to_main(f"stop: Tick recorder captured {self.tick_recorder.recorded} ticks")
+
+        self.log_to_main(f"stop: Signal index stats {self.signal_index.stats()}")
+        self.watcher_manager.stop()
+        self.log_to_main(f"stop: Watcher stats {self.watcher_manager.metrics()}")
+
+        # After the watchers, whose last orders still go through it
+        if self.order_gateway is not None:
+            self.order_gateway.stop()
+            self.log_to_main(f"stop: Order gateway sent {self.order_gateway.sent} requests, coalesced {self.order_gateway.coalesced}")
+
+        self.log_to_main(f"stop: Order execution stats {self.execution_engine.stats()}")
+        if self.execution_journal is not None:
+            self.execution_journal.close()
+
+        if self.channel_stats is not None:
+            self.channel_stats.stop()
+            self.log_to_main(f"stop: Channel stats read {self.channel_stats.deals_read} deals of {len(self.channel_stats.stats)} channels")
+
+        if self.journal is not None:
+            self.journal.stop()
+            self.log_to_main(f"stop: Journal wrote {self.journal.flushed} updates, {self.journal.pending()} pending")
+
+        if getattr(self, "candle_manager", None) is not None:
+            try:
+                save_candle_cache(self.candle_manager)
+            except Exception as e:
+                self.log_to_error(f"stop: Unable to save candle cache {e}")
         
         self.log_to_main("stop: Bot has been stopped.")
 
     def run(self):
         try: 
-            run_bot_thread = threading.Thread(target=self.run_bot, name="run_bot_thread")
+            run_bot_target = self.run_shards if self.sharding.enabled else self.run_bot
+            run_bot_thread = threading.Thread(target=run_bot_target, name="run_bot_thread")
             run_bot_thread.start()
             
             if self.bot_config.signal_management.trade_processor:
@@ -324,6 +690,20 @@ class Bot:
                 
             run_signal_executor.start()
 
+            if self.journal is not None:
+                self.journal.start()
+
+            if self.channel_stats is not None:
+                self.channel_stats.start()
+
+            if self.checkpoint_config.enabled:
+                self.checkpointer = Checkpointer(self, self.checkpoint_config.path, self.checkpoint_config.interval, self.log_to_error)
+                self.checkpointer.start()
+
+            if self.tick_recording.enabled:
+                self.tick_recorder = TickRecorder(self.mt5, list(self.trading_symbols.keys()), self.tick_recording.path, self.tick_recording.interval, self.log_to_error)
+                self.tick_recorder.start()
+
             # Start trade manager thread
             trade_manager_thread = threading.Thread(target=self.trade_manager.run_trade_manager, name="trade_manager_thread")
             trade_manager_thread.start()
@@ -1,71 +1,230 @@
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import pandas as pd
 from api.metatrader_api import MT5
+from bot.bar_aggregator import BarAggregator, bar_from_rate
 from bot.strategy_manager import StrategyManager
 from models.candle_timing import CandleTiming
+from strategy.features import FeatureFrame
 import constants.defs as defs
-from models.individual_strategy import IndividualStrategy
 import datetime as dt
+import threading
+import time
 
 class CandleManager:
-    def __init__(self, mt5: MT5, trading_symbols: Dict[str, List[StrategyManager]], log_message):
+    HISTORY = 200
+    TICK_BATCH = 10000
+    WARMUP_WORKERS = 8
+
+    def __init__(self, mt5: MT5, trading_symbols: Dict[str, List[StrategyManager]], log_message, state: Optional[dict] = None):
         self.mt5 = mt5
         self.trading_symbols = trading_symbols
         self.log_message = log_message
+        self.listeners = []
+        self.last_polls: Dict[str, float] = {}
+        # Series whose latest closed bar was never evaluated before a crash
+        self.missed = set()
+        # Held to swap or read timings, symbols_list and aggregators together
+        self.lock = threading.Lock()
+
+        self.create_timings(state)
+
+    def subscribe(self, listener):
+        """Registers listener(symbol, granularity, bar), called for every closed bar."""
+        self.listeners.append(listener)
 
-        self.create_timings()
-        
-    def create_timings(self):
+    def create_timings(self, state: Optional[dict] = None):
         self.timings: Dict[str, CandleTiming] = {}
         self.symbols_list: List[tuple[str, str]] = []
-        
+        self.aggregators: Dict[str, BarAggregator] = {}
+
+        if state is not None:
+            # Series handed over by a previous process skip the warmup fetch, polling fills the gap
+            self.aggregators = {s: a for s, a in state.get("aggregators", {}).items() if s in self.trading_symbols}
+            self.timings = {n: t for n, t in state.get("timings", {}).items() if n.rsplit('_', 1)[0] in self.trading_symbols}
+            self.last_polls = dict(state.get("last_polls", {}))
+
+        # Seed the symbols without a usable series in parallel, the terminal answers them concurrently
+        cold = []
         for symbol, strategy_managers in self.trading_symbols.items():
-            for strategy_manager in strategy_managers:
-                strategy = strategy_manager.strategy
-                granularity = strategy.granularity
-                
-                name = f'{symbol}_{granularity}'
-                current_candle = self.mt5.query_historic_data(symbol, 1, granularity=granularity)
-                timestamp = current_candle[0][0]
-            
-                datetime = dt.datetime.fromtimestamp(timestamp)
-                
-                self.timings[name] = CandleTiming(
-                    last_time=datetime)
-
-                timing_var = (symbol, granularity)
-                self.symbols_list.append(timing_var)
-
-        for pg, t in self.timings.items():
-            symbol, granularity = pg.rsplit('_', 1)
-
-            self.log_message(f"CandleManager() init last_candle:{t}", symbol)
-            
+            granularities = self.granularities(strategy_managers)
+            aggregator = self.aggregators.get(symbol)
+            if aggregator is None or list(aggregator.series) != granularities:
+                self.aggregators[symbol] = BarAggregator(symbol, granularities, self.HISTORY)
+                cold.append(self.aggregators[symbol])
+
+        if cold:
+            with ThreadPoolExecutor(max_workers=min(self.WARMUP_WORKERS, len(cold))) as executor:
+                list(executor.map(self.warmup, cold))
+
+        for symbol, strategy_managers in self.trading_symbols.items():
+            self.add_symbol(symbol, strategy_managers)
+
+    def granularities(self, strategy_managers: List[StrategyManager]) -> List[str]:
+        return list(dict.fromkeys(sm.strategy.granularity for sm in strategy_managers))
+
+    def add_symbol(self, symbol, strategy_managers: List[StrategyManager]):
+        """Starts tracking candles for a symbol, keeping its series if the granularities didn't change."""
+        granularities = self.granularities(strategy_managers)
+        aggregator = self.aggregators.get(symbol)
+
+        if aggregator is None or list(aggregator.series) != granularities:
+            aggregator = BarAggregator(symbol, granularities, self.HISTORY)
+            self.warmup(aggregator)
+
+        # Strategies build their incremental state from the same candles
+        for strategy_manager in strategy_managers:
+            if strategy_manager.wants_history:
+                strategy_manager.warmup(self.candles_of(aggregator, strategy_manager.strategy.granularity))
+
+        with self.lock:
+            self.swap_symbol(symbol, granularities, aggregator)
+
+    def swap_symbol(self, symbol, granularities: List[str], aggregator: BarAggregator):
+        """Call with the lock held"""
+        timings = {name: timing for name, timing in self.timings.items() if name.rsplit('_', 1)[0] != symbol}
+        symbols_list = [timing_var for timing_var in self.symbols_list if timing_var[0] != symbol]
+
+        for granularity in granularities:
+            name = f'{symbol}_{granularity}'
+            latest = aggregator.latest(granularity)
+            timestamp = latest.time if latest else dt.datetime.now().timestamp()
+
+            timings[name] = self.timings.get(name) or CandleTiming(
+                last_time=dt.datetime.fromtimestamp(timestamp))
+
+            timing_var = (symbol, granularity)
+            symbols_list.append(timing_var)
+            self.log_message(f"CandleManager() init last_candle:{timings[name]}", symbol)
+
+        # Swap whole dicts, update_timings reads them under the lock
+        self.timings = timings
+        self.symbols_list = symbols_list
+        self.aggregators = {**self.aggregators, symbol: aggregator}
+
+    def restore_timings(self, timings: Dict[str, CandleTiming]):
+        """Compares checkpointed timings with the warmed up series, a newer bar is evaluated on the first pass."""
+        for name, timing in timings.items():
+            current = self.timings.get(name)
+            if current is not None and current.last_time > timing.last_time:
+                self.missed.add(name)
+
+    def remove_symbol(self, symbol):
+        with self.lock:
+            self.aggregators = {s: aggregator for s, aggregator in self.aggregators.items() if s != symbol}
+            self.symbols_list = [timing_var for timing_var in self.symbols_list if timing_var[0] != symbol]
+            self.timings = {name: timing for name, timing in self.timings.items() if name.rsplit('_', 1)[0] != symbol}
+            self.last_polls.pop(symbol, None)
+
+    def warmup(self, aggregator: BarAggregator):
+        """Seeds every series of the symbol once, after that only the base stream is fetched."""
+        symbol = aggregator.symbol
+        current_minute = self.mt5.query_historic_data(symbol, 1, granularity="M1")
+        current = bar_from_rate(current_minute[-1])
+        minute_start = current.time
+
+        for name, series in aggregator.series.items():
+            if series.granularity.seconds < 60:
+                continue
+            rates = self.mt5.query_historic_data(symbol, self.HISTORY, granularity=name)
+            # The forming bar already holds part of the current minute, which is fed again in full
+            series.seed([bar_from_rate(rate) for rate in rates], minute_start, current)
+
+        if aggregator.uses_ticks:
+            history_seconds = min(s.granularity.seconds for s in aggregator.series.values()) * self.HISTORY
+            ticks = self.mt5.query_ticks(symbol, minute_start - history_seconds, self.TICK_BATCH * 10)
+            aggregator.on_ticks(ticks if ticks is not None else [])
+            if aggregator.last_tick_msc == 0:
+                aggregator.last_tick_msc = minute_start * 1000
+
+        self.last_polls[symbol] = time.time()
+
+    def poll(self, aggregator: BarAggregator):
+        """Fetches the symbol's base stream and returns the closed bars, None if the terminal returned nothing."""
+        if aggregator.uses_ticks:
+            ticks = self.mt5.query_ticks(aggregator.symbol, aggregator.last_tick_msc // 1000, self.TICK_BATCH)
+            if ticks is None:
+                return None
+            since = aggregator.last_tick_msc
+            events = aggregator.on_ticks(ticks)
+            for strategy_manager in self.trading_symbols.get(aggregator.symbol, []):
+                if strategy_manager.wants_ticks:
+                    for tick in ticks:
+                        if tick["time_msc"] > since:
+                            strategy_manager.on_tick(tick)
+            return events
+
+        # Every minute that closed since the last poll has to be fed again as final
+        elapsed = time.time() - self.last_polls.get(aggregator.symbol, 0)
+        count = min(int(elapsed // 60) + 3, self.HISTORY)
+        self.last_polls[aggregator.symbol] = time.time()
+
+        rates = self.mt5.query_historic_data(aggregator.symbol, count, granularity="M1")
+        return aggregator.on_rates(rates) if rates is not None and len(rates) > 0 else None
+
     def update_timings(self):
         triggered: List[str] = []
+        # One consistent view, add_symbol and remove_symbol swap these under the lock
+        with self.lock:
+            aggregators = list(self.aggregators.items())
+            timings = self.timings
+
+        for symbol, aggregator in aggregators:
+            events = self.poll(aggregator)
 
-        for symbol, granularity in self.symbols_list:
-            current_candle = self.mt5.query_historic_data(symbol, 1, granularity=granularity)
-            timestamp = current_candle[0][0] if current_candle else None
-            current_time = dt.datetime.fromtimestamp(timestamp)
-                                
-            if current_time is None:
+            if events is None:
                 self.log_message(f"Unable to get candle for {symbol}. Retrying...", symbol)
-                self.timings[f'{symbol}_{granularity}'].tries += 1
-                if self.timings[f'{symbol}_{granularity}'].tries > defs.MAX_RETRIES:
-                    self.log_message(f"Max retries exceeded for {symbol}. Skipping update.", symbol)
+                for granularity in aggregator.series:
+                    timings[f'{symbol}_{granularity}'].tries += 1
+                    if timings[f'{symbol}_{granularity}'].tries > defs.MAX_RETRIES:
+                        self.log_message(f"Max retries exceeded for {symbol}. Skipping update.", symbol)
                 continue
 
-            # Reset retries on success
-            self.timings[f'{symbol}_{granularity}'].tries = 0
-            symbol_granularity = f'{symbol}_{granularity}'
-            self.timings[symbol_granularity].is_ready = False
+            for granularity in aggregator.series:
+                # Reset retries on success
+                timings[f'{symbol}_{granularity}'].tries = 0
+                timings[f'{symbol}_{granularity}'].is_ready = False
+
+                if f'{symbol}_{granularity}' in self.missed:
+                    self.missed.discard(f'{symbol}_{granularity}')
+                    timings[f'{symbol}_{granularity}'].is_ready = True
+                    triggered.append(symbol)
+
+            for granularity, bar in events:
+                for listener in self.listeners:
+                    listener(symbol, granularity, bar)
+                for strategy_manager in self.trading_symbols.get(symbol, []):
+                    if strategy_manager.strategy.granularity == granularity:
+                        strategy_manager.on_bar(bar)
 
-            if current_time > self.timings[symbol_granularity].last_time:
-                self.timings[symbol_granularity].is_ready = True
-                self.timings[symbol_granularity].last_time = current_time
+                symbol_granularity = f'{symbol}_{granularity}'
+                if timings[symbol_granularity].is_ready:
+                    # Several bars of this granularity closed since the last poll
+                    continue
+
+                timings[symbol_granularity].is_ready = True
+                timings[symbol_granularity].last_time = dt.datetime.fromtimestamp(aggregator.latest(granularity).time)
                 self.log_message(
-                    f"CandleManager() new candle:{self.timings[symbol_granularity]}", symbol)
+                    f"CandleManager() new candle:{timings[symbol_granularity]}", symbol)
                 triggered.append(symbol)
 
         return triggered
 
+    def get_candles(self, symbol, granularity, count: int = HISTORY) -> Optional[pd.DataFrame]:
+        """Candles built by the aggregator in the same shape as MT5.fetch_candles, None when not available."""
+        aggregator = self.aggregators.get(symbol)
+        if aggregator is None or granularity not in aggregator.series:
+            return None
+        return self.candles_of(aggregator, granularity, count)
+
+    def get_features(self, symbol, granularity, count: int = HISTORY) -> Optional[FeatureFrame]:
+        """Candles of get_candles wrapped in a FeatureFrame to share between the strategies of a symbol."""
+        candles = self.get_candles(symbol, granularity, count)
+        return FeatureFrame(candles) if candles is not None else None
+
+    def candles_of(self, aggregator: BarAggregator, granularity, count: int = HISTORY) -> Optional[pd.DataFrame]:
+        bars = aggregator.bars(granularity, count)
+        if not bars:
+            return None
+
+        return self.mt5.configure_df([bar.as_rate() for bar in bars])
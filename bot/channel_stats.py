@@ -0,0 +1,227 @@
+import dataclasses
+import datetime as dt
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from models.channel_stat import ChannelStat
+from models.signal_decision import SignalDecision
+
+# MetaTrader5 DEAL_ENTRY_* and DEAL_TYPE_* values, kept here so the module can be imported without the terminal package
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+
+# MT5 keeps the first 31 characters of an order comment, channels are keyed the same way
+COMMENT_LENGTH = 31
+
+
+def channel_key(channel: Optional[str]) -> str:
+    return (channel or "")[:COMMENT_LENGTH]
+
+
+@dataclasses.dataclass
+class OpenTrade:
+    channel: str
+    side: int = 0
+    stop_loss: float = 0.0
+    # Decision price and seconds from the signal to the fill, known for positions opened by this process
+    decision_price: Optional[float] = None
+    latency: Optional[float] = None
+    volume_in: float = 0.0
+    volume_out: float = 0.0
+    entry_value: float = 0.0
+    exit_value: float = 0.0
+    pnl: float = 0.0
+    # Local time register() was called, 0 for trades read from the deals
+    registered_at: float = 0.0
+
+
+class ChannelStats(threading.Thread):
+    """Win rate, average R, slippage and latency from the signal per copy signal channel.
+
+    Every interval seconds only the deals since the last poll are read with
+    history_deals_get. A fill adds to the channel's slippage and latency, a
+    position's last closing deal adds its outcome, so nothing is scanned twice.
+    The first poll reads lookback_days of history to rebuild the totals after a
+    restart. lookup() and allows() only read memory, the strategy path calls them
+    for every signal.
+    """
+
+    # Deals are re-read this many seconds back, in case the server publishes them late
+    OVERLAP = 60
+
+    def __init__(self, mt5, interval: float = 30, lookback_days: int = 30, min_trades: int = 20, min_average_r: float = -0.2,
+                 log_to_error: Callable = print, clock: Callable[[], float] = time.time):
+        super().__init__(name="channel_stats_thread", daemon=True)
+        self.mt5 = mt5
+        self.interval = interval
+        self.min_trades = min_trades
+        self.min_average_r = min_average_r
+        self.log_to_error = log_to_error
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+        self.stats: Dict[str, ChannelStat] = {}
+        # position id -> trade being followed until its volume is closed
+        self.trades: Dict[int, OpenTrade] = {}
+        # position id -> trade registered by the order path, before its deals are read. Dropped when
+        # a poll sent more than OVERLAP seconds after the registration still did not return the fill
+        self.registered: Dict[int, OpenTrade] = {}
+        # Deal ticket -> deal time, of the deals inside the overlap
+        self.seen: Dict[int, int] = {}
+        self.cursor = clock() - lookback_days * 86400
+        self.deals_read = 0
+
+    def register(self, signal_decision: SignalDecision, position_id: int):
+        """Remembers the signal behind a position right after its fill, so the fill can be compared with the decision.
+
+        Deal times are in server time, the latency is taken here with the local clock instead.
+        """
+        signal_time = signal_decision.signal_created_at or signal_decision.signal_timestamp
+        with self.lock:
+            if position_id in self.trades:
+                # Its fill was already read
+                return
+            self.registered[position_id] = OpenTrade(
+                channel=channel_key(signal_decision.comment),
+                side=signal_decision.signal,
+                stop_loss=signal_decision.stop_loss,
+                decision_price=signal_decision.current_price,
+                latency=self.clock() - signal_time.timestamp() if signal_time is not None else None,
+                registered_at=self.clock(),
+            )
+
+    def poll(self) -> int:
+        """Applies the deals since the last poll, returns how many were new."""
+        polled_at = self.clock()
+        date_from = dt.datetime.fromtimestamp(self.cursor - self.OVERLAP, tz=dt.timezone.utc)
+        # Deal times are in server time, which can be ahead of UTC
+        date_to = dt.datetime.fromtimestamp(self.clock() + 86400, tz=dt.timezone.utc)
+        deals = self.mt5.mt5.history_deals_get(date_from, date_to)
+        if deals is None:
+            return 0
+        # Stop losses of positions opened by an earlier process, read outside the lock
+        orders = {order.ticket: order for order in self.mt5.mt5.history_orders_get(date_from, date_to) or ()}
+
+        new = 0
+        with self.lock:
+            for deal in sorted(deals, key=lambda deal: (deal.time_msc, deal.ticket)):
+                if deal.ticket in self.seen or deal.magic != self.mt5.MAGIC:
+                    continue
+                self.seen[deal.ticket] = deal.time
+                self.apply(deal, orders)
+                self.cursor = max(self.cursor, deal.time)
+                new += 1
+
+            limit = self.cursor - self.OVERLAP
+            self.seen = {ticket: time_ for ticket, time_ in self.seen.items() if time_ >= limit}
+            # Positions whose fill never showed up, like a deal of another account or one removed from history
+            limit = polled_at - self.OVERLAP
+            self.registered = {position_id: trade for position_id, trade in self.registered.items() if trade.registered_at >= limit}
+        self.deals_read += new
+        return new
+
+    def apply(self, deal, orders: dict):
+        """Call with the lock held"""
+        if deal.entry == DEAL_ENTRY_IN:
+            trade = self.trades.get(deal.position_id)
+            if trade is None:
+                trade = self.registered.pop(deal.position_id, None) or self.unregistered_trade(deal, orders.get(deal.order))
+                self.trades[deal.position_id] = trade
+            self.fill(trade, deal)
+            return
+
+        trade = self.trades.get(deal.position_id)
+        if trade is None:
+            # Opened before the history the first poll read
+            return
+        trade.volume_out += deal.volume
+        trade.exit_value += deal.price * deal.volume
+        trade.pnl += deal.profit + deal.commission + deal.swap + getattr(deal, "fee", 0.0)
+        if trade.volume_out >= trade.volume_in - 1e-9:
+            del self.trades[deal.position_id]
+            self.close(trade)
+
+    def unregistered_trade(self, deal, order) -> OpenTrade:
+        """A position opened by an earlier process, the stop loss comes from its order."""
+        return OpenTrade(channel=channel_key(deal.comment), side=1 if deal.type == DEAL_TYPE_BUY else -1,
+                         stop_loss=order.sl if order is not None else 0.0)
+
+    def fill(self, trade: OpenTrade, deal):
+        first_fill = trade.volume_in == 0
+        trade.volume_in += deal.volume
+        trade.entry_value += deal.price * deal.volume
+        trade.pnl += deal.profit + deal.commission + deal.swap + getattr(deal, "fee", 0.0)
+        if not first_fill or not trade.channel:
+            return
+
+        stat = self.stats.setdefault(trade.channel, ChannelStat())
+        stat.fills += 1
+        risk = trade.side * (trade.decision_price - trade.stop_loss) if trade.decision_price is not None else 0
+        if risk > 0:
+            stat.slippage_sum += trade.side * (deal.price - trade.decision_price) / risk
+            stat.slippage_count += 1
+        if trade.latency is not None:
+            stat.latency_sum += trade.latency
+            stat.latency_count += 1
+
+    def close(self, trade: OpenTrade):
+        if not trade.channel or trade.volume_in == 0:
+            return
+        stat = self.stats.setdefault(trade.channel, ChannelStat())
+        stat.trades += 1
+        stat.wins += trade.pnl > 0
+
+        entry = trade.entry_value / trade.volume_in
+        risk = trade.side * (entry - trade.stop_loss) if trade.stop_loss else 0
+        if risk > 0:
+            stat.r_sum += trade.side * (trade.exit_value / trade.volume_out - entry) / risk
+            stat.r_count += 1
+
+    def lookup(self, channel: Optional[str]) -> Optional[ChannelStat]:
+        with self.lock:
+            stat = self.stats.get(channel_key(channel))
+            return dataclasses.replace(stat) if stat is not None else None
+
+    def allows(self, channel: Optional[str]) -> bool:
+        """False for a channel with min_trades closed trades and an average R below min_average_r."""
+        stat = self.lookup(channel)
+        return stat is None or stat.r_count < self.min_trades or stat.average_r >= self.min_average_r
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.log_to_error(f"ChannelStats: poll failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def stop(self, timeout: float = 5):
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+CHANNEL_STATS: Optional[ChannelStats] = None
+
+
+def open_channel_stats(mt5, **kwargs) -> ChannelStats:
+    """Makes the stats of this process available to register_position and channel_allows."""
+    global CHANNEL_STATS
+    CHANNEL_STATS = ChannelStats(mt5, **kwargs)
+    return CHANNEL_STATS
+
+
+def register_position(signal_decision: SignalDecision, position_id: int):
+    if CHANNEL_STATS is not None:
+        CHANNEL_STATS.register(signal_decision, position_id)
+
+
+def channel_allows(channel: Optional[str]) -> bool:
+    """Always True where no stats were opened, like shard worker processes."""
+    return CHANNEL_STATS is None or CHANNEL_STATS.allows(channel)
@@ -0,0 +1,71 @@
+import datetime as dt
+import threading
+import time
+from typing import Dict
+
+from bot.state_snapshot import pending_signals, save_candle_cache
+from utils.checkpoint_file import (
+    DAILY_LOSS_SECTION, ENTRIES_SECTION, SIGNALS_SECTION, TIERS_SECTION, TIMINGS_SECTION,
+    encode_daily_loss, encode_entries, encode_signals, encode_tiers, encode_timings, write_checkpoint,
+)
+
+
+class Checkpointer(threading.Thread):
+    """Writes the state a crash would lose to a binary checkpoint, only when it changed."""
+
+    # Candle series change once a minute, saving them more often gains nothing
+    CANDLE_CACHE_INTERVAL = 60
+
+    def __init__(self, bot, path: str, interval: float, log_to_error):
+        super().__init__(name="checkpoint_thread", daemon=True)
+        self.bot = bot
+        self.path = path
+        self.interval = interval
+        self.log_to_error = log_to_error
+        self.lock = threading.Lock()
+        self.sections: Dict[bytes, bytes] = {}
+        self.last_candle_cache = time.monotonic()
+        self.running = True
+        self.written = 0
+
+    def collect(self) -> Dict[bytes, bytes]:
+        sections = {
+            DAILY_LOSS_SECTION: encode_daily_loss(self.bot.trade_manager.daily_loss, dt.date.today()),
+            SIGNALS_SECTION: encode_signals(pending_signals(self.bot)),
+            TIERS_SECTION: encode_tiers(dict(self.bot.trade_manager.tiers_done)),
+            ENTRIES_SECTION: encode_entries(self.bot.entry_engine.entries()),
+        }
+        candle_manager = getattr(self.bot, "candle_manager", None)
+        if candle_manager is not None:
+            sections[TIMINGS_SECTION] = encode_timings(candle_manager.timings)
+        return sections
+
+    def checkpoint(self) -> bool:
+        with self.lock:
+            sections = self.collect()
+            if sections == self.sections:
+                return False
+
+            write_checkpoint(self.path, sections, time.time())
+            self.sections = sections
+            self.written += 1
+            return True
+
+    def run(self):
+        while self.running:
+            try:
+                self.checkpoint()
+
+                candle_manager = getattr(self.bot, "candle_manager", None)
+                if candle_manager is not None and time.monotonic() - self.last_candle_cache >= self.CANDLE_CACHE_INTERVAL:
+                    save_candle_cache(candle_manager)
+                    self.last_candle_cache = time.monotonic()
+            except Exception as error:
+                self.log_to_error(f"Checkpointer: Failed writing checkpoint: {error}")
+
+            time.sleep(self.interval)
+
+    def stop(self, write=True):
+        self.running = False
+        if write:
+            self.checkpoint()
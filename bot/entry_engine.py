@@ -0,0 +1,229 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from api.order_execution import is_success
+from bot.bar_aggregator import bar_from_rate, bucket_start
+from bot.signal_management import update_position_id
+from constants.granularities import get_granularity
+from models.bar import Bar
+from models.pending_entry import PendingEntry
+from models.signal_decision import SignalDecision
+
+
+class EntryEngine:
+    """Enters breakout signals with BUY_STOP/SELL_STOP orders resting on the server.
+
+    A buy is placed at the high of the last closed candle, a sell at its low. When
+    a candle of the signal's granularity closes, the order moves to the new candle's
+    high or low. Orders are cancelled after expiry_candles candles. One update()
+    reconciles the whole book with orders_get(), so pending entries cost no thread
+    and no polling per signal.
+    """
+
+    def __init__(self, mt5, risk_model, expiry_candles: int, log_message, log_to_error):
+        self.mt5 = mt5
+        self.risk_model = risk_model
+        self.expiry_candles = expiry_candles
+        self.log_message = log_message
+        self.log_to_error = log_to_error
+        self.lock = threading.Lock()
+        # order ticket -> entry waiting on the server
+        self.book: Dict[int, PendingEntry] = {}
+
+    def last_closed(self, symbol, granularity) -> Optional[Bar]:
+        rates = self.mt5.query_historic_data(symbol, 2, granularity=granularity)
+        if rates is None or len(rates) < 2:
+            return None
+        # The last rate is the candle still forming
+        return bar_from_rate(rates[0])
+
+    def submit(self, signal_decision: SignalDecision, granularity: str):
+        """Places the entry of a sized signal, at market when the breakout already happened."""
+        bar = self.last_closed(signal_decision.symbol, granularity)
+        if bar is None:
+            self.log_to_error(f"EntryEngine: No candles for {signal_decision.symbol}, signal dropped")
+            self.risk_model.release(signal_decision)
+            return
+
+        expires_at = time.time() + self.expiry_candles * get_granularity(granularity).seconds
+        with self.lock:
+            self.enter(signal_decision, granularity, bar, expires_at)
+
+    def enter(self, signal_decision: SignalDecision, granularity: str, bar: Bar, expires_at: float):
+        """Call with the lock held"""
+        symbol = signal_decision.symbol
+        is_buy = signal_decision.signal == 1
+        trigger = bar.high if is_buy else bar.low
+
+        tick = self.mt5.mt5.symbol_info_tick(symbol)
+        if tick is None:
+            self.log_to_error(f"EntryEngine: Failed to get tick info for {symbol}, signal dropped")
+            self.risk_model.release(signal_decision)
+            return
+
+        if (is_buy and tick.ask > trigger) or (not is_buy and tick.bid < trigger):
+            # A stop order must rest beyond the price, the breakout already happened
+            self.enter_market(signal_decision, tick.ask if is_buy else tick.bid)
+            return
+
+        placed_order = self.mt5.place_order(
+            "BUY_STOP" if is_buy else "SELL_STOP",
+            symbol,
+            signal_decision.volume,
+            trigger,
+            signal_decision.stop_loss,
+            signal_decision.take_profit,
+            signal_decision.comment,
+            log_message=self.log_message,
+            log_to_error=self.log_to_error,
+            signal_id=signal_decision.id,
+        )
+        if not is_success(placed_order):
+            self.log_to_error(f"EntryEngine: Failed to place pending entry for {symbol}: {placed_order}")
+            self.risk_model.release(signal_decision)
+            return
+
+        self.book[placed_order.order] = PendingEntry(placed_order.order, signal_decision, granularity, trigger, bar.time, expires_at)
+        self.log_message(f"EntryEngine: {symbol} pending entry {placed_order.order} at {trigger}", symbol)
+
+    def enter_market(self, signal_decision: SignalDecision, price: float):
+        symbol = signal_decision.symbol
+        placed_trade = self.mt5.place_order(
+            "BUY_MARKET" if signal_decision.signal == 1 else "SELL_MARKET",
+            symbol,
+            signal_decision.volume,
+            price,
+            signal_decision.stop_loss,
+            signal_decision.take_profit,
+            signal_decision.comment,
+            log_message=self.log_message,
+            log_to_error=self.log_to_error,
+            signal_id=signal_decision.id,
+        )
+        if not is_success(placed_trade):
+            self.log_to_error(f"EntryEngine: Failed to enter {symbol} at market: {placed_trade}")
+            self.risk_model.release(signal_decision)
+            return
+
+        self.risk_model.on_fill(placed_trade.order, symbol, placed_trade.volume, placed_trade.price, signal_decision.stop_loss, signal_decision=signal_decision)
+        self.log_message(f"EntryEngine: {symbol} entered at market {placed_trade.price}", symbol)
+        self.record_position(signal_decision, placed_trade.order)
+
+    def record_position(self, signal_decision: SignalDecision, position_id: int):
+        try:
+            update_position_id(signal_decision, position_id, self.log_message, self.log_to_error)
+        except Exception as e:
+            self.log_to_error(f"EntryEngine: {e}")
+
+    def update(self):
+        """Settles filled or removed orders, cancels expired ones and re-prices the rest on a new candle."""
+        with self.lock:
+            if not self.book:
+                return
+
+            orders = self.mt5.get_pending_orders()
+            if orders is None:
+                return
+
+            resting = {order.ticket for order in orders}
+            now = time.time()
+            for entry in list(self.book.values()):
+                try:
+                    if entry.order not in resting:
+                        self.settle(entry)
+                    elif now >= entry.expires_at:
+                        self.cancel(entry, "expired")
+                    else:
+                        self.reprice(entry, now)
+                except Exception as e:
+                    self.log_to_error(f"EntryEngine: Failed updating order {entry.order} for {entry.signal_decision.symbol}: {e}")
+
+    def settle(self, entry: PendingEntry):
+        """The order left the book: it triggered and opened a position, or the server removed it."""
+        signal_decision = entry.signal_decision
+        del self.book[entry.order]
+
+        positions = self.mt5.mt5.positions_get(ticket=entry.order)
+        if positions:
+            position = positions[0]
+            self.risk_model.on_fill(entry.order, signal_decision.symbol, position.volume, position.price_open, position.sl, signal_decision=signal_decision)
+            self.log_message(f"EntryEngine: {signal_decision.symbol} pending entry {entry.order} filled at {position.price_open}", signal_decision.symbol)
+            self.record_position(signal_decision, entry.order)
+        else:
+            self.log_message(f"EntryEngine: {signal_decision.symbol} pending entry {entry.order} removed by the server", signal_decision.symbol)
+            self.risk_model.release(signal_decision)
+
+    def cancel(self, entry: PendingEntry, reason: str, release: bool = True) -> bool:
+        cancelled = self.mt5.cancel_order(entry.order)
+        if not is_success(cancelled):
+            # Most likely triggered meanwhile, the next update settles it
+            self.log_to_error(f"EntryEngine: Failed to cancel {entry.order} ({reason}): {cancelled}")
+            return False
+
+        del self.book[entry.order]
+        if release:
+            self.risk_model.release(entry.signal_decision)
+        self.log_message(f"EntryEngine: {entry.signal_decision.symbol} pending entry {entry.order} cancelled ({reason})", entry.signal_decision.symbol)
+        return True
+
+    def reprice(self, entry: PendingEntry, now: float):
+        granularity = get_granularity(entry.granularity)
+        # Nothing to do until the candle after bar_time closed
+        if bucket_start(granularity, int(now)) - granularity.seconds <= entry.bar_time:
+            return
+
+        signal_decision = entry.signal_decision
+        bar = self.last_closed(signal_decision.symbol, entry.granularity)
+        if bar is None or bar.time <= entry.bar_time:
+            return
+
+        is_buy = signal_decision.signal == 1
+        entry.bar_time = bar.time
+        trigger = bar.high if is_buy else bar.low
+        if trigger == entry.trigger:
+            return
+
+        if (is_buy and trigger <= signal_decision.stop_loss) or (not is_buy and trigger >= signal_decision.stop_loss):
+            self.cancel(entry, f"candle beyond the stop loss {signal_decision.stop_loss}")
+            return
+
+        tick = self.mt5.mt5.symbol_info_tick(signal_decision.symbol)
+        if tick is not None and ((is_buy and tick.ask > trigger) or (not is_buy and tick.bid < trigger)):
+            # The new candle already broke out, take it at market instead of chasing it with a stop
+            if self.cancel(entry, "breakout", release=False):
+                self.enter_market(signal_decision, tick.ask if is_buy else tick.bid)
+            return
+
+        if self.mt5.modify_order(entry.order, trigger, signal_decision.stop_loss, signal_decision.take_profit):
+            entry.trigger = trigger
+            self.log_message(f"EntryEngine: {signal_decision.symbol} pending entry {entry.order} moved to {trigger}", signal_decision.symbol)
+
+    def cancel_orphans(self):
+        """Cancels pending orders of this bot that no book knows, left by a process that crashed."""
+        orders = self.mt5.get_pending_orders() or []
+        with self.lock:
+            for order in orders:
+                if order.ticket not in self.book:
+                    self.mt5.cancel_order(order.ticket)
+                    self.log_to_error(f"EntryEngine: Cancelled orphaned pending order {order.ticket} for {order.symbol}")
+
+    def entries(self) -> List[PendingEntry]:
+        with self.lock:
+            return list(self.book.values())
+
+    def restore(self, entries: List[PendingEntry]):
+        """Takes over the book of a previous process, its orders stay on the server.
+
+        Each entry reserves its risk again, one the risk limits no longer allow is cancelled.
+        """
+        with self.lock:
+            for entry in entries:
+                signal_decision = entry.signal_decision
+                # A reservation key of the old process means nothing to this risk model
+                signal_decision.reservation = None
+                if self.risk_model.reserve(signal_decision, self.log_message):
+                    self.book[entry.order] = entry
+                    continue
+                self.mt5.cancel_order(entry.order)
+                self.log_to_error(f"EntryEngine: Cancelled restored pending order {entry.order} for {signal_decision.symbol}, over the risk limits")
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from models.position_policy import PositionPolicy
+
+DEFAULT_POLICY = "default"
+
+TRAILING_NONE = 0
+TRAILING_PERCENTAGE = 1
+TRAILING_ATR = 2
+TRAILING_STEPPED = 3
+
+TRAILING_MODES = {
+    "none": TRAILING_NONE,
+    "percentage": TRAILING_PERCENTAGE,
+    "atr": TRAILING_ATR,
+    "stepped": TRAILING_STEPPED,
+}
+
+
+@dataclass
+class PolicyTable:
+    """Position policies compiled into arrays, one row per policy.
+
+    Built once per configuration load, the rules index these arrays with each
+    position's policy row instead of reading the configuration per position.
+    """
+    rows: Dict[str, int]
+    break_even_points: np.ndarray
+    trailing_mode: np.ndarray
+    trailing_distance: np.ndarray
+    trailing_multiplier: np.ndarray
+    trailing_step: np.ndarray
+    # (rows, max tiers), padded with inf points and 0 fractions
+    tier_points: np.ndarray
+    tier_fraction: np.ndarray
+
+    def row(self, symbol) -> int:
+        return self.rows.get(symbol, self.rows[DEFAULT_POLICY])
+
+    def uses_atr(self, symbol) -> bool:
+        return self.trailing_mode[self.row(symbol)] == TRAILING_ATR
+
+
+def compile_policies(policies: Dict[str, PositionPolicy], default_distance: float) -> PolicyTable:
+    """Compiles the configured policies, default_distance is the percentage trailing distance when none is set."""
+    policies = dict(policies)
+    policies.setdefault(DEFAULT_POLICY, PositionPolicy())
+
+    names: List[str] = list(policies)
+    max_tiers = max((len(policy.partial_close) for policy in policies.values()), default=0)
+    tier_points = np.full((len(names), max_tiers), np.inf)
+    tier_fraction = np.zeros((len(names), max_tiers))
+
+    for row, name in enumerate(names):
+        for tier, partial_close_tier in enumerate(policies[name].partial_close):
+            tier_points[row, tier] = partial_close_tier.points
+            tier_fraction[row, tier] = partial_close_tier.fraction
+
+    for name in names:
+        if policies[name].trailing.mode not in TRAILING_MODES:
+            raise ValueError(f"Unsupported trailing mode {policies[name].trailing.mode} for {name}")
+
+    return PolicyTable(
+        rows={name: row for row, name in enumerate(names)},
+        break_even_points=np.array([policies[name].break_even_points for name in names], dtype=float),
+        trailing_mode=np.array([TRAILING_MODES[policies[name].trailing.mode] for name in names], dtype=np.int8),
+        trailing_distance=np.array([policies[name].trailing.distance if policies[name].trailing.distance is not None else default_distance for name in names], dtype=float),
+        trailing_multiplier=np.array([policies[name].trailing.multiplier for name in names], dtype=float),
+        trailing_step=np.array([policies[name].trailing.step for name in names], dtype=float),
+        tier_points=tier_points,
+        tier_fraction=tier_fraction,
+    )
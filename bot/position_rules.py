@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bot.position_policy import TRAILING_ATR, TRAILING_PERCENTAGE, TRAILING_STEPPED, PolicyTable
+
+POSITION_DTYPE = np.dtype([
+    ("ticket", "i8"),
+    ("symbol_id", "i4"),
+    ("type", "i4"),
+    ("volume", "f8"),
+    ("price_open", "f8"),
+    ("price_current", "f8"),
+    ("sl", "f8"),
+])
+
+# stop_loss is nan when the stop loss stays, close_volume is 0 when nothing is closed
+ACTION_DTYPE = np.dtype([
+    ("ticket", "i8"),
+    ("symbol_id", "i4"),
+    ("stop_loss", "f8"),
+    ("close_volume", "f8"),
+    ("tiers_done", "i4"),
+])
+
+
+@dataclass
+class SymbolTable:
+    """Per symbol inputs of the position rules, indexed by symbol_id."""
+    symbols: List[str]
+    tick_size: np.ndarray
+    volume_step: np.ndarray
+    # Row of the symbol's policy in the PolicyTable
+    policy: np.ndarray
+    # ATR of the M1 candles, nan when no policy of the symbol trails by ATR
+    atr: np.ndarray
+    # Stop loss for positions opened without one, nan when not needed or not available
+    atr_stop_buy: np.ndarray
+    atr_stop_sell: np.ndarray
+
+
+def positions_array(positions, symbol_ids: Dict[str, int]) -> np.ndarray:
+    """Converts the result of positions_get() into a POSITION_DTYPE array."""
+    return np.array([
+        (position.ticket, symbol_ids[position.symbol], position.type, position.volume,
+         position.price_open, position.price_current, position.sl)
+        for position in positions
+    ], dtype=POSITION_DTYPE)
+
+
+def evaluate_positions(positions: np.ndarray, table: SymbolTable, policies: PolicyTable, buy_type: int,
+                       tiers_done: Optional[np.ndarray] = None, trailing_stop: bool = True, partial_close: bool = True) -> np.ndarray:
+    """Applies the stop loss assignment, break even, trailing stop and partial close rules to every position at once.
+
+    Stops are compared in a signed space (price for buys, -price for sells) where a
+    higher value is always the more protective stop, so each rule is a np.maximum
+    and the strongest candidate wins. tiers_done holds how many partial close tiers
+    each position already went through. Only positions whose stop loss changes or
+    that get partially closed are returned.
+    """
+    if tiers_done is None:
+        tiers_done = np.zeros(len(positions), dtype=np.int32)
+
+    symbol_id = positions["symbol_id"]
+    policy = table.policy[symbol_id]
+    direction = np.where(positions["type"] == buy_type, 1.0, -1.0)
+    price_open = positions["price_open"]
+    price_current = positions["price_current"]
+    tick_size = table.tick_size[symbol_id]
+
+    has_stop = positions["sl"] != 0
+    current = np.where(has_stop, direction * positions["sl"], -np.inf)
+
+    # Positions opened without a stop loss get the ATR based one
+    atr_stop = np.where(direction > 0, table.atr_stop_buy[symbol_id], table.atr_stop_sell[symbol_id])
+    candidate = np.where(has_stop, current, np.fmax(current, direction * atr_stop))
+
+    # Break even once the profit in points reaches the policy's threshold
+    moved_by = direction * (price_current - price_open)
+    profit_points = moved_by / tick_size
+    break_even = (profit_points >= policies.break_even_points[policy]) & (current < direction * price_open)
+    candidate = np.where(break_even, np.maximum(candidate, direction * price_open), candidate)
+
+    if trailing_stop:
+        mode = policies.trailing_mode[policy]
+
+        # Trail at a distance once the price moved that far from the open price
+        distance = np.full(len(positions), np.nan)
+        distance = np.where(mode == TRAILING_PERCENTAGE, policies.trailing_distance[policy] * price_open, distance)
+        distance = np.where(mode == TRAILING_ATR, policies.trailing_multiplier[policy] * table.atr[symbol_id], distance)
+        trailing = moved_by > distance
+        candidate = np.where(trailing, np.maximum(candidate, direction * price_current - distance), candidate)
+
+        # Stepped: after k full steps of profit the stop sits k - 1 steps beyond the open price
+        step = policies.trailing_step[policy]
+        steps = np.floor(profit_points / np.where(step > 0, step, np.inf))
+        stepped = (mode == TRAILING_STEPPED) & (steps >= 1)
+        candidate = np.where(stepped, np.maximum(candidate, direction * price_open + (steps - 1) * step * tick_size), candidate)
+
+    stop_loss = np.round(direction * candidate / tick_size) * tick_size
+    moved = np.isfinite(candidate) & (candidate > current) & (stop_loss != positions["sl"])
+
+    close_volume = np.zeros(len(positions))
+    next_tiers = tiers_done.copy()
+    if partial_close and policies.tier_points.shape[1] > 0:
+        # At most one tier per pass, the next one is checked on the next pass
+        tier = np.minimum(tiers_done, policies.tier_points.shape[1] - 1)
+        reached = (tiers_done < policies.tier_points.shape[1]) & (profit_points >= policies.tier_points[policy, tier])
+
+        volume_step = table.volume_step[symbol_id]
+        volume = np.floor(positions["volume"] * policies.tier_fraction[policy, tier] / volume_step + 1e-9) * volume_step
+        close_volume = np.where(reached & (volume >= volume_step), volume, 0.0)
+        next_tiers = np.where(reached, tiers_done + 1, tiers_done)
+
+    changed = moved | (close_volume > 0) | (next_tiers != tiers_done)
+    actions = np.zeros(np.count_nonzero(changed), dtype=ACTION_DTYPE)
+    actions["ticket"] = positions["ticket"][changed]
+    actions["symbol_id"] = symbol_id[changed]
+    actions["stop_loss"] = np.where(moved, stop_loss, np.nan)[changed]
+    actions["close_volume"] = close_volume[changed]
+    actions["tiers_done"] = next_tiers[changed]
+    return actions
+
+
+def simulate_positions(positions: np.ndarray, prices: np.ndarray, table: SymbolTable, policies: PolicyTable, buy_type: int,
+                       trailing_stop: bool = True, partial_close: bool = True) -> np.ndarray:
+    """Runs the live rules over a price path for backtesting policies offline.
+
+    prices has one row per step and one column per position. A position is closed
+    when a step's price crosses its stop loss. Returns the realized profit of each
+    position in price units times volume, positions still open at the end are
+    marked to the last price.
+    """
+    positions = positions.copy()
+    # Tickets are replaced by row numbers so actions map straight back onto positions
+    positions["ticket"] = np.arange(len(positions))
+    tiers_done = np.zeros(len(positions), dtype=np.int32)
+    realized = np.zeros(len(positions))
+    is_open = np.ones(len(positions), dtype=bool)
+    direction = np.where(positions["type"] == buy_type, 1.0, -1.0)
+
+    for price in prices:
+        positions["price_current"] = price
+
+        stopped = is_open & (positions["sl"] != 0) & (direction * (price - positions["sl"]) <= 0)
+        realized += np.where(stopped, direction * (positions["sl"] - positions["price_open"]) * positions["volume"], 0.0)
+        is_open &= ~stopped
+
+        index = np.flatnonzero(is_open)
+        if len(index) == 0:
+            break
+
+        actions = evaluate_positions(positions[index], table, policies, buy_type, tiers_done[index], trailing_stop, partial_close)
+        rows = actions["ticket"]
+
+        has_stop = ~np.isnan(actions["stop_loss"])
+        positions["sl"][rows[has_stop]] = actions["stop_loss"][has_stop]
+        realized[rows] += direction[rows] * (price[rows] - positions["price_open"][rows]) * actions["close_volume"]
+        positions["volume"][rows] -= actions["close_volume"]
+        tiers_done[rows] = actions["tiers_done"]
+
+    realized += np.where(is_open, direction * (positions["price_current"] - positions["price_open"]) * positions["volume"], 0.0)
+    return realized
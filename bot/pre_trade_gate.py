@@ -0,0 +1,104 @@
+import datetime as dt
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+from models.risk_management import RiskManagement
+
+
+class PreTradeGate:
+    """Admits the signals of one process_candles pass together, against one account snapshot.
+
+    Signals are ranked by priority, then oldest first. In one vectorized pass,
+    each one is scaled down to max_trade_percentage of the balance. Then signals
+    are admitted in rank order while there are free max_concurrent_trades slots
+    and their combined risk stays within the loss budget left for the day.
+
+    Slots and budget already taken are read live: open positions and the risk to
+    their stop losses, plus the risk model's reservations of every signal outside
+    the batch, like queued signals, running watchers and resting pending entries.
+    A signal rejected for a zero volume or the loss budget takes no slot. A
+    rejected signal's own reservation is released, so nothing accumulates between
+    calls.
+    """
+
+    def __init__(self, mt5, risk_management: RiskManagement, risk_model, trade_manager, log_to_main, log_to_error):
+        self.mt5 = mt5
+        self.risk_management = risk_management
+        self.risk_model = risk_model
+        self.trade_manager = trade_manager
+        self.log_to_main = log_to_main
+        self.log_to_error = log_to_error
+        self.lock = threading.Lock()
+
+    def evaluate(self, signal_containers: List[Tuple]) -> List[Tuple]:
+        if not signal_containers:
+            return []
+
+        with self.lock:
+            return self.admit(signal_containers)
+
+    def admit(self, signal_containers: List[Tuple]) -> List[Tuple]:
+        """Call with the lock held"""
+        # One snapshot of the account for the whole batch
+        account_info = self.mt5.get_account_info()
+        signals = [signal_decision for signal_decision, _ in signal_containers]
+        if account_info is None:
+            self.log_to_error("PreTradeGate: no account info, rejecting the batch")
+            for signal_decision in signals:
+                self.risk_model.release(signal_decision)
+            return []
+
+        open_positions = self.mt5.get_open_positions() or ()
+        balance = account_info["balance"]
+        daily_loss = self.trade_manager.update_daily_loss()
+        # Slots and risk held by sized signals outside this batch
+        reserved_count, reserved_risk = self.risk_model.reserved(excluding={signal.reservation for signal in signals})
+
+        specs = [self.risk_model.spec(signal.symbol) for signal in signals]
+
+        now = dt.datetime.now(dt.timezone.utc)
+        priority = np.array([signal.priority for signal in signals], dtype=float)
+        age = np.array([(now - signal.signal_timestamp.astimezone(dt.timezone.utc)).total_seconds() for signal in signals])
+        volume = np.array([signal.volume for signal in signals], dtype=float)
+        distance = np.array([abs(signal.current_price - signal.stop_loss) for signal in signals], dtype=float)
+        tick_size = np.array([spec.tick_size for spec in specs])
+        tick_value = np.array([spec.tick_value for spec in specs])
+        volume_step = np.array([spec.volume_step for spec in specs])
+
+        # Highest priority first, then oldest first
+        order = np.lexsort((-age, -priority))
+
+        # Scale each signal down to the per trade limit, in whole volume steps
+        risk_per_lot = distance / tick_size * tick_value
+        max_trade_risk = self.risk_management.max_trade_percentage * balance
+        capped_volume = np.minimum(volume, np.floor(max_trade_risk / np.maximum(risk_per_lot, 1e-12) / volume_step) * volume_step)
+        risk = capped_volume * risk_per_lot
+
+        slots = self.risk_management.max_concurrent_trades - len(open_positions) - reserved_count
+        # Open positions can still lose the risk to their stop losses today
+        loss_budget = self.risk_management.max_daily_loss_percentage * balance - daily_loss - self.risk_model.account_risk - reserved_risk
+
+        eligible = capped_volume[order] > 0
+        within_budget = eligible & (np.cumsum(np.where(eligible, risk[order], 0.0)) <= loss_budget)
+        # Only signals that pass the volume and budget checks take a slot
+        admitted_ranked = within_budget & (np.cumsum(within_budget) <= slots)
+        admitted = np.zeros(len(signals), dtype=bool)
+        admitted[order] = admitted_ranked
+
+        result = []
+        for index in order:
+            signal_container = signal_containers[index]
+            signal_decision = signal_container[0]
+            if not admitted[index]:
+                self.log_to_main(f"PreTradeGate: rejected {signal_decision.symbol} (slots {slots}, loss budget {loss_budget:.2f})")
+                self.risk_model.release(signal_decision)
+                continue
+
+            if capped_volume[index] < volume[index]:
+                self.log_to_main(f"PreTradeGate: {signal_decision.symbol} volume {volume[index]} capped to {capped_volume[index]}")
+                signal_decision.volume = round(float(capped_volume[index]), specs[index].volume_decimals)
+            result.append(signal_container)
+
+        return result
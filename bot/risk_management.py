@@ -4,8 +4,12 @@ import decimal
 
 from models.signal_decision import SignalDecision
 
-def calculate_lot_size(mt5: MT5, signal_decision: SignalDecision, log_message: callable, log_to_error: callable):
+def calculate_lot_size(mt5: MT5, signal_decision: SignalDecision, log_message: callable, log_to_error: callable, risk_model=None):
     log_message('calculate_lot_size:', signal_decision.symbol)
+
+    # The risk model keeps open risk and symbol precisions up to date, no terminal round-trips
+    if risk_model is not None:
+        return risk_model.size(signal_decision, log_message, log_to_error)
     
     symbol_info = mt5.mt5.symbol_info(signal_decision.symbol)
     
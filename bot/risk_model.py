@@ -0,0 +1,184 @@
+import itertools
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from models.risk_management import RiskManagement
+from models.signal_decision import SignalDecision
+from models.symbol_spec import SymbolSpec
+from utils.utils import get_decimals_places
+
+
+class RiskModel:
+    """Keeps open risk per symbol and per account up to date so sizing a signal is O(1).
+
+    Positions are added on fills, updated on stop loss changes and removed on
+    closes; sync() reconciles with positions_get() and only touches tickets whose
+    volume or stop loss changed. Symbol specifications are fetched once.
+
+    A sized signal holds a reservation, a slot and its risk, until it fills, fails,
+    is cancelled or expires, however long its pending entry or watcher lives. The
+    reservation's key is stored on the signal, so releasing it frees exactly that
+    signal's reservation, and releasing twice does nothing.
+    """
+
+    def __init__(self, mt5, risk_management: RiskManagement, log_message, log_to_error):
+        self.mt5 = mt5
+        self.risk_management = risk_management
+        self.log_message = log_message
+        self.log_to_error = log_to_error
+
+        self.lock = threading.Lock()
+        self.specs: Dict[str, SymbolSpec] = {}
+        # ticket -> (symbol, volume, stop_loss, risk)
+        self.positions: Dict[int, Tuple[str, float, float, float]] = {}
+        self.symbol_risk: Dict[str, float] = defaultdict(float)
+        self.account_risk = 0.0
+        # reservation key -> risk
+        self.reservations: Dict[int, float] = {}
+        self.keys = itertools.count(1)
+        self.balance: Optional[float] = None
+
+    def spec(self, symbol) -> SymbolSpec:
+        spec = self.specs.get(symbol)
+        if spec is None:
+            symbol_info = self.mt5.mt5.symbol_info(symbol)
+            spec = SymbolSpec(
+                tick_value=symbol_info.trade_tick_value,
+                tick_size=symbol_info.trade_tick_size,
+                volume_step=symbol_info.volume_step,
+                volume_decimals=get_decimals_places(symbol_info.volume_step),
+                price_decimals=get_decimals_places(symbol_info.trade_tick_size),
+            )
+            self.specs[symbol] = spec
+        return spec
+
+    def position_risk(self, symbol, volume, price_open, stop_loss) -> float:
+        if not stop_loss:
+            return 0.0
+        spec = self.spec(symbol)
+        return volume * abs(price_open - stop_loss) / spec.tick_size * spec.tick_value
+
+    def set_position(self, ticket, symbol, volume, price_open, stop_loss):
+        risk = self.position_risk(symbol, volume, price_open, stop_loss)
+        with self.lock:
+            self.remove_position(ticket)
+            self.positions[ticket] = (symbol, volume, stop_loss, risk)
+            self.symbol_risk[symbol] += risk
+            self.account_risk += risk
+
+    def remove_position(self, ticket):
+        """Call with the lock held"""
+        previous = self.positions.pop(ticket, None)
+        if previous is not None:
+            symbol, _, _, risk = previous
+            self.symbol_risk[symbol] -= risk
+            self.account_risk -= risk
+
+    def on_fill(self, ticket, symbol, volume, price_open, stop_loss, signal_decision: Optional[SignalDecision] = None):
+        self.set_position(ticket, symbol, volume, price_open, stop_loss)
+        if signal_decision is not None:
+            self.release(signal_decision)
+
+    def on_close(self, ticket):
+        with self.lock:
+            self.remove_position(ticket)
+
+    def reserve(self, signal_decision: SignalDecision, log_message=None) -> bool:
+        """Reserves a slot and the risk of an already sized signal, False when no slot is free.
+
+        Used for signals that come back without a reservation, like restored ones.
+        """
+        if signal_decision.reservation is not None:
+            return True
+        risk = self.position_risk(signal_decision.symbol, signal_decision.volume or 0, signal_decision.current_price, signal_decision.stop_loss)
+        with self.lock:
+            if not self.has_slot():
+                if log_message is not None:
+                    log_message(f"RiskModel.reserve: max_concurrent_trades reached, skipping {signal_decision.symbol}", signal_decision.symbol)
+                return False
+            self.add_reservation(signal_decision, risk)
+        return True
+
+    def has_slot(self) -> bool:
+        """Call with the lock held"""
+        return len(self.positions) + len(self.reservations) < self.risk_management.max_concurrent_trades
+
+    def add_reservation(self, signal_decision: SignalDecision, risk: float):
+        """Call with the lock held"""
+        key = next(self.keys)
+        self.reservations[key] = risk
+        signal_decision.reservation = key
+
+    def release(self, signal_decision: SignalDecision) -> bool:
+        """Frees the reservation of the signal once its order filled or failed, False when it held none."""
+        key = signal_decision.reservation
+        if key is None:
+            return False
+        signal_decision.reservation = None
+        with self.lock:
+            return self.reservations.pop(key, None) is not None
+
+    def reserved(self, excluding=()) -> Tuple[int, float]:
+        """Number and risk of the reservations held, leaving out the keys in excluding."""
+        with self.lock:
+            held = [risk for key, risk in self.reservations.items() if key not in excluding]
+        return len(held), sum(held)
+
+    def update_balance(self, balance):
+        self.balance = balance
+
+    def sync(self, positions):
+        """Reconciles with positions_get(), only recomputing tickets that changed."""
+        seen = set()
+        for position in positions or ():
+            seen.add(position.ticket)
+            known = self.positions.get(position.ticket)
+            if known is None or known[1] != position.volume or known[2] != position.sl:
+                self.set_position(position.ticket, position.symbol, position.volume, position.price_open, position.sl)
+
+        with self.lock:
+            for ticket in [ticket for ticket in self.positions if ticket not in seen]:
+                self.remove_position(ticket)
+
+        account_info = self.mt5.mt5.account_info()
+        if account_info is not None:
+            self.update_balance(account_info.balance)
+
+    def size(self, signal_decision: SignalDecision, log_message, log_to_error):
+        """Returns (units, tick_size, price_decimals), or None when the signal would break a risk limit.
+
+        The concurrent trade check and the slot reservation happen under one lock,
+        so simultaneous signals can't overshoot max_concurrent_trades.
+        """
+        spec = self.spec(signal_decision.symbol)
+        if self.balance is None:
+            account_info = self.mt5.mt5.account_info()
+            if account_info is None:
+                log_to_error(f"RiskModel.size: no account info, skipping {signal_decision.symbol}")
+                return None
+            self.update_balance(account_info.balance)
+
+        num_pips = abs(signal_decision.current_price - signal_decision.stop_loss) / spec.tick_size
+        if num_pips == 0:
+            log_to_error(f"RiskModel.size: stop loss equals price for {signal_decision.symbol}")
+            return None
+
+        with self.lock:
+            if not self.has_slot():
+                log_message(f"RiskModel.size: max_concurrent_trades reached, skipping {signal_decision.symbol}", signal_decision.symbol)
+                return None
+
+            # Same sizing as before: open risk on the symbol plus the signal's risk,
+            # now capped by max_trade_percentage of the balance
+            total_risk = self.symbol_risk[signal_decision.symbol] + signal_decision.risk * self.balance
+            total_risk = min(total_risk, self.risk_management.max_trade_percentage * self.balance)
+
+            units = round(total_risk / (num_pips * spec.tick_value), spec.volume_decimals)
+            if units < spec.volume_step:
+                log_message(f"RiskModel.size: volume below volume_step for {signal_decision.symbol}", signal_decision.symbol)
+                return None
+
+            self.add_reservation(signal_decision, units * num_pips * spec.tick_value)
+
+        return units, spec.tick_size, spec.price_decimals
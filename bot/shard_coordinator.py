@@ -0,0 +1,155 @@
+import multiprocessing
+import threading
+import datetime as dt
+from typing import Dict, List
+
+from api.mt5_proxy import MT5Proxy, to_wire
+from bot.candle_manager import CandleManager
+from bot.strategy_manager import build_strategy_managers
+from db.journal import open_journal
+from constants.granularities import get_granularity
+from utils.utils import get_next_interval
+
+
+def partition_symbols(tradable_symbols: Dict[str, list], workers: int) -> List[Dict[str, list]]:
+    """Splits tradable_symbols into at most `workers` groups, balancing on the number of strategies."""
+    groups: List[Dict[str, list]] = [{} for _ in range(max(1, min(workers, len(tradable_symbols))))]
+    loads = [0] * len(groups)
+
+    # Largest symbols first so the greedy assignment stays balanced
+    for symbol, configurations in sorted(tradable_symbols.items(), key=lambda item: -len(item[1])):
+        target = loads.index(min(loads))
+        groups[target][symbol] = configurations
+        loads[target] += len(configurations)
+
+    return groups
+
+
+def run_shard_worker(shard_id, tradable_symbols, conn, stop_event, strategy_name="Template", journal_path=None):
+    """Entry point of a shard process: runs CandleManager/StrategyManagers for its group of symbols."""
+    mt5 = MT5Proxy(conn)
+
+    def log_message(msg, key):
+        mt5.send_log(msg, key)
+
+    def log_to_error(msg):
+        mt5.send_log(msg, "error")
+
+    if journal_path is not None:
+        # Workers only append and never flush, the main process writes the journal to the database
+        open_journal(journal_path, log_to_error=log_to_error)
+
+    trading_symbols = {}
+    trading_times = set()
+    for symbol, strategy_configurations in tradable_symbols.items():
+        # The coordinator sizes every signal against the account wide risk model, sizing here would only cost proxy round trips
+        trading_symbols[symbol] = build_strategy_managers(symbol, strategy_configurations, mt5, log_message, log_to_error, strategy_name=strategy_name, size_signals=False)
+        for strategy_configuration in strategy_configurations:
+            trading_times.add(get_granularity(strategy_configuration["granularity"]).seconds)
+
+    candle_manager = CandleManager(mt5, trading_symbols, log_message)
+    log_message(f"run_shard_worker: shard {shard_id} running {list(trading_symbols.keys())}", "main")
+
+    while not stop_event.is_set():
+        try:
+            for symbol in candle_manager.update_timings():
+                frames = {}
+                for index, strategy_manager in enumerate(trading_symbols[symbol]):
+                    granularity = strategy_manager.strategy.granularity
+                    if granularity not in frames:
+                        frames[granularity] = candle_manager.get_features(symbol, granularity)
+                    features = frames[granularity]
+                    signal_decision = strategy_manager.generate_signal(features.candles if features else None, features)
+
+                    if signal_decision is None or signal_decision.signal == 0:
+                        continue
+
+                    mt5.send_signal(symbol, index, signal_decision)
+        except Exception as error:
+            log_to_error(f"run_shard_worker: shard {shard_id} error {error}")
+
+        sleep_duration = (get_next_interval(trading_times) - dt.datetime.now()).total_seconds()
+        stop_event.wait(max(sleep_duration, 0))
+
+
+class ShardCoordinator:
+    """Owns the MT5 session and runs one worker process per group of symbols.
+
+    Workers do the pandas/talib work in their own interpreter and reach the terminal
+    through MT5Proxy; signals come back here so order submission and global risk
+    limits stay in a single process.
+    """
+
+    def __init__(self, mt5, tradable_symbols, workers, on_signal, log_message, log_to_error, strategy_name="Template", journal_path=None):
+        self.mt5 = mt5
+        self.strategy_name = strategy_name
+        self.journal_path = journal_path
+        self.groups = partition_symbols(tradable_symbols, workers)
+        self.on_signal = on_signal
+        self.log_message = log_message
+        self.log_to_error = log_to_error
+        self.terminal_lock = threading.Lock()
+        self.stop_event = multiprocessing.Event()
+        self.shards: Dict[int, tuple] = {}
+
+    def start(self):
+        for shard_id in range(len(self.groups)):
+            self.start_shard(shard_id)
+
+    def start_shard(self, shard_id):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=run_shard_worker,
+            args=(shard_id, self.groups[shard_id], child_conn, self.stop_event, self.strategy_name, self.journal_path),
+            name=f"shard_{shard_id}",
+            daemon=True,
+        )
+        process.start()
+
+        server = threading.Thread(target=self.serve, args=(shard_id, parent_conn), name=f"shard_{shard_id}_server", daemon=True)
+        server.start()
+
+        self.shards[shard_id] = (process, server)
+        self.log_message(f"ShardCoordinator: started shard {shard_id} with {list(self.groups[shard_id].keys())}", "main")
+
+    def serve(self, shard_id, conn):
+        while not self.stop_event.is_set():
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "call":
+                _, name, args, kwargs = message
+                try:
+                    if name == "order_send":
+                        # Orders go through the MT5 wrapper so the order gateway sees them
+                        result = self.mt5.order_send(*args, **kwargs)
+                    else:
+                        # The terminal is shared by every shard, one call at a time
+                        with self.terminal_lock:
+                            result = getattr(self.mt5.mt5, name)(*args, **kwargs)
+                    conn.send(("ok", to_wire(result)))
+                except Exception as error:
+                    conn.send(("error", repr(error)))
+            elif kind == "signal":
+                _, symbol, index, signal_decision = message
+                self.on_signal(symbol, index, signal_decision)
+            elif kind == "log":
+                _, msg, key = message
+                self.log_message(msg, key)
+
+    def check_shards(self):
+        """Restarts any shard process that died."""
+        for shard_id, (process, _) in list(self.shards.items()):
+            if not process.is_alive() and not self.stop_event.is_set():
+                self.log_to_error(f"ShardCoordinator: shard {shard_id} exited with {process.exitcode}, restarting")
+                self.start_shard(shard_id)
+
+    def stop(self):
+        self.stop_event.set()
+        for process, _ in self.shards.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Dict
+
+from models.signal_decision import SignalDecision
+
+DUPLICATE_ID = "duplicate_id"
+DUPLICATE_BAR = "duplicate_bar"
+STALE = "stale"
+
+
+class SignalIndex:
+    """Drops duplicate and stale signals before they are queued and before they are executed.
+
+    A signal is a duplicate when its t_signals id, or its (symbol, direction, bar),
+    was already admitted within ttl seconds. Keys expire in insertion order from a
+    deque, so admit() and is_fresh() are O(1) amortized. A signal older than
+    max_age seconds is stale. dropped counts the signals dropped by reason.
+
+    Signals restored after a restart are seeded instead: they are only stale once
+    the next candle of their strategy closed.
+    """
+
+    def __init__(self, ttl: float, max_age: float, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> expiry, and (expiry, key) in insertion order for eviction
+        self.keys: Dict[tuple, float] = {}
+        self.expiries = deque()
+        # id of a seeded signal -> its max age, until it leaves the queue
+        self.seeded: Dict[int, float] = {}
+        self.dropped = Counter()
+
+    def evict(self, now: float):
+        """Call with the lock held"""
+        while self.expiries and self.expiries[0][0] <= now:
+            expires_at, key = self.expiries.popleft()
+            # A key admitted again after it expired has a later expiry queued
+            if self.keys.get(key) == expires_at:
+                del self.keys[key]
+
+    def age(self, signal_decision: SignalDecision, now: float) -> float:
+        # Naive timestamps are local time, like datetime.now()
+        return now - signal_decision.signal_timestamp.timestamp()
+
+    def admit(self, signal_decision: SignalDecision, bar_seconds: int) -> bool:
+        """Records the signal's keys, False when it is a duplicate or already stale."""
+        return self.record(signal_decision, bar_seconds, self.max_age)
+
+    def seed(self, signal_decision: SignalDecision, bar_seconds: int) -> bool:
+        """Records a restored signal's keys, False when it is a duplicate or older than one bar."""
+        if not self.record(signal_decision, bar_seconds, bar_seconds):
+            return False
+        with self.lock:
+            self.seeded[id(signal_decision)] = bar_seconds
+        return True
+
+    def record(self, signal_decision: SignalDecision, bar_seconds: int, max_age: float) -> bool:
+        now = self.clock()
+        timestamp = signal_decision.signal_timestamp.timestamp()
+        bar_key = ("bar", signal_decision.symbol, signal_decision.signal, int(timestamp) // bar_seconds)
+        id_key = ("id", signal_decision.id) if signal_decision.id is not None else None
+
+        with self.lock:
+            self.evict(now)
+
+            if id_key is not None and id_key in self.keys:
+                self.dropped[DUPLICATE_ID] += 1
+                return False
+            if bar_key in self.keys:
+                self.dropped[DUPLICATE_BAR] += 1
+                return False
+            if self.age(signal_decision, now) > max_age:
+                self.dropped[STALE] += 1
+                return False
+
+            expires_at = now + self.ttl
+            for key in (id_key, bar_key):
+                if key is not None:
+                    self.keys[key] = expires_at
+                    self.expiries.append((expires_at, key))
+            return True
+
+    def is_fresh(self, signal_decision: SignalDecision) -> bool:
+        """Checked when a signal leaves the queue, False when it waited longer than max_age."""
+        with self.lock:
+            max_age = self.seeded.pop(id(signal_decision), self.max_age)
+        if self.age(signal_decision, self.clock()) <= max_age:
+            return True
+        with self.lock:
+            self.dropped[STALE] += 1
+        return False
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"tracked": len(self.keys), **self.dropped}
@@ -1,13 +1,22 @@
 
+import threading
 import time
+from typing import Optional
 import pandas as pd
 from api.metatrader_api import MT5
+from api.order_execution import is_success
 from bot.strategy_manager import StrategyManager
 from models.signal_decision import SignalDecision
-from utils.utils import granularity_to_minutes
+from constants.granularities import get_granularity
+from bot.channel_stats import register_position
+from db.journal import SET_POSITION_ID, record
 
-def process_signal(is_running: bool, signal_decision: SignalDecision, mt5: MT5, strategy_manager: StrategyManager, log_message: callable, log_to_error: callable):
-    print(1)
+
+class OrderFailed(ValueError):
+    """Raised by process_place_order when the terminal refused the order, its reservation is already released."""
+
+def process_signal(stop_event: threading.Event, signal_decision: SignalDecision, mt5: MT5, strategy_manager: StrategyManager, log_message: callable, log_to_error: callable, deadline: Optional[float] = None):
+    """Watches for the breakout of the last candle and enters at market, None when stopped or past the deadline."""
     interval = 1
     symbol = signal_decision.symbol
     granularity = strategy_manager.strategy.granularity
@@ -22,15 +31,19 @@ def process_signal(is_running: bool, signal_decision: SignalDecision, mt5: MT5,
     last_timeframe_low = last_timeframe_candle.Low
     last_timeframe_high = last_timeframe_candle.High
 
-    granularity_to_seconds = granularity_to_minutes(granularity) * 60
-    print(12)
+    granularity_to_seconds = get_granularity(granularity).seconds
+
+    while not stop_event.is_set():
+        if deadline is not None and time.time() >= deadline:
+            log_message(f"process_signal: No breakout for {symbol} before the deadline", "trade_processor")
+            return None
 
-    while is_running:
         try:
             log_message(f"process_signal: Checking for entry signal for {symbol}", "trade_processor")
             tick_info = mt5.mt5.symbol_info_tick(symbol)
             if tick_info is None:
                 log_to_error(f"Failed to get tick info for {symbol}")
+                stop_event.wait(interval)
                 continue
 
             current_time = pd.to_datetime(tick_info.time, unit="s")
@@ -42,23 +55,24 @@ def process_signal(is_running: bool, signal_decision: SignalDecision, mt5: MT5,
                 last_timeframe_high = last_timeframe_candle.High
 
             if signal_decision.signal == 1 and last_timeframe_high < tick_info.ask:
-                placed_trade = process_place_order(signal_decision, mt5, log_message, log_to_error)
+                placed_trade = process_place_order(signal_decision, mt5, log_message, log_to_error, strategy_manager.risk_model)
                 return placed_trade
 
             if signal_decision.signal == -1 and last_timeframe_low > tick_info.ask:
-                placed_trade = process_place_order(signal_decision, mt5, log_message, log_to_error)
+                placed_trade = process_place_order(signal_decision, mt5, log_message, log_to_error, strategy_manager.risk_model)
                 return placed_trade
 
             if tick_info.time % 5 == 0:
                 print(f"Symbol: {symbol}, Time: {tick_info.time}, Bid: {tick_info.bid}, Ask: {tick_info.ask}, Last: {tick_info.last}")
 
-            time.sleep(interval)
+            # Returns at once when the watchers are stopped
+            stop_event.wait(interval)
         except Exception as error:
             print(f"process_signal:Error for {symbol}: {error}")
             log_to_error(f"process_signal: Error for {symbol}: {error}")
             raise error
 
-def process_place_order(signal_decision: SignalDecision, mt5: MT5, log_message: callable, log_to_error: callable):
+def process_place_order(signal_decision: SignalDecision, mt5: MT5, log_message: callable, log_to_error: callable, risk_model=None):
     placed_trade = mt5.place_order(
         signal_decision.order_type,
         signal_decision.symbol,
@@ -68,28 +82,33 @@ def process_place_order(signal_decision: SignalDecision, mt5: MT5, log_message:
         signal_decision.take_profit,
         signal_decision.comment,
         log_message=log_message,
-        log_to_error=log_to_error
+        log_to_error=log_to_error,
+        signal_id=signal_decision.id,
     )
 
-    if placed_trade is None:
-        raise ValueError(f"Failed to place order for {signal_decision.symbol}")
+    if not is_success(placed_trade):
+        if risk_model is not None:
+            risk_model.release(signal_decision)
+        raise OrderFailed(f"Failed to place order for {signal_decision.symbol}")
+
+    if risk_model is not None:
+        risk_model.on_fill(placed_trade.order, signal_decision.symbol, placed_trade.volume, placed_trade.price, signal_decision.stop_loss, signal_decision=signal_decision)
 
     log_message(f"run_signal_executor: Successfully placed {signal_decision.symbol}", signal_decision.symbol)
     log_message(f"run_signal_executor: Successfully placed {signal_decision.symbol} for {signal_decision.symbol}", "main")
 
-    # Update database with order_id
+    # Queued for the database, placing the order doesn't wait for it
+    update_position_id(signal_decision, placed_trade.order, log_message, log_to_error)
+    
+    return placed_trade
+
+def update_position_id(signal_decision: SignalDecision, position_id, log_message: callable, log_to_error: callable):
+    """Links the t_signals row of a copied signal to the position it opened."""
+    register_position(signal_decision, position_id)
     if signal_decision.id is not None:
         try:
-            db = DataDB()
-            db.connect()
-            db.execute_update(
-                "UPDATE t_signals SET position_id = %s WHERE id = %s",
-                (placed_trade.order_id, signal_decision.id)
-            )
-            db.close()
-            log_message(f"Updated position_id {placed_trade.order_id} for signal {signal_decision.id}", "database")
+            record(SET_POSITION_ID, signal_decision.id, position_id)
+            log_message(f"Updated position_id {position_id} for signal {signal_decision.id}", "database")
         except Exception as e:
             log_to_error(f"Failed to update position_id for signal {signal_decision.id}: {e}")
             raise ValueError(f"Database update failed: {e}")
-    
-    return placed_trade
@@ -0,0 +1,145 @@
+import datetime as dt
+import os
+import time
+from queue import Empty
+from typing import Optional
+
+from constants.granularities import get_granularity
+from utils.checkpoint_file import (
+    DAILY_LOSS_SECTION, ENTRIES_SECTION, QUEUED, SIGNALS_SECTION, TIERS_SECTION, TIMINGS_SECTION, WATCHING,
+    decode_daily_loss, decode_entries, decode_signals, decode_state, decode_tiers, decode_timings, encode_state,
+    read_checkpoint, write_checkpoint,
+)
+
+
+def pending_signals(bot) -> list:
+    """Signals waiting in the queue or watched for a breakout, as (kind, symbol, strategy index, signal)."""
+    # Queue has no snapshot method, drain it and put everything back
+    drained = []
+    while True:
+        try:
+            drained.append(bot.current_signals.get_nowait())
+        except Empty:
+            break
+    for signal_container in drained:
+        bot.current_signals.put(signal_container)
+
+    containers = [(QUEUED, signal_container) for signal_container in drained]
+    containers += [(WATCHING, signal_container) for signal_container in list(getattr(bot, "watchers", {}).values())]
+
+    signals = []
+    for kind, (signal_decision, strategy_manager) in containers:
+        strategy_managers = bot.trading_symbols.get(strategy_manager.symbol, [])
+        if strategy_manager in strategy_managers:
+            signals.append((kind, strategy_manager.symbol, strategy_managers.index(strategy_manager), signal_decision))
+    return signals
+
+
+def collect_state(bot) -> dict:
+    """Collects what a new bot process needs to continue without cold caches."""
+    state = {
+        "daily_loss": bot.trade_manager.daily_loss,
+        "tiers_done": dict(bot.trade_manager.tiers_done),
+        "pending_signals": pending_signals(bot),
+        "pending_entries": bot.entry_engine.entries(),
+    }
+
+    candle_manager = getattr(bot, "candle_manager", None)
+    if candle_manager is not None:
+        state["aggregators"] = dict(candle_manager.aggregators)
+        state["timings"] = dict(candle_manager.timings)
+        state["last_polls"] = dict(candle_manager.last_polls)
+
+    return state
+
+
+def requeue(bot, signal_decision, strategy_manager) -> bool:
+    """Queues a restored signal again, False when it is a duplicate, older than one bar or over the risk limits.
+
+    A signal is only worth entering until the next candle of its strategy closes.
+    """
+    # A reservation key of the old process means nothing to this risk model
+    signal_decision.reservation = None
+    if not bot.risk_model.reserve(signal_decision, bot.log_message):
+        return False
+    # Seeds the index so the new process doesn't take the same signal again
+    if not bot.signal_index.seed(signal_decision, get_granularity(strategy_manager.strategy.granularity).seconds):
+        bot.risk_model.release(signal_decision)
+        return False
+    bot.current_signals.put((signal_decision, strategy_manager))
+    return True
+
+
+def restore_signals(bot, state: dict):
+    """Requeues pending signals onto this process' StrategyManagers and restores the trade manager's counters."""
+    for _, symbol, index, signal_decision in state.get("pending_signals", []):
+        strategy_managers = bot.trading_symbols.get(symbol, [])
+        if index < len(strategy_managers):
+            requeue(bot, signal_decision, strategy_managers[index])
+
+    bot.trade_manager.daily_loss = state.get("daily_loss", 0)
+    bot.trade_manager.tiers_done = state.get("tiers_done", {})
+    bot.entry_engine.restore(state.get("pending_entries", []))
+
+
+def restore_checkpoint(bot, path: str):
+    """Restores daily loss, partial close tiers, candle timings, the pending entry book and still valid pending signals from a checkpoint."""
+    if not os.path.exists(path):
+        return
+
+    try:
+        written_at, sections = read_checkpoint(path)
+    except Exception as e:
+        bot.log_to_error(f"restore_checkpoint: ignoring {path}: {e}")
+        return
+
+    if DAILY_LOSS_SECTION in sections:
+        daily_loss, day = decode_daily_loss(sections[DAILY_LOSS_SECTION])
+        if day == dt.date.today():
+            bot.trade_manager.daily_loss = daily_loss
+
+    if TIERS_SECTION in sections:
+        bot.trade_manager.tiers_done = decode_tiers(sections[TIERS_SECTION])
+
+    candle_manager = getattr(bot, "candle_manager", None)
+    if TIMINGS_SECTION in sections and candle_manager is not None:
+        candle_manager.restore_timings(decode_timings(sections[TIMINGS_SECTION]))
+
+    # The orders rest on the server, update() settles the ones that filled or went away meanwhile
+    if ENTRIES_SECTION in sections:
+        bot.entry_engine.restore(decode_entries(sections[ENTRIES_SECTION]))
+
+    restored = 0
+    for _, symbol, index, signal_decision in decode_signals(sections.get(SIGNALS_SECTION, b"")):
+        strategy_managers = bot.trading_symbols.get(symbol, [])
+        if index < len(strategy_managers) and requeue(bot, signal_decision, strategy_managers[index]):
+            restored += 1
+
+    bot.log_to_main(f"restore_checkpoint: restored {restored} signals from {dt.datetime.fromtimestamp(written_at)}")
+
+
+CANDLE_CACHE_PATH = "./state/candles.bin"
+
+
+def save_candle_cache(candle_manager, path: str = CANDLE_CACHE_PATH):
+    """Saves the candle series so the next start can skip most warmup queries."""
+    state = {
+        "aggregators": dict(candle_manager.aggregators),
+        "timings": dict(candle_manager.timings),
+        "last_polls": dict(candle_manager.last_polls),
+    }
+    write_checkpoint(path, encode_state(state), time.time())
+
+
+def load_candle_cache(max_age: float, log_to_error, path: str = CANDLE_CACHE_PATH) -> Optional[dict]:
+    """Returns the saved candle state, None if missing, unreadable or older than max_age seconds."""
+    if not os.path.exists(path):
+        return None
+    try:
+        written_at, sections = read_checkpoint(path)
+        if time.time() - written_at > max_age:
+            return None
+        return decode_state(sections)
+    except Exception as e:
+        log_to_error(f"load_candle_cache: ignoring {path}: {e}")
+        return None
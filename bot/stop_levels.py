@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from bot.bar_aggregator import bar_from_rate, bucket_start
+from constants.granularities import get_granularity
+from models.bar import Bar
+from models.stop_level import StopLevel
+
+
+class RollingLevels:
+    """ATR (Wilder smoothing, like talib.ATR) and highest high / lowest low over a window, updated bar by bar."""
+
+    def __init__(self, period: int, window: int):
+        self.period = period
+        self.window = window
+        self.count = 0
+        self.previous_close = None
+        self.true_ranges = []
+        self.atr = None
+        # Monotonic deques of (index, price), the front is the window's extreme
+        self.highs: deque = deque()
+        self.lows: deque = deque()
+        self.last: Optional[Bar] = None
+
+    def add(self, bar: Bar):
+        if self.last is not None and bar.time <= self.last.time:
+            return
+
+        if self.previous_close is not None:
+            true_range = max(bar.high - bar.low, abs(bar.high - self.previous_close), abs(bar.low - self.previous_close))
+            if self.atr is None:
+                self.true_ranges.append(true_range)
+                if len(self.true_ranges) == self.period:
+                    self.atr = sum(self.true_ranges) / self.period
+            else:
+                self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+        self.previous_close = bar.close
+
+        index = self.count
+        self.count += 1
+        while self.highs and self.highs[-1][1] <= bar.high:
+            self.highs.pop()
+        self.highs.append((index, bar.high))
+        while self.lows and self.lows[-1][1] >= bar.low:
+            self.lows.pop()
+        self.lows.append((index, bar.low))
+        while self.highs[0][0] <= index - self.window:
+            self.highs.popleft()
+        while self.lows[0][0] <= index - self.window:
+            self.lows.popleft()
+
+        self.last = bar
+
+    def level(self) -> Optional[StopLevel]:
+        if self.atr is None:
+            return None
+        return StopLevel(time=self.last.time, atr=self.atr, high=self.highs[0][1], low=self.lows[0][1], close=self.last.close)
+
+
+class StopLevelService:
+    """Shared ATR and high/low levels per symbol and granularity for entry and stop loss calculations.
+
+    Series are seeded on first use, from the CandleManager when it builds the
+    granularity and from the terminal otherwise. Series the CandleManager builds
+    are then updated by its closed bar events. The others are refreshed on request,
+    only once a new bar closed, so a symbol costs at most one update per bar.
+
+    Each (ATR period, window) asked for gets its own series, so a strategy with
+    other thresholds never reads levels built for the trade manager's defaults.
+    """
+
+    # Defaults of the trade manager, strategies pass their own
+    PERIOD = 15
+    WINDOW = 180
+
+    def __init__(self, mt5, log_to_error):
+        self.mt5 = mt5
+        self.log_to_error = log_to_error
+        self.candle_manager = None
+        self.lock = threading.Lock()
+        # (symbol, granularity) -> (period, window) -> levels
+        self.series: Dict[Tuple[str, str], Dict[Tuple[int, int], RollingLevels]] = {}
+        self.updates = 0
+
+    def attach(self, candle_manager):
+        """Follows the closed bars of the CandleManager instead of querying the terminal for them."""
+        self.candle_manager = candle_manager
+        candle_manager.subscribe(self.on_bar)
+
+    def is_fed(self, symbol, granularity) -> bool:
+        if self.candle_manager is None:
+            return False
+        aggregator = self.candle_manager.aggregators.get(symbol)
+        return aggregator is not None and granularity in aggregator.series
+
+    def on_bar(self, symbol, granularity, bar: Bar):
+        with self.lock:
+            for levels in self.series.get((symbol, granularity), {}).values():
+                levels.add(bar)
+
+    def seed(self, symbol, granularity, period: int, window: int) -> Optional[RollingLevels]:
+        levels = RollingLevels(period, window)
+        count = window + period + 1
+
+        if self.is_fed(symbol, granularity):
+            # Only closed bars, the forming one arrives later as a closed bar event
+            bars = list(self.candle_manager.aggregators[symbol].series[granularity].closed)[-count:]
+        elif get_granularity(granularity).seconds >= 60:
+            rates = self.mt5.query_historic_data(symbol, count + 1, granularity=granularity)
+            # The last rate is the bar still forming
+            bars = [bar_from_rate(rate) for rate in rates[:-1]] if rates is not None else []
+        else:
+            # Second granularities only exist in the CandleManager
+            return None
+
+        for bar in bars:
+            levels.add(bar)
+        return levels
+
+    def refresh(self, symbol, granularity, levels: RollingLevels):
+        """Adds the bars that closed since the last update."""
+        seconds = get_granularity(granularity).seconds
+        forming = bucket_start(get_granularity(granularity), int(time.time()))
+        if levels.last is None or forming - seconds <= levels.last.time:
+            return
+
+        count = min((forming - levels.last.time) // seconds + 1, levels.window + levels.period + 1)
+        rates = self.mt5.query_historic_data(symbol, count, granularity=granularity)
+        for rate in (rates[:-1] if rates is not None else []):
+            levels.add(bar_from_rate(rate))
+        self.updates += 1
+
+    def level(self, symbol, granularity: str = "M1", period: int = PERIOD, window: int = WINDOW) -> Optional[StopLevel]:
+        """Latest levels of the closed bars, None when not enough history is available."""
+        key = (symbol, granularity)
+        try:
+            with self.lock:
+                levels = self.series.get(key, {}).get((period, window))
+                if levels is None:
+                    levels = self.seed(symbol, granularity, period, window)
+                    if levels is None:
+                        return None
+                    self.series[key] = {**self.series.get(key, {}), (period, window): levels}
+                    self.updates += 1
+                elif not self.is_fed(symbol, granularity):
+                    self.refresh(symbol, granularity, levels)
+                return levels.level()
+        except Exception as error:
+            self.log_to_error(f"StopLevelService: Failed updating levels for {symbol} {granularity}: {error}")
+            return None
+
+    def stop_loss(self, symbol, is_buy: bool, multiplier: float = 1.0, granularity: str = "M1") -> Optional[float]:
+        """Beyond the window's extreme by multiplier ATRs, below the low for buys and above the high for sells."""
+        level = self.level(symbol, granularity)
+        if level is None:
+            return None
+        return level.low - multiplier * level.atr if is_buy else level.high + multiplier * level.atr
+
+    def remove_symbol(self, symbol):
+        with self.lock:
+            self.series = {key: levels for key, levels in self.series.items() if key[0] != symbol}
@@ -1,40 +1,61 @@
-from typing import Optional
+from typing import List, Optional
+import pandas as pd
 from api.metatrader_api import MT5
 from bot.risk_management import calculate_lot_size
+from models.indicators import Indicators
 from models.individual_strategy import IndividualStrategy
 from models.signal_decision import SignalDecision
-from strategy.strategy import run_strategy
+from models.bar import Bar
+from strategy.base import Strategy
+from strategy.features import FeatureFrame
+from strategy.registry import get_strategy
 
 
 class StrategyManager:
-    def __init__(self, symbol, strategy: IndividualStrategy, mt5: MT5 , log_message, log_to_error):
+    def __init__(self, symbol, strategy: IndividualStrategy, mt5: MT5 , log_message, log_to_error, risk_model=None, stop_levels=None, size_signals=True):
         self.symbol = symbol
+        self.risk_model = risk_model
+        # Shard workers leave sizing to the coordinator's risk model
+        self.size_signals = size_signals
+        self.stop_levels = stop_levels
         self.strategy = strategy
         self.mt5 = mt5
         self.log_message = log_message
         self.log_to_error = log_to_error
+        self.implementation = get_strategy(strategy.strategy_name)(symbol, strategy, log_message, log_to_error, stop_levels)
+        # Building candle frames and feeding every tick only pays off for strategies that use them
+        self.wants_history = type(self.implementation).warmup is not Strategy.warmup
+        self.wants_ticks = type(self.implementation).on_tick is not Strategy.on_tick
+
+    def warmup(self, history: Optional[pd.DataFrame]):
+        self.implementation.warmup(history)
+
+    def on_bar(self, bar: Bar):
+        self.implementation.on_bar(bar)
+
+    def on_tick(self, tick):
+        self.implementation.on_tick(tick)
         
-    def generate_signal(self) -> Optional[SignalDecision]: 
+    def generate_signal(self, candle_data: Optional[pd.DataFrame] = None, features: Optional[FeatureFrame] = None) -> Optional[SignalDecision]: 
         print(f"StrategyManager.generate_signal: starting for {self.symbol}, {self.strategy.granularity}")
         
-        # Fetch candle data from MT5 API
-        candle_data = self.mt5.fetch_candles(self.symbol, self.strategy.granularity, self.log_to_error)
+        # Fetch candle data from MT5 API unless the CandleManager already built it
+        if candle_data is None:
+            candle_data = self.mt5.fetch_candles(self.symbol, self.strategy.granularity, self.log_to_error)
         
         # Check if we received valid candle data
         if candle_data.empty:
             self.log_to_error(f"StrategyManager.generate_signal: No candle data received for {self.symbol}")
             return None
 
-        print(f"StrategyManager.generate_signal: Running run_strategy with data size {len(candle_data)}")
+        print(f"StrategyManager.generate_signal: Running {self.strategy.strategy_name} with data size {len(candle_data)}")
 
-        # Call run_strategy to get the signal decision
-        signal_decision = run_strategy(
-            candle_data=candle_data,
-            symbol=self.symbol,
-            strategy=self.strategy,
-            log_message=self.log_message,
-            log_to_error=self.log_to_error,
-        )
+        # Strategies evaluated on the same candles share one FeatureFrame
+        if features is None:
+            features = FeatureFrame(candle_data)
+
+        # Ask the configured strategy for the signal decision
+        signal_decision = self.implementation.evaluate(candle_data, features)
 
         print(f"StrategyManager.generate_signal: Received strategy decision: {signal_decision}")
         
@@ -42,10 +63,18 @@ class StrategyManager:
             self.log_message(f"StrategyManager: No valid signal generated for {self.symbol}", self.symbol)
             return None
 
+        if not self.size_signals:
+            return signal_decision
+
         # Calculate lot size based on the signal decision
-        volume, _, decimal_places = calculate_lot_size(
-            self.mt5, signal_decision, self.log_message, self.log_to_error
+        lot_size = calculate_lot_size(
+            self.mt5, signal_decision, self.log_message, self.log_to_error, risk_model=self.risk_model
         )
+        if lot_size is None:
+            self.log_message(f"StrategyManager: Signal for {self.symbol} rejected by risk limits", self.symbol)
+            return None
+
+        volume, _, decimal_places = lot_size
         
         signal_decision.volume = volume
         signal_decision.take_profit = round(signal_decision.take_profit, decimal_places)
@@ -55,4 +84,29 @@ class StrategyManager:
         self.log_message(f"StrategyManager: Signal generated for {self.symbol}: {signal_decision}", self.symbol)
         
         return signal_decision
-        
\ No newline at end of file
+
+
+def build_strategy_managers(symbol, strategy_configurations, mt5: MT5, log_message, log_to_error, risk_model=None, stop_levels=None, strategy_name="Template", size_signals=True) -> List[StrategyManager]:
+    """Creates one StrategyManager per strategy configuration of a symbol in configuration.json.
+
+    A configuration's "strategy" selects its strategy, strategy_name is the default.
+    """
+    strategy_managers = []
+
+    for strategy_configuration in strategy_configurations:
+        indicators = Indicators(**strategy_configuration["indicators"])
+        strategy = IndividualStrategy(indicators=indicators, granularity=strategy_configuration["granularity"], risk=strategy_configuration["risk"], profit_ratio=strategy_configuration["profit_ratio"],
+                                      strategy_name=strategy_configuration.get("strategy", strategy_name))
+
+        strategy_managers.append(StrategyManager(
+            symbol=symbol,
+            strategy=strategy,
+            mt5=mt5,
+            log_message=log_message,
+            log_to_error=log_to_error,
+            risk_model=risk_model,
+            stop_levels=stop_levels,
+            size_signals=size_signals,
+        ))
+
+    return strategy_managers
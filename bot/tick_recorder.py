@@ -0,0 +1,42 @@
+import threading
+import time
+from typing import Dict, List
+
+from utils.tick_file import TickFileWriter
+
+
+class TickRecorder(threading.Thread):
+    """Polls symbol_info_tick for every symbol and appends new ticks to a tick file."""
+
+    def __init__(self, mt5, symbols: List[str], path: str, interval: float, log_to_error):
+        super().__init__(name="tick_recorder_thread", daemon=True)
+        self.mt5 = mt5
+        self.symbols = symbols
+        self.interval = interval
+        self.log_to_error = log_to_error
+        self.writer = TickFileWriter(path)
+        self.last_time_msc: Dict[str, int] = {}
+        self.running = True
+        self.recorded = 0
+
+    def run(self):
+        while self.running:
+            for symbol in self.symbols:
+                try:
+                    tick = self.mt5.mt5.symbol_info_tick(symbol)
+                    if tick is None or tick.time_msc == self.last_time_msc.get(symbol):
+                        continue
+
+                    self.last_time_msc[symbol] = tick.time_msc
+                    self.writer.append(symbol, tick)
+                    self.recorded += 1
+                except Exception as error:
+                    self.log_to_error(f"TickRecorder: Failed recording {symbol}: {error}")
+
+            self.writer.flush_if_due()
+            time.sleep(self.interval)
+
+        self.writer.close()
+
+    def stop(self):
+        self.running = False
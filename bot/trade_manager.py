@@ -5,32 +5,39 @@ import datetime
 import time
 import numpy as np
 import pandas as pd
+from bot.position_policy import compile_policies
+from bot.position_rules import SymbolTable, evaluate_positions, positions_array
 from bot.risk_management import calculate_lot_size
+from bot.stop_levels import StopLevelService
 from db.db import DataDB
+from models.symbol_spec import SymbolSpec
+from models.trade_management import TradeManagement
 from utils.utils import get_trade_multipler, get_decimals_places
 
-from typing import List
-import talib
+from typing import Dict, List
 
 class TradeManager:
-    def __init__(self, mt5, risk_management, log_to_main, log_message, log_to_error):
+    def __init__(self, mt5, risk_management, log_to_main, log_message, log_to_error, risk_model=None, trade_management=None, stop_levels=None):
         """Initializes the TradeManager with MT5 instance, risk management rules, and logging functions."""
         self.mt5 = mt5  # MT5 instance for trading operations
         self.risk_management = risk_management  # Risk management settings
+        self.risk_model = risk_model  # Open risk per symbol, kept in sync with positions
+        self.stop_levels = stop_levels or StopLevelService(mt5, log_to_error)  # ATR and high/low per symbol
         self.log_to_main = log_to_main
         self.log_message = log_message  # Function for logging general messages
         self.log_to_error = log_to_error  # Function for logging error messages
         self.is_running = True  # Flag to control the trade monitoring loop
         self.daily_loss = 0  # Track daily loss to stop trading if threshold is met
-        self.partial_close= True
-        # Break even points for different symbols
-        self.BREAK_EVEN_POINTS = {
-            "BTCUSD": 1000,
-            "NAS100": 5000,
-            "SP500": 1500,
-            "US2000": 1500,
-            "XAUUSD": 300,
-        }
+        self.trade_management = trade_management or TradeManagement(trailing_stop=True, partial_close=True)
+        # Partial close tiers each position went through, ticket -> count
+        self.tiers_done: Dict[int, int] = {}
+        self.compile_policies()
+
+    def compile_policies(self):
+        """Compiles the position policies, again whenever trade_management or risk_management change."""
+        self.partial_close = self.trade_management.partial_close
+        self.trailing_stop = self.trade_management.trailing_stop
+        self.policies = compile_policies(self.trade_management.policies, self.risk_management.max_stop_loss_percentage)
 
     def close_open_trades(self):
         """Closes all open trades before stopping the bot."""
@@ -53,39 +60,40 @@ class TradeManager:
 
         try:
             open_positions = self.mt5.get_open_positions()  # Fetch open trades
-            for trade in open_positions:
-                # Get the current market price for the traded symbol
-                current_price = trade.price_current
-                # Adjust stop-loss or take-profit based on your strategy
-                self.manage_position(trade, current_price)
+            if self.risk_model is not None:
+                self.risk_model.sync(open_positions)
+            if open_positions:
+                # Adjust stop-loss and partial closes of all positions in one vectorized pass
+                self.manage_positions(open_positions)
+            for trade in open_positions or ():
+                self.manage_position_bydb(trade)
 
         except Exception as error:
             self.log_to_error(f"monitor_open_trades: Critical error while monitoring trades: {error}")
             raise error
 
+    def calculate_atr(self, symbol):
+        """ATR of the M1 candles, used by ATR trailing policies."""
+        level = self.stop_levels.level(symbol, "M1")
+        return level.atr if level is not None else np.nan
+
     def calculate_stop_loss(self, symbol, order_type):
         """Calculate stop loss using ATR."""
-        # Get historical data
-        candles = self.mt5.fetch_candles(symbol, "M1", self.log_to_error, 180)  # Adjusted count for ATR period
-
-        if len(candles) == 0 or len(candles) < 14:
+        # ATR(15) and the 180 candle extremes of M1, shared per symbol and updated once per minute
+        level = self.stop_levels.level(symbol, "M1")
+        if level is None:
             return None
 
-        # Extract high, low, and close prices
-        high_prices = candles['High'].iloc[-180:].max()
-        low_prices = candles['Low'].iloc[-180:].min()
-
-        # Calculate ATR
-        atr = talib.ATR(candles['High'], candles['Low'], candles['Close'], timeperiod=15).iloc[-1]
+        atr = level.atr
         if order_type == self.mt5.ORDER_TYPE_BUY:
             # Stop loss below the low
-            stop_loss = low_prices - atr
+            stop_loss = level.low - atr
         else:
             # Stop loss above the high
-            stop_loss = high_prices + atr
+            stop_loss = level.high + atr
 
         # 如果stop loss 和当前价格的差距小于atr的1/2，那么使用15倍的atr作为止损距离
-        if abs(stop_loss - candles['Close'].iloc[-1]) < atr / 2:
+        if abs(stop_loss - level.close) < atr / 2:
             if order_type == self.mt5.ORDER_TYPE_BUY:
                 stop_loss = stop_loss - atr * 15
             else:
@@ -93,57 +101,81 @@ class TradeManager:
         
         return round(float(stop_loss), 2)
 
-    def manage_position(self, position, current_price):
-        """Manages an open trade by adjusting stop-loss or take-profit if conditions are met."""
-        
-        # Original stop loss management
-        if position.sl is None or position.sl == 0.0:
-            stop_loss = self.calculate_stop_loss(position.symbol, position.type)
+    def symbol_spec(self, symbol) -> SymbolSpec:
+        if self.risk_model is not None:
+            # Cached for the lifetime of the bot
+            return self.risk_model.spec(symbol)
+
+        symbol_info = self.mt5.symbol_info(symbol)
+        return SymbolSpec(
+            tick_value=symbol_info.trade_tick_value,
+            tick_size=symbol_info.trade_tick_size,
+            volume_step=symbol_info.volume_step,
+            volume_decimals=get_decimals_places(symbol_info.volume_step),
+            price_decimals=get_decimals_places(symbol_info.trade_tick_size),
+        )
+
+    def symbol_table(self, symbols: List[str], positions) -> SymbolTable:
+        """Builds the per symbol inputs, fetching candles only for ATR policies and positions without a stop loss."""
+        specs = [self.symbol_spec(symbol) for symbol in symbols]
+        table = SymbolTable(
+            symbols=symbols,
+            tick_size=np.array([spec.tick_size for spec in specs]),
+            volume_step=np.array([spec.volume_step for spec in specs]),
+            policy=np.array([self.policies.row(symbol) for symbol in symbols]),
+            atr=np.array([self.calculate_atr(symbol) if self.policies.uses_atr(symbol) else np.nan for symbol in symbols]),
+            atr_stop_buy=np.full(len(symbols), np.nan),
+            atr_stop_sell=np.full(len(symbols), np.nan),
+        )
+
+        for symbol, order_type in {(p.symbol, p.type) for p in positions if not p.sl}:
+            stop_loss = self.calculate_stop_loss(symbol, order_type)
             if stop_loss:
-                self.mt5.modify_position(position.identifier, stop_loss=stop_loss)
-        # Get break even points for the symbol
-        break_even_points = self.BREAK_EVEN_POINTS.get(position.symbol, 10000)
-        symbol_info = self.mt5.symbol_info(position.symbol)
-        if symbol_info is None:
-            self.log_to_error(f"Could not get symbol info for {position.symbol}")
-            return
-            
-        tick_size = symbol_info.trade_tick_size
-        if position.type == self.mt5.ORDER_TYPE_BUY:
-            # Calculate profit in points
-            profit_points = (current_price - position.price_open) / tick_size
-
-            # Check if profit reaches break even points
-            if profit_points >= break_even_points and position.sl < position.price_open:
-                # Move stop loss to break even
-                self.mt5.modify_position(position.identifier, stop_loss=position.price_open)
-                if self.partial_close:
-                    self.partial_close_position(position.symbol, position.identifier, position.volume)
-
-            # Original trailing stop logic
-            if current_price > position.price_open + self.risk_management.max_stop_loss_percentage * position.price_open:
-                new_stop_loss = current_price - self.risk_management.max_stop_loss_percentage * position.price_open
-                if new_stop_loss > position.stop_loss:
-                    self.mt5.modify_position(position.identifier, stop_loss=new_stop_loss)
-
-        elif position.type == self.mt5.ORDER_TYPE_SELL:
-            # Calculate profit in points
-            profit_points = (position.price_open - current_price) / tick_size
-
-            # Check if profit reaches break even points
-            if profit_points >= break_even_points and position.sl > position.price_open:
-                # Move stop loss to break even
-                self.mt5.modify_position(position.identifier, stop_loss=position.price_open)
-                if self.partial_close:
-                    partial_close_volume = round(position.volume / 3, 2)
-                    self.partial_close_position(position.identifier, partial_close_volume)
-
-            # Original trailing stop logic
-            if current_price < position.price_open - self.risk_management.max_stop_loss_percentage * position.price_open:
-                new_stop_loss = current_price + self.risk_management.max_stop_loss_percentage * position.price_open
-                if new_stop_loss < position.stop_loss:
-                    self.mt5.modify_position(position.identifier, stop_loss=new_stop_loss)
-        self.manage_position_bydb(position) 
+                atr_stops = table.atr_stop_buy if order_type == self.mt5.ORDER_TYPE_BUY else table.atr_stop_sell
+                atr_stops[symbols.index(symbol)] = stop_loss
+        return table
+
+    def manage_positions(self, positions):
+        """Evaluates the position rules for all positions in one pass and sends only the resulting changes."""
+        symbols = list(dict.fromkeys(position.symbol for position in positions))
+        symbol_ids = {symbol: index for index, symbol in enumerate(symbols)}
+        table = self.symbol_table(symbols, positions)
+
+        # Closed positions don't need their tiers anymore
+        tiers_done = {position.ticket: self.tiers_done.get(position.ticket, 0) for position in positions}
+        self.tiers_done = tiers_done
+
+        actions = evaluate_positions(
+            positions_array(positions, symbol_ids),
+            table,
+            self.policies,
+            self.mt5.ORDER_TYPE_BUY,
+            tiers_done=np.array(list(tiers_done.values()), dtype=np.int32),
+            trailing_stop=self.trailing_stop,
+            partial_close=self.partial_close,
+        )
+
+        for action in actions:
+            ticket = int(action["ticket"])
+            if not np.isnan(action["stop_loss"]):
+                # Coalesced with other modifications of the same position by the order gateway
+                modified = self.mt5.modify_position_async(ticket, stop_loss=float(action["stop_loss"]))
+                modified.add_done_callback(lambda future, ticket=ticket: self.check_modification(future, ticket))
+            if action["close_volume"] > 0:
+                volume = round(float(action["close_volume"]), get_decimals_places(table.volume_step[action["symbol_id"]]))
+                if not self.mt5.partial_close_position(ticket, volume):
+                    # The tier is tried again on the next pass
+                    self.log_to_error(f"manage_positions: Partial close of ticket {ticket} failed.")
+                    continue
+                self.log_message(f"manage_positions: Partial close of ticket {ticket} with volume {volume} successful.", "trade_manager")
+            self.tiers_done[ticket] = int(action["tiers_done"])
+
+    def check_modification(self, future, ticket):
+        """Done callback of an asynchronous stop loss modification, the next pass tries again."""
+        if future.exception() is not None:
+            self.log_to_error(f"manage_positions: Modification of ticket {ticket} failed: {future.exception()}")
+        elif not future.result():
+            self.log_to_error(f"manage_positions: Modification of ticket {ticket} was rejected.")
 
     def manage_position_bydb(self, position):
         # Check database signals first
@@ -182,7 +214,8 @@ class TradeManager:
                         )
                     elif 'stop_loss' in order_type:
                         # Full close for stop loss
-                        self.mt5.close_order(position.identifier)
+                        if self.mt5.close_order(position.identifier) and self.risk_model is not None:
+                            self.risk_model.on_close(position.identifier)
                     
                     # Update signal as handled
                     update_query = """
@@ -228,14 +261,20 @@ class TradeManager:
 
         return True
 
-    def track_daily_loss(self):
-        """Tracks the bot's daily losses and stops trading if the max daily loss limit is reached."""
-        closed_trades = self.mt5.get_closed_deals()
+    def update_daily_loss(self):
+        """Recomputes today's realized loss from closed deals."""
+        closed_trades = self.mt5.get_closed_deals() or ()
         total_loss = 0
         for trade in closed_trades:
             profit = trade.profit
             if profit < 0:
                 total_loss += abs(profit)
+        self.daily_loss = total_loss
+        return total_loss
+
+    def track_daily_loss(self):
+        """Tracks the bot's daily losses and stops trading if the max daily loss limit is reached."""
+        total_loss = self.update_daily_loss()
         account_balance = self.mt5.get_account_info()["balance"]
         max_daily_loss = self.risk_management.max_daily_loss_percentage * account_balance
 
@@ -267,7 +306,7 @@ class TradeManager:
         """Partially closes an open trade."""
         symbol_info = self.mt5.symbol_info(symbol)
         if symbol_info is None:
-            self.log_error(f"Could not get symbol info for ticket {ticket}")
+            self.log_to_error(f"Could not get symbol info for ticket {ticket}")
             return
 
         volume_step = symbol_info.volume_step
@@ -282,6 +321,6 @@ class TradeManager:
 
         result = self.mt5.partial_close_position(ticket, partial_close_volume)
         if result:
-            self.log_message(f"Partial close of ticket {ticket} with volume {partial_close_volume} successful.")
+            self.log_message(f"Partial close of ticket {ticket} with volume {partial_close_volume} successful.", "trade_manager")
         else:
-            self.log_error(f"Partial close of ticket {ticket} failed.")
+            self.log_to_error(f"Partial close of ticket {ticket} failed.")
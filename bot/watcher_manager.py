@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from bot.signal_management import OrderFailed, process_signal
+from constants.granularities import get_granularity
+
+FIRED = "fired"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+FAILED = "failed"
+REJECTED = "rejected"
+
+
+class WatcherManager:
+    """Runs process_signal breakout watchers on a fixed number of threads.
+
+    At most capacity watchers run at once, a signal arriving when all are busy is
+    rejected. Each watcher gives up after deadline_candles candles of its strategy
+    and every watcher stops as soon as stop() sets the shared event. counts holds
+    how watchers ended: fired, expired, cancelled, failed or rejected.
+    """
+
+    def __init__(self, mt5, risk_model, capacity: int, deadline_candles: int, log_message, log_to_error):
+        self.mt5 = mt5
+        self.risk_model = risk_model
+        self.capacity = capacity
+        self.deadline_candles = deadline_candles
+        self.log_message = log_message
+        self.log_to_error = log_to_error
+        self.stop_event = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=capacity, thread_name_prefix="watcher")
+        self.lock = threading.Lock()
+        # future -> signal_container, what the checkpoint records as watched
+        self.watchers: Dict[Future, tuple] = {}
+        self.counts = Counter()
+
+    def submit(self, signal_container) -> Optional[Future]:
+        signal_decision, strategy_manager = signal_container
+        with self.lock:
+            if len(self.watchers) >= self.capacity:
+                self.counts[REJECTED] += 1
+                self.log_to_error(f"WatcherManager: {self.capacity} watchers busy, signal for {signal_decision.symbol} rejected")
+                self.risk_model.release(signal_decision)
+                return None
+
+            deadline = time.time() + self.deadline_candles * get_granularity(strategy_manager.strategy.granularity).seconds
+            future = self.executor.submit(
+                process_signal,
+                self.stop_event,
+                signal_decision,
+                self.mt5,
+                strategy_manager,
+                self.log_message,
+                self.log_to_error,
+                deadline,
+            )
+            self.watchers[future] = signal_container
+
+        future.add_done_callback(self.on_done)
+        return future
+
+    def on_done(self, future: Future):
+        with self.lock:
+            stopped = self.stop_event.is_set() and (future.cancelled() or (future.exception() is None and future.result() is None))
+            if stopped:
+                # Still watched for the state written after stop(), a handoff resumes them
+                self.counts[CANCELLED] += 1
+                return
+
+            signal_decision, _ = self.watchers.pop(future)
+
+            if future.cancelled():
+                self.counts[CANCELLED] += 1
+                self.risk_model.release(signal_decision)
+            elif isinstance(future.exception(), OrderFailed):
+                # process_place_order already released the reservation of a refused order
+                self.counts[FAILED] += 1
+            elif future.exception() is not None:
+                # Failed before ordering, or after a fill whose reservation is already gone
+                self.counts[FAILED] += 1
+                self.log_to_error(f"WatcherManager: watcher for {signal_decision.symbol} failed: {future.exception()}")
+                self.risk_model.release(signal_decision)
+            elif future.result() is not None:
+                self.counts[FIRED] += 1
+            else:
+                self.counts[EXPIRED] += 1
+                self.log_message(f"WatcherManager: watcher for {signal_decision.symbol} expired", "trade_processor")
+                self.risk_model.release(signal_decision)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {"active": len(self.watchers), **self.counts}
+
+    def stop(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
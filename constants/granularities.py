@@ -0,0 +1,69 @@
+from typing import Dict
+
+from models.granularity import Granularity
+
+# MetaTrader5 TIMEFRAME_* values, kept here so the registry can be imported without the terminal package
+TIMEFRAME_M1 = 1
+TIMEFRAME_M2 = 2
+TIMEFRAME_M3 = 3
+TIMEFRAME_M4 = 4
+TIMEFRAME_M5 = 5
+TIMEFRAME_M6 = 6
+TIMEFRAME_M10 = 10
+TIMEFRAME_M12 = 12
+TIMEFRAME_M15 = 15
+TIMEFRAME_M20 = 20
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H2 = 16386
+TIMEFRAME_H3 = 16387
+TIMEFRAME_H4 = 16388
+TIMEFRAME_H6 = 16390
+TIMEFRAME_H8 = 16392
+TIMEFRAME_H12 = 16396
+TIMEFRAME_D1 = 16408
+TIMEFRAME_W1 = 32769
+TIMEFRAME_MN1 = 49153
+
+# parent is the largest smaller granularity that divides evenly, used to aggregate bars
+GRANULARITIES: Dict[str, Granularity] = {g.name: g for g in (
+    # S20 maps to M1 since MT5 doesn't support seconds
+    Granularity("S20", TIMEFRAME_M1, 20, "20s"),
+    Granularity("M1", TIMEFRAME_M1, 60, "1min"),
+    Granularity("M2", TIMEFRAME_M2, 120, "2min", "M1"),
+    Granularity("M3", TIMEFRAME_M3, 180, "3min", "M1"),
+    Granularity("M4", TIMEFRAME_M4, 240, "4min", "M2"),
+    Granularity("M5", TIMEFRAME_M5, 300, "5min", "M1"),
+    Granularity("M6", TIMEFRAME_M6, 360, "6min", "M3"),
+    Granularity("M10", TIMEFRAME_M10, 600, "10min", "M5"),
+    Granularity("M12", TIMEFRAME_M12, 720, "12min", "M6"),
+    Granularity("M15", TIMEFRAME_M15, 900, "15min", "M5"),
+    Granularity("M20", TIMEFRAME_M20, 1200, "20min", "M10"),
+    Granularity("M30", TIMEFRAME_M30, 1800, "30min", "M15"),
+    Granularity("H1", TIMEFRAME_H1, 3600, "1h", "M30"),
+    Granularity("H2", TIMEFRAME_H2, 7200, "2h", "H1"),
+    Granularity("H3", TIMEFRAME_H3, 10800, "3h", "H1"),
+    Granularity("H4", TIMEFRAME_H4, 14400, "4h", "H2"),
+    Granularity("H6", TIMEFRAME_H6, 21600, "6h", "H3"),
+    Granularity("H8", TIMEFRAME_H8, 28800, "8h", "H4"),
+    Granularity("H12", TIMEFRAME_H12, 43200, "12h", "H6"),
+    Granularity("D1", TIMEFRAME_D1, 86400, "1D", "H12"),
+    Granularity("W1", TIMEFRAME_W1, 604800, "1W", "D1"),
+    # 30 days (approximation)
+    Granularity("MN1", TIMEFRAME_MN1, 2592000, "1MS", "D1"),
+)}
+
+# Older configuration names
+ALIASES = {
+    "D": "D1",
+    "W": "W1",
+    "M": "MN1",
+}
+
+
+def get_granularity(name: str) -> Granularity:
+    """Looks up a granularity by name, raising ValueError for unsupported ones."""
+    granularity = GRANULARITIES.get(ALIASES.get(name, name))
+    if granularity is None:
+        raise ValueError(f"Unsupported granularity: {name}")
+    return granularity
@@ -1,41 +1,92 @@
-from logtail import LogtailHandler
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+from queue import Queue
 import logging
 import os
 
 LOG_FORMAT = "%(asctime)s %(message)s"
 DEFAULT_LEVEL = logging.DEBUG
 
+
+class LogDispatcher(QueueListener):
+    """Writes the records of every logger on one background thread.
+
+    Loggers only enqueue. Handlers are created from their factory on the first
+    record of the logger, so opening files and importing logtail never happens
+    on the trading threads.
+    """
+
+    def __init__(self):
+        super().__init__(Queue())
+        self.factories = {}
+        self.routes = {}
+
+    def add_handler(self, name, factory):
+        self.factories = {**self.factories, name: self.factories.get(name, []) + [factory]}
+
+    def handle(self, record):
+        factories = self.factories.get(record.name, [])
+        handlers = self.routes.get(record.name, [])
+        for factory in factories[len(handlers):]:
+            try:
+                handlers.append(factory())
+            except Exception as e:
+                # A handler that can't be created must not stop the other loggers
+                logging.error(f"LogDispatcher: could not create handler for {record.name}: {e}")
+                handlers.append(None)
+        self.routes[record.name] = handlers
+
+        for handler in handlers:
+            if handler is not None:
+                handler.handle(record)
+
+    def attach(self, logger):
+        if not any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+            logger.addHandler(QueueHandler(self.queue))
+
+
+DISPATCHER = LogDispatcher()
+DISPATCHER.start()
+# Flush what is still queued when the process exits
+atexit.register(DISPATCHER.stop)
+
+
 class LogWrapper:
     PATH = './logs'
 
     def __init__(self, name, mode="w", betterstack_token=None):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(DEFAULT_LEVEL)
+        DISPATCHER.attach(self.logger)
 
         # 文件日志
         self.setup_file_logging(name, mode)
-        
+
         # BetterStack日志
         if betterstack_token:
-            self.setup_betterstack_logging(name, betterstack_token)
+            DISPATCHER.add_handler(name, lambda: self.setup_betterstack_logging(name, betterstack_token))
 
         self.logger.info(f"LogWrapper initialized for {name}")
 
     def setup_betterstack_logging(self, name, token):
+        from logtail import LogtailHandler
+
         betterstack_handler = LogtailHandler(source_token=token)
         formatter = logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
         betterstack_handler.setFormatter(formatter)
-        self.logger.addHandler(betterstack_handler)
-        self.logger.info("BetterStack Logging enabled")
+        return betterstack_handler
 
     def setup_file_logging(self, name, mode):
-        self.create_directory()
         self.filename = f"{LogWrapper.PATH}/{name}.log"
+        DISPATCHER.add_handler(name, lambda: self.create_file_handler(mode))
+
+    def create_file_handler(self, mode):
+        self.create_directory()
         file_handler = logging.FileHandler(self.filename, mode=mode)
         formatter = logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
 
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        return file_handler
 
     def create_directory(self):
         if not os.path.exists(LogWrapper.PATH):
@@ -68,6 +68,36 @@ class DataDB:
         finally:
             cursor.close()
 
+    def execute_batch(self, statements):
+        """Executes (query, params) pairs in one transaction, raises after a rollback so the caller can retry."""
+        if self.connection is None:
+            raise ConnectionError("Not connected to the database")
+        cursor = self.connection.cursor()
+        try:
+            for query, params in statements:
+                cursor.execute(query, params)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def stream(self, query, params=None, itersize=5000):
+        """Yields the rows of a query through a server-side cursor, itersize rows per round trip."""
+        if self.connection is None:
+            raise ConnectionError("Not connected to the database")
+        # A named cursor keeps the result on the server instead of loading it in memory
+        cursor = self.connection.cursor(name=f"stream_{id(self)}")
+        cursor.itersize = itersize
+        try:
+            cursor.execute(query, params)
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+            self.connection.rollback()
+
     def describe_table(self, table_name):
         if self.connection is None:
             print("Not connected to the database")
@@ -0,0 +1,171 @@
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Optional, Set
+
+SET_POSITION_ID = "position_id"
+MARK_HANDLED = "handled"
+
+# Every update sets the row to values recorded at append time, so replaying a batch is harmless
+STATEMENTS = {
+    SET_POSITION_ID: "UPDATE t_signals SET position_id = %s WHERE id = %s",
+    MARK_HANDLED: "UPDATE t_signals SET handled = true, handled_time = %s, order_info = %s WHERE id = %s",
+}
+
+
+def connect_db():
+    from db.db import DataDB
+
+    db = DataDB()
+    db.connect()
+    if db.connection is None:
+        raise ConnectionError("Could not connect to the database")
+    return db
+
+
+class DBJournal(threading.Thread):
+    """Write-behind queue for the t_signals bookkeeping of the order path.
+
+    append() stores the update in a local SQLite file and returns. The thread
+    sends the oldest batch_size updates to Postgres in one transaction and only
+    then deletes them locally, so an update survives a crash or a database
+    outage and is retried, with a growing pause, until it is written.
+
+    Shard workers open the same file and only append. Exactly one process, the
+    main one, may call flush(), start() or stop(): two flushers could write an
+    older update of a row after a newer one.
+    """
+
+    MAX_BACKOFF = 60
+
+    def __init__(self, path: str, batch_size: int = 100, interval: float = 1.0,
+                 log_to_error: Callable = print, connect: Callable = connect_db):
+        super().__init__(name="db_journal_thread", daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.log_to_error = log_to_error
+        self.connect = connect
+        self.connection = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.flushed = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Shard workers append to the same file, the main process flushes it
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS journal (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, signal_id INTEGER, params TEXT)")
+        self.db.commit()
+
+    def append(self, kind: str, signal_id: int, *params):
+        if kind not in STATEMENTS:
+            raise ValueError(f"Unsupported journal entry {kind}, expected one of {', '.join(STATEMENTS)}")
+        with self.lock:
+            self.db.execute("INSERT INTO journal (kind, signal_id, params) VALUES (?, ?, ?)", (kind, signal_id, json.dumps(params + (signal_id,))))
+            self.db.commit()
+
+    def pending(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def pending_signal_ids(self) -> Set[int]:
+        """Signals marked handled locally but not in Postgres yet, queries for unhandled signals skip them."""
+        with self.lock:
+            rows = self.db.execute("SELECT DISTINCT signal_id FROM journal WHERE kind = ?", (MARK_HANDLED,)).fetchall()
+        return {signal_id for (signal_id,) in rows}
+
+    def flush(self) -> int:
+        """Writes the oldest batch to Postgres, returns how many updates were written."""
+        with self.lock:
+            rows = self.db.execute("SELECT id, kind, params FROM journal ORDER BY id LIMIT ?", (self.batch_size,)).fetchall()
+        if not rows:
+            return 0
+
+        if self.connection is None:
+            self.connection = self.connect()
+        self.connection.execute_batch([(STATEMENTS[kind], tuple(json.loads(params))) for _, kind, params in rows])
+
+        with self.lock:
+            self.db.executemany("DELETE FROM journal WHERE id = ?", [(row_id,) for row_id, _, _ in rows])
+            self.db.commit()
+        self.flushed += len(rows)
+        return len(rows)
+
+    def warm_up(self):
+        """Opens the Postgres connection before the first flush, a failure is retried by the thread."""
+        if self.connection is not None:
+            return
+        try:
+            self.connection = self.connect()
+        except Exception as e:
+            self.log_to_error(f"DBJournal: warm-up failed, connecting on the first flush: {e}")
+
+    def run(self):
+        backoff = self.interval
+        while not self.stop_event.is_set():
+            try:
+                # A full batch means more is waiting, keep going
+                if self.flush() < self.batch_size:
+                    self.stop_event.wait(self.interval)
+                backoff = self.interval
+            except Exception as e:
+                self.log_to_error(f"DBJournal: flush failed, retrying in {backoff:.0f}s: {e}")
+                self.disconnect()
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def disconnect(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def stop(self, timeout: float = 5):
+        """Stops the thread after a last flush attempt, what is left stays in the file for the next start."""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        try:
+            while self.flush() > 0:
+                pass
+        except Exception as e:
+            self.log_to_error(f"DBJournal: {self.pending()} updates left for the next start: {e}")
+        self.disconnect()
+
+
+JOURNAL: Optional[DBJournal] = None
+
+
+def open_journal(path: str, **kwargs) -> DBJournal:
+    """Routes record() through a journal at path for this process."""
+    global JOURNAL
+    JOURNAL = DBJournal(path, **kwargs)
+    return JOURNAL
+
+
+def record(kind: str, signal_id: int, *params):
+    """Queues a t_signals update, or writes it right away when no journal was opened."""
+    if JOURNAL is not None:
+        JOURNAL.append(kind, signal_id, *params)
+        return
+
+    db = connect_db()
+    try:
+        db.execute_batch([(STATEMENTS[kind], params + (signal_id,))])
+    finally:
+        db.close()
+
+
+def pending_signal_ids() -> Set[int]:
+    return JOURNAL.pending_signal_ids() if JOURNAL is not None else set()
+
+
+def now_text() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
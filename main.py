@@ -1,13 +1,42 @@
+import sys
+
 from bot.bot import Bot
+from bot.state_snapshot import restore_signals
+from utils.config_watcher import ConfigWatcher
 from utils.git_watcher import GitWatcher
+from utils.handoff import Handoff
 
 # Main function
 if __name__ == "__main__":
-    bot = Bot()
+    handoff = Handoff()
+
+    if "--handoff" in sys.argv:
+        # 由旧进程启动: 用交接的状态预热, 等旧进程停止下单后再接管
+        bot = Bot(state=handoff.load_state())
+        bot.mt5.attach_orders_lock(handoff)
+        if bot.journal is not None:
+            # The journal thread starts with bot.run(), connect before taking over
+            bot.journal.warm_up()
+        handoff.announce_ready()
+        if not handoff.wait_released():
+            sys.exit(1)
+        # acquire() removes the state file, restoring may already cancel orders
+        state = handoff.load_state()
+        handoff.acquire()
+        restore_signals(bot, state)
+    else:
+        # No other process trades yet, the startup may already cancel orders
+        handoff.acquire()
+        bot = Bot()
+        bot.mt5.attach_orders_lock(handoff)
     
     # 启动git监控线程
     git_watcher = GitWatcher(bot)
     git_watcher.start()
+
+    # 监控配置文件, 修改后无需重启即可生效
+    config_watcher = ConfigWatcher(bot, bot.CONFIGURATION_PATH)
+    config_watcher.start()
     
     # 运行主bot
     bot.run()
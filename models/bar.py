@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+@dataclass
+class Bar:
+    time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    tick_volume: int = 0
+    spread: int = 0
+    real_volume: int = 0
+
+    def merge(self, other: "Bar"):
+        """Extends this bar with a later bar or tick of the same bucket."""
+        self.high = max(self.high, other.high)
+        self.low = min(self.low, other.low)
+        self.close = other.close
+        self.tick_volume += other.tick_volume
+        self.real_volume += other.real_volume
+        self.spread = other.spread
+
+    def as_rate(self) -> dict:
+        """Same keys as a row returned by copy_rates_from_pos, ready for MT5.configure_df"""
+        return {
+            "time": self.time,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "tick_volume": self.tick_volume,
+            "spread": self.spread,
+            "real_volume": self.real_volume,
+        }
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
+from typing import Optional
 from models.logging import LoggingConfig
 # from models.notifications import Notifications
 from models.error_handling import ErrorHandling
+from models.sharding import Sharding
 from models.signal_managment import SignalManagement
 from models.trade_management import TradeManagement
 
@@ -18,4 +20,5 @@ class BotConfig:
     error_handling: ErrorHandling
     trade_management: TradeManagement
     signal_management: SignalManagement
+    sharding: Optional[Sharding] = None
     
@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+@dataclass
+class ChannelStat:
+    """Running totals of one copy signal channel, averages are derived on read."""
+    fills: int = 0
+    trades: int = 0
+    wins: int = 0
+    r_sum: float = 0.0
+    r_count: int = 0
+    # Slippage in R: how much of the stop loss distance the fill lost against the decision price
+    slippage_sum: float = 0.0
+    slippage_count: int = 0
+    latency_sum: float = 0.0
+    latency_count: int = 0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades if self.trades else float("nan")
+
+    @property
+    def average_r(self) -> float:
+        return self.r_sum / self.r_count if self.r_count else float("nan")
+
+    @property
+    def average_slippage(self) -> float:
+        return self.slippage_sum / self.slippage_count if self.slippage_count else float("nan")
+
+    @property
+    def average_latency(self) -> float:
+        """Seconds from the signal to the fill"""
+        return self.latency_sum / self.latency_count if self.latency_count else float("nan")
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+@dataclass
+class ChannelStatsConfig:
+    enabled: bool
+    interval: float
+    lookback_days: int
+    min_trades: int
+    min_average_r: float
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass
+class CheckpointConfig:
+    enabled: bool
+    path: str
+    interval: float
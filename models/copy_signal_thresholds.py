@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+@dataclass
+class CopySignalThresholds:
+    # The copy strategy's unit of distance is atr_multiple * ATR(atr_period)
+    atr_period: int = 15
+    atr_multiple: float = 10
+    # A signal is taken while its price is within max_distance units of the close
+    max_distance: float = 5
+    # Stop losses go one unit beyond the lowest low / highest high of level_window candles
+    level_window: int = 180
+    max_age: int = 150 * 60
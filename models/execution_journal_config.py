@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass
+class ExecutionJournalConfig:
+    enabled: bool
+    path: str
+    chunk_rows: int
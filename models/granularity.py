@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class Granularity:
+    name: str
+    mt5_timeframe: int
+    seconds: int
+    pandas_offset: str
+    parent: Optional[str] = None
+    
+    def __repr__(self):
+        return f"Granularity(name='{self.name}', seconds={self.seconds}, parent={self.parent})"
@@ -8,7 +8,9 @@ class IndividualStrategy:
     indicators: Indicators
     risk: float
     profit_ratio: float
+    # Key of strategy/registry.py STRATEGIES
+    strategy_name: str = "Template"
     
     def __repr__(self):
-        return (f"IndividualStrategy(granularity='{self.granularity}', "
+        return (f"IndividualStrategy(strategy_name='{self.strategy_name}', granularity='{self.granularity}', "
                 f"indicators={self.indicators}, risk={self.risk})")
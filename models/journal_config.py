@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+@dataclass
+class JournalConfig:
+    enabled: bool
+    path: str
+    batch_size: int
+    interval: float
@@ -1,27 +1,36 @@
 from dataclasses import dataclass
 from typing import Optional
-from logtail import LogtailHandler
 import logging
 
+from core.log_wrapper import DISPATCHER
+
 @dataclass
 class Logging:
     name: str
     log_file_path: str
     betterstack_token: Optional[str] = None
-    
+
     def __post_init__(self):
         self.logger = logging.getLogger(self.name)
         self.logger.setLevel(logging.INFO)
-        
-        # 文件日志
-        file_handler = logging.FileHandler(self.log_file_path)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(file_handler)
-        
+        DISPATCHER.attach(self.logger)
+
+        # 文件日志, 在后台线程第一次写入时才打开
+        DISPATCHER.add_handler(self.name, self.create_file_handler)
+
         # BetterStack日志
         if self.betterstack_token:
-            betterstack_handler = LogtailHandler(source_token=self.betterstack_token)
-            self.logger.addHandler(betterstack_handler)
+            DISPATCHER.add_handler(self.name, self.create_betterstack_handler)
+
+    def create_file_handler(self):
+        file_handler = logging.FileHandler(self.log_file_path)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        return file_handler
+
+    def create_betterstack_handler(self):
+        from logtail import LogtailHandler
+
+        return LogtailHandler(source_token=self.betterstack_token)
 
 @dataclass
 class CloudLogging:
@@ -31,4 +40,4 @@ class CloudLogging:
 @dataclass
 class LoggingConfig:
     directories: dict
-    cloud_logging: Optional[CloudLogging]
\ No newline at end of file
+    cloud_logging: Optional[CloudLogging]
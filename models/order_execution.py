@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass
+class OrderExecution:
+    max_retries: int
+    deadline_ms: int
+    base_backoff_ms: int
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass
+class OrderGatewayConfig:
+    enabled: bool
+    max_requests_per_second: float
+    coalesce_window: float
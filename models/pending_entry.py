@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+from models.signal_decision import SignalDecision
+
+@dataclass
+class PendingEntry:
+    order: int
+    signal_decision: SignalDecision
+    granularity: str
+    # Stop price of the order, the high (buys) or low (sells) of the candle at bar_time
+    trigger: float
+    bar_time: int
+    expires_at: float
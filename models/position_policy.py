@@ -0,0 +1,30 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class TrailingPolicy:
+    # none, percentage, atr or stepped
+    mode: str = "percentage"
+    # percentage: fraction of the open price, defaults to risk_management.max_stop_loss_percentage
+    distance: Optional[float] = None
+    # atr: trailing distance in ATRs of the M1 candles
+    multiplier: float = 2.0
+    # stepped: points of profit per step, the stop follows one step behind
+    step: float = 0.0
+
+@dataclass
+class PartialCloseTier:
+    points: float
+    fraction: float
+
+@dataclass
+class PositionPolicy:
+    break_even_points: float = 10000
+    trailing: TrailingPolicy = field(default_factory=TrailingPolicy)
+    partial_close: List[PartialCloseTier] = field(default_factory=list)
+
+    def __post_init__(self):
+        if isinstance(self.trailing, dict):
+            self.trailing = TrailingPolicy(**self.trailing)
+        self.partial_close = [PartialCloseTier(**tier) if isinstance(tier, dict) else tier for tier in self.partial_close]
+        self.partial_close.sort(key=lambda tier: tier.points)
@@ -18,6 +18,11 @@ class SignalDecision:
     granularity_ctf_granularity: Optional[str] = None
     id: Optional[int] = None
     comment: Optional[str] = None
+    priority: int = 0
+    # When the copied signal was created, signal_timestamp is when it was evaluated
+    signal_created_at: Optional[datetime] = None
+    # Key of the RiskModel reservation the signal holds, None when it holds none
+    reservation: Optional[int] = None
     
     def __repr__(self):
         return f"SignalDecision(): id={self.id}, symbol={self.symbol}, order_type={self.order_type}, stop_loss={self.stop_loss}, signal_timestamp={self.signal_timestamp}, comment={self.comment}"
@@ -2,4 +2,14 @@ from dataclasses import dataclass
 
 @dataclass
 class SignalManagement:
-    trade_processor: bool
\ No newline at end of file
+    trade_processor: bool
+    # Seconds a signal id or (symbol, direction, bar) is remembered to drop duplicates
+    signal_ttl: float = 3600
+    # Signals older than this are not queued or executed
+    max_signal_age: float = 15
+    # trade_processor enters breakouts with pending stop orders instead of watching ticks
+    pending_entries: bool = False
+    # Candles of the signal's granularity after which an unfilled entry is given up
+    entry_expiry_candles: int = 3
+    # Breakout watchers running at once when pending_entries is off
+    watcher_capacity: int = 16
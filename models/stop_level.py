@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class StopLevel:
+    time: int
+    atr: float
+    high: float
+    low: float
+    close: float
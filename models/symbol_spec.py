@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class SymbolSpec:
+    tick_value: float
+    tick_size: float
+    volume_step: float
+    volume_decimals: int
+    price_decimals: int
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass
+class TickRecording:
+    enabled: bool
+    path: str
+    interval: float
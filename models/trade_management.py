@@ -1,6 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
+
+from models.position_policy import PositionPolicy
 
 @dataclass
 class TradeManagement:
     trailing_stop: bool
-    partial_close: bool
\ No newline at end of file
+    partial_close: bool
+    # Symbol -> policy, "default" applies to symbols without their own
+    policies: Dict[str, PositionPolicy] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.policies = {name: PositionPolicy(**policy) if isinstance(policy, dict) else policy for name, policy in self.policies.items()}
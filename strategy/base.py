@@ -0,0 +1,38 @@
+from typing import Optional
+
+import pandas as pd
+
+from models.bar import Bar
+from models.individual_strategy import IndividualStrategy
+from models.signal_decision import SignalDecision
+from strategy.features import FeatureFrame
+
+
+class Strategy:
+    """Base of the strategies in strategy/registry.py, one instance per StrategyManager.
+
+    The CandleManager calls warmup once with the candle history, on_bar for every
+    closed candle of the strategy's granularity and on_tick for every tick of
+    tick built symbols, so a strategy can keep its indicators up to date
+    incrementally. evaluate is called on each closed candle with the shared
+    candles and their FeatureFrame and returns the signal, if any.
+    """
+
+    def __init__(self, symbol: str, config: IndividualStrategy, log_message, log_to_error, stop_levels=None):
+        self.symbol = symbol
+        self.config = config
+        self.log_message = log_message
+        self.log_to_error = log_to_error
+        self.stop_levels = stop_levels
+
+    def warmup(self, history: Optional[pd.DataFrame]):
+        pass
+
+    def on_bar(self, bar: Bar):
+        pass
+
+    def on_tick(self, tick):
+        pass
+
+    def evaluate(self, candle_data: pd.DataFrame, features: Optional[FeatureFrame] = None) -> Optional[SignalDecision]:
+        raise NotImplementedError
@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, Dict, Tuple
+
+import pandas as pd
+import talib
+
+
+def sma(candles: pd.DataFrame, window: int, column: str = "Close") -> pd.Series:
+    return candles[column].rolling(window=window).mean()
+
+
+def ma(candles: pd.DataFrame, timeperiod: int, matype: int = 0) -> pd.Series:
+    return talib.MA(candles["Close"], timeperiod=timeperiod, matype=matype)
+
+
+def atr(candles: pd.DataFrame, timeperiod: int) -> pd.Series:
+    return talib.ATR(candles["High"], candles["Low"], candles["Close"], timeperiod=timeperiod)
+
+
+def highest(candles: pd.DataFrame, window: int, column: str = "High") -> pd.Series:
+    return candles[column].rolling(window=window, min_periods=1).max()
+
+
+def lowest(candles: pd.DataFrame, window: int, column: str = "Low") -> pd.Series:
+    return candles[column].rolling(window=window, min_periods=1).min()
+
+
+def cdlhammer(candles: pd.DataFrame) -> pd.Series:
+    return talib.CDLHAMMER(candles["Open"], candles["High"], candles["Low"], candles["Close"])
+
+
+# Indicator name -> function(candles, **params) returning one value per candle
+INDICATORS: Dict[str, Callable[..., pd.Series]] = {
+    "sma": sma,
+    "ma": ma,
+    "atr": atr,
+    "highest": highest,
+    "lowest": lowest,
+    "cdlhammer": cdlhammer,
+}
+
+
+def get_indicator(name: str) -> Callable[..., pd.Series]:
+    if name not in INDICATORS:
+        raise ValueError(f"Unsupported indicator {name}, expected one of {', '.join(INDICATORS)}")
+    return INDICATORS[name]
+
+
+class FeatureFrame:
+    """Indicators of one symbol's candles, shared by every strategy evaluated on them.
+
+    An indicator is computed the first time any strategy asks for it and cached
+    by (name, params), so strategies on the same candles compute the union of
+    their indicators once. Candles and cached series are shared: read only.
+    """
+
+    def __init__(self, candles: pd.DataFrame):
+        self.candles = candles
+        self.lock = threading.Lock()
+        self.cache: Dict[Tuple[str, tuple], pd.Series] = {}
+
+    def get(self, name: str, **params) -> pd.Series:
+        key = (name, tuple(sorted(params.items())))
+        with self.lock:
+            if key not in self.cache:
+                self.cache[key] = get_indicator(name)(self.candles, **params)
+            return self.cache[key]
+
+    def last(self, name: str, **params) -> float:
+        return self.get(name, **params).iloc[-1]
@@ -1,10 +1,11 @@
 import pandas as pd
 from datetime import datetime
 from typing import Optional
-import talib
 from bot.risk_management import calculate_lot_size
 from models.individual_strategy import IndividualStrategy
 from models.signal_decision import SignalDecision
+from strategy.base import Strategy
+from strategy.features import FeatureFrame
 
 # Function to articulate run_strategy
 def run_strategy(
@@ -13,9 +14,12 @@ def run_strategy(
     strategy: IndividualStrategy,
     log_message: callable,
     log_to_error: callable,
+    features: Optional[FeatureFrame] = None,
 ) -> Optional[SignalDecision]:
     try:
         log_message(f"run_strategy: running strategy analysis", symbol)
+        if features is None:
+            features = FeatureFrame(candle_data)
 
         # Initialize variables
         signal = 0
@@ -26,8 +30,8 @@ def run_strategy(
 
 
         # Calculate short and long SMAs based on the trade settings
-        short_sma = candle_data['Close'].rolling(window=10).mean()
-        long_sma = candle_data['Close'].rolling(window=40).mean()
+        short_sma = features.get("sma", window=10)
+        long_sma = features.get("sma", window=40)
 
         # 先决定趋势方向，如果1H的短期均线大于长期均线，说明是上涨趋势，如果1H的短期均线小于长期均线，说明是下跌趋势
         trend = 0
@@ -39,8 +43,8 @@ def run_strategy(
             trend = 0  # No clear trend
 
         # 计算价格区间，取过去24*4根K线的最高价和最低价
-        max_price = candle_data['High'].iloc[-24*4:].max()
-        min_price = candle_data['Low'].iloc[-24*4:].min()
+        max_price = features.last("highest", window=24*4)
+        min_price = features.last("lowest", window=24*4)
 
         # 计算target_price，如果是上涨趋势，target_price是最高价，如果是下跌趋势，target_price是最低价
         target_price = 0
@@ -53,20 +57,21 @@ def run_strategy(
             sl_price = max_price
         
         #取到160ma的值
-        priceMA = talib.MA(candle_data['Close'], timeperiod=160, matype=0).iloc[-1]
-        atr14 = talib.ATR(candle_data['High'], candle_data['Low'], candle_data['Close'], timeperiod=14).iloc[-1]
+        priceMA = features.last("ma", timeperiod=160, matype=0)
+        atr14 = features.last("atr", timeperiod=14)
+        is_hammer = features.last("cdlhammer") != 0
 
         if bias == -3:
             #如果当前价格在和160 ma的差距绝对值值小于atr的1/2，并且当前的candle不是一个大阳线 那么signal = -1
             if (abs(candle_data['Close'].iloc[-1] - priceMA) < atr14/2 
-                and talib.CDLHAMMER(candle_data['Open'], candle_data['High'], candle_data['Low'], candle_data['Close']) == 0):
+                and not is_hammer):
                 # 如果盈亏比大于2，那么signal = -1
                 if (target_price - candle_data['Close'].iloc[-2]) / (candle_data['Close'].iloc[-2] - sl_price) > 2:
                     signal = -1
             #如果当前价格在和160 ma的差距绝对值值小于atr的1/2，并且当前的candle不是一个大阴线 那么signal = 1
         if bias == 3:
             if (abs(candle_data['Close'].iloc[-1] - priceMA) < atr14/2 
-                and talib.CDLHAMMER(candle_data['Open'], candle_data['High'], candle_data['Low'], candle_data['Close']) == 0):
+                and not is_hammer):
                  if (target_price - candle_data['Close'].iloc[-2]) / (candle_data['Close'].iloc[-2] - sl_price) > 2:
                     signal = 1
             
@@ -104,4 +109,18 @@ def run_strategy(
     except Exception as error:
         log_to_error(f"run_strategy: Failed running strategy for {symbol}")
         log_to_error(error)
-        raise error
\ No newline at end of file
+        raise error
+
+
+class PullbackStrategy(Strategy):
+    """Enters on pullbacks to the 160 MA inside the 96 candle range."""
+
+    def evaluate(self, candle_data: pd.DataFrame, features: Optional[FeatureFrame] = None) -> Optional[SignalDecision]:
+        return run_strategy(
+            candle_data=candle_data,
+            symbol=self.symbol,
+            strategy=self.config,
+            log_message=self.log_message,
+            log_to_error=self.log_to_error,
+            features=features,
+        )
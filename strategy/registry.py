@@ -0,0 +1,22 @@
+from typing import Dict, Type
+
+from strategy.base import Strategy
+from strategy.pullback_strategy import PullbackStrategy
+from strategy.strategy import CopySignalStrategy
+
+# strategy_name in configuration.json, or "strategy" of a symbol's strategy, -> Strategy class
+STRATEGIES: Dict[str, Type[Strategy]] = {
+    "Template": CopySignalStrategy,
+    "copy_signal": CopySignalStrategy,
+    "pullback": PullbackStrategy,
+}
+
+
+def register_strategy(name: str, strategy: Type[Strategy]):
+    STRATEGIES[name] = strategy
+
+
+def get_strategy(name: str) -> Type[Strategy]:
+    if name not in STRATEGIES:
+        raise ValueError(f"Unsupported strategy {name}, expected one of {', '.join(STRATEGIES)}")
+    return STRATEGIES[name]
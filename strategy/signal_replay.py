@@ -0,0 +1,289 @@
+import datetime as dt
+import itertools
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from constants.granularities import get_granularity
+from models.copy_signal_thresholds import CopySignalThresholds
+
+# Why a signal was not taken
+ACCEPTED = 0
+NOT_MARKET = 1
+NO_HISTORY = 2
+TOO_FAR = 3
+TOO_OLD = 4
+
+REASONS = {ACCEPTED: "accepted", NOT_MARKET: "not_market", NO_HISTORY: "no_history", TOO_FAR: "too_far", TOO_OLD: "too_old"}
+
+# What happened to an accepted signal within max_bars candles
+NO_TRADE = 0
+WIN = 1
+LOSS = 2
+OPEN = 3
+
+OUTCOMES = {NO_TRADE: "no_trade", WIN: "win", LOSS: "loss", OPEN: "open"}
+
+SIGNAL_QUERY = """
+    SELECT id, symbol, order_type, price, created_at, channel_name FROM t_signals
+    WHERE created_at >= %s AND created_at < %s {symbols}
+    ORDER BY symbol, created_at
+"""
+
+# Cells of the (signals x candles) matrices compared at once when looking for the exit
+CHUNK_CELLS = 2_000_000
+
+
+def wilder_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """ATR like talib.ATR: nan for the first period candles, then Wilder smoothing of the true range."""
+    atr = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return atr
+    previous = close[:-1]
+    true_range = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+
+    value = true_range[:period].mean()
+    atr[period] = value
+    # The recursion is sequential, it runs once per symbol and candle, not per signal
+    for index in range(period, len(true_range)):
+        value = (value * (period - 1) + true_range[index]) / period
+        atr[index + 1] = value
+    return atr
+
+
+def window_extreme(values: np.ndarray, indices: np.ndarray, window: int, highest: bool) -> np.ndarray:
+    """Highest or lowest of the window candles up to each index, fewer at the start of the series."""
+    padding = np.full(window - 1, -np.inf if highest else np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([padding, values]), window)[indices]
+    return windows.max(axis=1) if highest else windows.min(axis=1)
+
+
+def replay_symbol(bars: np.ndarray, signals: Dict[str, np.ndarray], seconds: int, profit_ratio: float,
+                  thresholds: CopySignalThresholds = CopySignalThresholds(), max_bars: int = 1440,
+                  utc_offset: int = 0) -> Dict[str, np.ndarray]:
+    """Decides and plays out every signal of one symbol on its candles.
+
+    bars is an MT5 rates array (time is the candle's open time, in server time,
+    utc_offset seconds ahead of UTC) and signals holds the order_type, price (nan
+    when missing) and created_at (UTC epoch seconds) arrays of the symbol's
+    t_signals rows. Each signal is evaluated on the first candle
+    closing after it, like run_strategy, and entered at that candle's close. The
+    exit is the first later candle reaching the stop loss or the take profit, the
+    stop loss when a candle reaches both.
+    """
+    count = len(signals["created_at"])
+    side = np.where(signals["order_type"] == "BUY_MARKET", 1, np.where(signals["order_type"] == "SELL_MARKET", -1, 0)).astype(np.int8)
+    reason = np.where(side == 0, NOT_MARKET, ACCEPTED).astype(np.int8)
+    entry, stop_loss, take_profit, r = (np.full(count, np.nan) for _ in range(4))
+    outcome = np.zeros(count, dtype=np.int8)
+    bars_held = np.zeros(count, dtype=np.int32)
+
+    if len(bars) == 0:
+        reason[reason == ACCEPTED] = NO_HISTORY
+        return result_columns(signals, side, reason, entry, stop_loss, take_profit, outcome, r, bars_held)
+
+    high, low, close = bars["high"].astype(float), bars["low"].astype(float), bars["close"].astype(float)
+    # Candle close times in UTC, like created_at
+    closes_at = bars["time"].astype(np.int64) - utc_offset + seconds
+    index = np.searchsorted(closes_at, signals["created_at"], side="left")
+    atr = wilder_atr(high, low, close, thresholds.atr_period)
+
+    in_history = index < len(bars)
+    safe_index = np.where(in_history, index, 0)
+    unit = thresholds.atr_multiple * atr[safe_index]
+    reason[(reason == ACCEPTED) & (~in_history | np.isnan(unit))] = NO_HISTORY
+
+    price = np.where(np.isnan(signals["price"]), close[safe_index], signals["price"])
+    distance = np.abs(price - close[safe_index])
+    reason[(reason == ACCEPTED) & ~(distance < unit * thresholds.max_distance)] = TOO_FAR
+    reason[(reason == ACCEPTED) & ~(closes_at[safe_index] - signals["created_at"] < thresholds.max_age)] = TOO_OLD
+
+    accepted = np.flatnonzero(reason == ACCEPTED)
+    if len(accepted) == 0:
+        return result_columns(signals, side, reason, entry, stop_loss, take_profit, outcome, r, bars_held)
+
+    at = index[accepted]
+    direction = side[accepted].astype(float)
+    entry[accepted] = close[at]
+    level = np.where(direction > 0,
+                     window_extreme(low, at, thresholds.level_window, highest=False),
+                     window_extreme(high, at, thresholds.level_window, highest=True))
+    stop_loss[accepted] = level - direction * unit[accepted]
+    take_profit[accepted] = entry[accepted] + (entry[accepted] - stop_loss[accepted]) * profit_ratio
+
+    # Most positions exit within a few candles: scan the candles after the entry in
+    # blocks of doubling width, only for the positions still open after the last block
+    sides = side.astype(float)
+    open_rows = accepted
+    offset, width = 0, 32
+    while len(open_rows) and offset < max_bars:
+        width = min(width, max_bars - offset)
+        still_open = []
+        chunk = max(1, CHUNK_CELLS // width)
+        for start in range(0, len(open_rows), chunk):
+            rows = open_rows[start:start + chunk]
+            sign = sides[rows, None]
+            positions = index[rows, None] + 1 + offset + np.arange(width)
+            valid = positions < len(bars)
+            positions = np.minimum(positions, len(bars) - 1)
+
+            # Worst and best price of each candle for the position, in its direction
+            adverse = np.where(sign > 0, low[positions], high[positions])
+            favourable = np.where(sign > 0, high[positions], low[positions])
+            stopped = valid & (sign * (adverse - stop_loss[rows, None]) <= 0)
+            target = valid & (sign * (favourable - take_profit[rows, None]) >= 0)
+            exited = stopped | target
+
+            has_exit = exited.any(axis=1)
+            first = np.argmax(exited, axis=1)
+            lost = stopped[np.arange(len(rows)), first]
+            done = rows[has_exit]
+            outcome[done] = np.where(lost[has_exit], LOSS, WIN)
+            r[done] = np.where(lost[has_exit], -1.0, profit_ratio)
+            bars_held[done] = offset + first[has_exit] + 1
+            # Positions reaching the end of the history stay open
+            ended = ~has_exit & ~valid[:, -1]
+            outcome[rows[ended]] = OPEN
+            bars_held[rows[ended]] = offset + valid[ended].sum(axis=1)
+            still_open.append(rows[~has_exit & valid[:, -1]])
+        open_rows = np.concatenate(still_open)
+        offset += width
+        width *= 2
+    outcome[open_rows] = OPEN
+    bars_held[open_rows] = offset
+
+    held = np.flatnonzero(outcome == OPEN)
+    last = index[held] + bars_held[held]
+    r[held] = sides[held] * (close[last] - entry[held]) / (sides[held] * (entry[held] - stop_loss[held]))
+
+    return result_columns(signals, side, reason, entry, stop_loss, take_profit, outcome, r, bars_held)
+
+
+def result_columns(signals, side, reason, entry, stop_loss, take_profit, outcome, r, bars_held) -> Dict[str, np.ndarray]:
+    return {
+        "id": signals["id"],
+        "symbol": signals["symbol"],
+        "channel": signals["channel"],
+        "side": side,
+        "reason": reason,
+        "entry": entry,
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "outcome": outcome,
+        "r": r,
+        "bars_held": bars_held,
+    }
+
+
+def signal_columns(rows: List[dict]) -> Dict[str, np.ndarray]:
+    return {
+        "id": np.array([row["id"] for row in rows], dtype=np.int64),
+        "symbol": np.array([row["symbol"] for row in rows], dtype=object),
+        "channel": np.array([row["channel_name"] or "" for row in rows], dtype=object),
+        "order_type": np.array([row["order_type"] for row in rows], dtype=object),
+        "price": np.array([np.nan if row["price"] is None else float(row["price"]) for row in rows], dtype=float),
+        "created_at": np.array([row["created_at"].replace(tzinfo=dt.timezone.utc).timestamp() for row in rows], dtype=float),
+    }
+
+
+def replay(rows: Iterable[dict], bars_path: str, granularity: str, profit_ratio: float,
+           thresholds: CopySignalThresholds = CopySignalThresholds(), max_bars: int = 1440,
+           utc_offset: int = 0) -> Dict[str, np.ndarray]:
+    """Replays t_signals rows ordered by symbol, holding one symbol's signals and candles at a time.
+
+    utc_offset is how many seconds the trade server's time, used by the exported
+    candles, is ahead of UTC.
+    """
+    seconds = get_granularity(granularity).seconds
+    parts = []
+    for symbol, group in itertools.groupby(rows, key=lambda row: row["symbol"]):
+        signals = signal_columns(list(group))
+        bars = load_bars(bars_path, symbol)
+        if bars is None:
+            # Every signal of the symbol ends up NO_HISTORY
+            bars = np.zeros(0, dtype=[("time", "i8"), ("high", "f8"), ("low", "f8"), ("close", "f8")])
+        parts.append(replay_symbol(bars, signals, seconds, profit_ratio, thresholds, max_bars, utc_offset))
+
+    if not parts:
+        return result_columns(signal_columns([]), *(np.array([]) for _ in range(8)))
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+def summarize_replay(results: Dict[str, np.ndarray], by: str = "channel") -> Dict[str, dict]:
+    """Signals, acceptance, win rate and average R per channel (or symbol)."""
+    keys, group = np.unique(results[by].astype(str), return_inverse=True)
+    accepted = results["reason"] == ACCEPTED
+    closed = np.isin(results["outcome"], (WIN, LOSS))
+    won = results["outcome"] == WIN
+
+    count = np.bincount(group, minlength=len(keys))
+    taken = np.bincount(group, weights=accepted, minlength=len(keys))
+    closed_count = np.bincount(group, weights=closed, minlength=len(keys))
+    wins = np.bincount(group, weights=won, minlength=len(keys))
+    r_sum = np.bincount(group, weights=np.where(accepted, np.nan_to_num(results["r"]), 0), minlength=len(keys))
+    rejected = {name: np.bincount(group, weights=results["reason"] == value, minlength=len(keys))
+                for value, name in REASONS.items() if value != ACCEPTED}
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            key: {
+                "signals": int(count[i]),
+                "accepted": int(taken[i]),
+                "win_rate": float(wins[i] / closed_count[i]),
+                "average_r": float(r_sum[i] / taken[i]),
+                "rejected": {name: int(values[i]) for name, values in rejected.items() if values[i]},
+            }
+            for i, key in enumerate(keys)
+        }
+
+
+def load_bars(path: str, symbol: str) -> Optional[np.ndarray]:
+    """MT5 rates of a symbol saved by export_bars, None when there are none."""
+    file = os.path.join(path, f"{symbol}.npy")
+    if not os.path.exists(file):
+        return None
+    return np.load(file)
+
+
+def export_bars(mt5, symbols: List[str], granularity: str, date_from: dt.datetime, date_to: dt.datetime, path: str):
+    """Saves the candles of symbols from the terminal (an MT5 instance) as the local history of replay."""
+    if not os.path.exists(path):
+        os.makedirs(path)
+    timeframe = get_granularity(granularity).mt5_timeframe
+    for symbol in symbols:
+        rates = mt5.mt5.copy_rates_range(symbol, timeframe, date_from, date_to)
+        if rates is None or len(rates) == 0:
+            print(f"export_bars: no candles for {symbol}")
+            continue
+        np.save(os.path.join(path, f"{symbol}.npy"), rates)
+
+
+def stream_signals(db, date_from: dt.datetime, date_to: dt.datetime, symbols: Optional[List[str]] = None, itersize: int = 5000):
+    """t_signals rows between two dates, ordered by symbol and streamed with a server-side cursor."""
+    if symbols:
+        return db.stream(SIGNAL_QUERY.format(symbols="AND symbol = ANY(%s)"), (date_from, date_to, symbols), itersize)
+    return db.stream(SIGNAL_QUERY.format(symbols=""), (date_from, date_to), itersize)
+
+
+if __name__ == "__main__":
+    # python -m strategy.signal_replay 2025-01-01 2025-07-01 M5 2 ./data/bars/M5 [XAUUSD,EURUSD] [--utc-offset=3]
+    from db.db import DataDB
+
+    # Hours the trade server's clock is ahead of UTC
+    utc_offset = next((float(arg.split("=", 1)[1]) for arg in sys.argv[1:] if arg.startswith("--utc-offset=")), 0.0)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    date_from, date_to = (dt.datetime.fromisoformat(value) for value in args[0:2])
+    granularity, profit_ratio, bars_path = args[2], float(args[3]), args[4]
+    symbols = args[5].split(",") if len(args) > 5 else None
+
+    db = DataDB()
+    db.connect()
+    try:
+        results = replay(stream_signals(db, date_from, date_to, symbols), bars_path, granularity, profit_ratio,
+                         utc_offset=int(utc_offset * 3600))
+    finally:
+        db.close()
+    for channel, stats in sorted(summarize_replay(results).items()):
+        print(f"{channel}: {stats}")
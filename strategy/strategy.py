@@ -1,13 +1,19 @@
 import pandas as pd
 from datetime import datetime
 from typing import Optional
-import talib
 import pytz
 from bot.risk_management import calculate_lot_size
+from models.copy_signal_thresholds import CopySignalThresholds
 from models.individual_strategy import IndividualStrategy
 from models.signal_decision import SignalDecision
+from strategy.base import Strategy
+from strategy.features import FeatureFrame
 from db.db import DataDB
+from bot.channel_stats import channel_allows
+from db.journal import MARK_HANDLED, now_text, pending_signal_ids, record
 
+# Shared with strategy/signal_replay.py, which evaluates them on the signal history
+THRESHOLDS = CopySignalThresholds()
 
 # Function to articulate run_strategy
 def run_strategy(
@@ -16,6 +22,9 @@ def run_strategy(
     strategy: IndividualStrategy,
     log_message: callable,
     log_to_error: callable,
+    stop_levels=None,
+    features: Optional[FeatureFrame] = None,
+    thresholds: CopySignalThresholds = THRESHOLDS,
 ) -> Optional[SignalDecision]:
     try:
         log_message(f"run_strategy: running copy signal", symbol)
@@ -29,9 +38,18 @@ def run_strategy(
 
         # 如果signal存在，返回SignalDecision对象
         if signal:
-            mark_signal_as_handled(db, signal)
+            mark_signal_as_handled(signal)
             # 如果查询得到signal的price和当前价格差距不大,小于atr的1/2那么操作，如果signal的创建时间差距在15分钟内，那么操作
-            atr15 = 10 * talib.ATR(candle_data['High'], candle_data['Low'], candle_data['Close'], timeperiod=15).iloc[-1]
+            level = stop_levels.level(symbol, strategy.granularity, thresholds.atr_period, thresholds.level_window) if stop_levels is not None else None
+            if level is not None:
+                # Shared with the trade manager, updated once per closed candle
+                atr15 = thresholds.atr_multiple * level.atr
+                lowest, highest = level.low, level.high
+            else:
+                if features is None:
+                    features = FeatureFrame(candle_data)
+                atr15 = thresholds.atr_multiple * features.last("atr", timeperiod=thresholds.atr_period)
+                lowest, highest = features.last("lowest", window=thresholds.level_window), features.last("highest", window=thresholds.level_window)
             #如果sinal的操作是market，那么直接操作
             if signal['order_type'] == 'BUY_MARKET' or signal['order_type'] == 'SELL_MARKET':
                 # 获取当前时间并添加时区信息
@@ -42,7 +60,15 @@ def run_strategy(
                 if signal['price'] is None:
                    signal['price'] = candle_data['Close'].iloc[-1] 
                     
-                if abs(signal['price'] - candle_data['Close'].iloc[-1]) < atr15 * 5 and (now - signal_created_at).seconds < 150 * 60:
+                if not channel_allows(signal['channel_name']):
+                    # The channel's closed trades average below min_average_r
+                    log_message(f"run_strategy: Skipping signal {signal['id']} of channel {signal['channel_name']}", symbol)
+                    signal['order_info'] = "skipped: channel performance"
+                    mark_signal_as_handled(signal)
+                    db.close()
+                    return None
+
+                if abs(signal['price'] - candle_data['Close'].iloc[-1]) < atr15 * thresholds.max_distance and (now - signal_created_at).total_seconds() < thresholds.max_age:
                     #计算sl
 
                     # 如果是买单，sl是过去180根k线的最低价 再减去atr的1/2
@@ -51,16 +77,16 @@ def run_strategy(
                     tp = 0
                     oper_type = 0
                     if signal['order_type'] == 'BUY_MARKET':
-                        sl = candle_data['Low'].iloc[-180:].min() - atr15
+                        sl = lowest - atr15
                         # tp 去180根k线的最高价 
                         tp = candle_data['Close'].iloc[-1] + (candle_data['Close'].iloc[-1] - sl) * strategy.profit_ratio
                         oper_type = 1
                     elif signal['order_type'] == 'SELL_MARKET':
-                        sl = candle_data['High'].iloc[-180:].max() + atr15 
+                        sl = highest + atr15
                         tp = candle_data['Close'].iloc[-1] - (sl - candle_data['Close'].iloc[-1]) * strategy.profit_ratio
                         oper_type = -1
                     else:
-                        mark_signal_as_handled(db, signal)
+                        mark_signal_as_handled(signal)
                         db.close()
                         return None
 
@@ -75,12 +101,13 @@ def run_strategy(
                         take_profit=tp,
                         stop_loss=sl,
                         signal_timestamp=now,
-                        comment=signal['channel_name']
+                        comment=signal['channel_name'],
+                        signal_created_at=signal_created_at,
                     )
 
                     log_message(f"run_strategy: Signal generated for {symbol}: {signal_decision}", symbol)
                     signal['order_info'] = f"order: {signal_decision}"
-                    mark_signal_as_handled(db, signal)
+                    mark_signal_as_handled(signal)
                     db.close()
                     return signal_decision
         db.close()
@@ -91,28 +118,39 @@ def run_strategy(
         log_to_error(error)
         raise error
 
-def mark_signal_as_handled(db, signal):
+def mark_signal_as_handled(signal):
     if signal:
-        # 标识为handled为true, 同时更新order_info
-        update_query = """
-            UPDATE t_signals
-            SET handled = true, handled_time = NOW(), order_info = %s
-            WHERE id = %s
-        """
-        db.execute_update(update_query, (signal['order_info'], signal['id']))
+        # 标识为handled为true, 同时更新order_info; written behind by the journal
+        record(MARK_HANDLED, signal['id'], now_text(), signal['order_info'])
         
         print(f"Signal handled: {signal}")
 
 def get_unhandled_signal(db: DataDB, symbol: str) -> Optional[dict]:
     # 查询当前symbol的handled为false的第一条数据
+    # Signals handled in the journal but not written yet are skipped
     signal_query = """
         SELECT * FROM t_signals
-        WHERE symbol = %s AND handled = false
+        WHERE symbol = %s AND handled = false AND NOT (id = ANY(%s::bigint[]))
         ORDER BY created_at ASC
         LIMIT 1
     """
-    signal = db.query_single(signal_query, (symbol,))
+    signal = db.query_single(signal_query, (symbol, list(pending_signal_ids())))
     if signal:
         return signal
     else:
         return None
+
+
+class CopySignalStrategy(Strategy):
+    """Copies the unhandled signals of t_signals for the symbol."""
+
+    def evaluate(self, candle_data: pd.DataFrame, features: Optional[FeatureFrame] = None) -> Optional[SignalDecision]:
+        return run_strategy(
+            candle_data=candle_data,
+            symbol=self.symbol,
+            strategy=self.config,
+            log_message=self.log_message,
+            log_to_error=self.log_to_error,
+            stop_levels=self.stop_levels,
+            features=features,
+        )
@@ -0,0 +1,108 @@
+import datetime as dt
+import unittest
+from dataclasses import replace
+
+from bot.bar_aggregator import BarAggregator, bar_from_rate, bucket_start
+from constants.granularities import get_granularity
+
+
+def epoch(*args):
+    return int(dt.datetime(*args, tzinfo=dt.timezone.utc).timestamp())
+
+
+def rate(minute_time, open_, high, low, close, tick_volume=10):
+    return {"time": minute_time, "open": open_, "high": high, "low": low, "close": close,
+            "tick_volume": tick_volume, "spread": 2, "real_volume": 0}
+
+
+def tick(time_msc, bid):
+    return {"time": time_msc // 1000, "time_msc": time_msc, "bid": bid}
+
+
+class TestBarAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.start = epoch(2024, 5, 1, 12, 0)
+        # Minutes 12:00-12:04 closed, 12:05 still forming
+        self.rates = [rate(self.start + 60 * minute, 100 + minute, 101 + minute, 99 + minute, 100.5 + minute) for minute in range(6)]
+
+    def test_bucket_start(self):
+        moment = epoch(2024, 5, 8, 13, 47, 12)
+        self.assertEqual(bucket_start(get_granularity("M5"), moment), epoch(2024, 5, 8, 13, 45))
+        self.assertEqual(bucket_start(get_granularity("H4"), moment), epoch(2024, 5, 8, 12))
+        # Weekly bars open on Sunday, monthly bars on the first of the month
+        self.assertEqual(bucket_start(get_granularity("W1"), moment), epoch(2024, 5, 5))
+        self.assertEqual(bucket_start(get_granularity("MN1"), moment), epoch(2024, 5, 1))
+
+    def test_minutes_build_the_coarser_bars(self):
+        aggregator = BarAggregator("XAUUSD", ["M1", "M5"])
+        events = aggregator.on_rates(self.rates)
+
+        self.assertEqual([bar.time for name, bar in events if name == "M1"], [self.start + 60 * minute for minute in range(5)])
+        closed = [bar for name, bar in events if name == "M5"]
+        self.assertEqual(len(closed), 1)
+        self.assertEqual((closed[0].time, closed[0].open, closed[0].high, closed[0].low, closed[0].close, closed[0].tick_volume),
+                         (self.start, 100, 105, 99, 104.5, 50))
+        self.assertEqual(aggregator.latest("M5").time, self.start + 300)
+
+    def test_inputs_already_fed_are_skipped(self):
+        aggregator = BarAggregator("XAUUSD", ["M5"])
+        aggregator.on_rates(self.rates)
+
+        # The next poll repeats the forming minute, now closed and with a higher high
+        self.rates[5] = rate(self.start + 300, 105, 110, 104, 109)
+        self.assertEqual(aggregator.on_rates(self.rates[3:] + [rate(self.start + 360, 109, 109.5, 108, 109)]), [])
+
+        bar = aggregator.latest("M5")
+        self.assertEqual((bar.time, bar.open, bar.high, bar.close, bar.tick_volume), (self.start + 300, 105, 110, 109, 20))
+        self.assertEqual(len(aggregator.bars("M5", 10)), 2)
+
+    def test_the_forming_minute_is_replaced_not_added(self):
+        aggregator = BarAggregator("XAUUSD", ["M5"])
+        aggregator.on_rates(self.rates[:3])
+        aggregator.on_rates(self.rates[2:3])
+        self.assertEqual(aggregator.latest("M5").tick_volume, 30)
+
+    def test_ticks_build_sub_minute_bars(self):
+        aggregator = BarAggregator("XAUUSD", ["S20", "M1"])
+        self.assertTrue(aggregator.uses_ticks)
+
+        start_msc = self.start * 1000
+        events = aggregator.on_ticks([
+            tick(start_msc + 1_000, 2000.0),
+            tick(start_msc + 5_000, 2001.5),
+            tick(start_msc + 5_000, 2100.0),  # Same time_msc, already seen
+            tick(start_msc + 9_000, 0.0),  # No bid
+            tick(start_msc + 12_000, 1999.0),
+            tick(start_msc + 21_000, 2000.5),
+        ])
+
+        self.assertEqual(len(events), 1)
+        name, bar = events[0]
+        self.assertEqual((name, bar.time, bar.open, bar.high, bar.low, bar.close, bar.tick_volume),
+                         ("S20", self.start, 2000.0, 2001.5, 1999.0, 1999.0, 3))
+        self.assertEqual(aggregator.latest("M1").tick_volume, 4)
+
+    def test_the_seeded_minute_counts_once(self):
+        aggregator = BarAggregator("XAUUSD", ["M1", "M5"])
+        bars = [bar_from_rate(rate) for rate in self.rates]
+        # The terminal's forming M5 bar at 12:05 holds the first ticks of 12:05 only
+        current = bars[-1]
+        for series in aggregator.series.values():
+            series.seed(bars if series.granularity.name == "M1" else [bars[0], replace(current)], current.time, current)
+
+        start_msc = current.time * 1000
+        aggregator.on_ticks([tick(start_msc + 1_000, 105.0), tick(start_msc + 30_000, 107.0)])
+        self.assertEqual(aggregator.latest("M1").tick_volume, 2)
+        self.assertEqual(aggregator.latest("M5").tick_volume, 2)
+        self.assertEqual(aggregator.latest("M5").high, 107.0)
+
+        # A polled minute replaces the seeded one instead of adding to it
+        aggregator = BarAggregator("XAUUSD", ["M5"])
+        aggregator.series["M5"].seed([bars[0], replace(current)], current.time, current)
+        aggregator.on_rates([rate(current.time, 105, 107, 104, 106, tick_volume=25)])
+        self.assertEqual(aggregator.latest("M5").tick_volume, 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,15 @@ import unittest
 from unittest.mock import MagicMock, patch
 import json
 import datetime as dt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from types import SimpleNamespace
 from bot.bot import Bot  # assuming Bot is in the 'bot' module
+from bot.signal_index import SignalIndex
+from models.bot_config import BotConfig
+from models.risk_management import RiskManagement
+from models.signal_decision import SignalDecision
 
 class TestBot(unittest.TestCase):
 
@@ -72,5 +80,133 @@ class TestBot(unittest.TestCase):
     #     triggered = self.bot.candle_manager.update_timings()
     #     self.assertIsNotNone(triggered)
 
+class FakeStrategyManager:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.strategy = SimpleNamespace(granularity="M1")
+
+
+class FakeGate:
+    def __init__(self):
+        self.batches = []
+
+    def evaluate(self, signal_containers):
+        self.batches.append([signal_decision.symbol for signal_decision, _ in signal_containers])
+        return signal_containers
+
+
+def evaluate(symbol, seconds):
+    time.sleep(seconds)
+    return SignalDecision(symbol=symbol, signal=1, order_type="BUY_MARKET", current_price=2000.0, volume=0.1, risk=0.01,
+                          take_profit=2020.0, stop_loss=1990.0, signal_timestamp=dt.datetime.now(dt.timezone.utc))
+
+
+class TestCollectSignals(unittest.TestCase):
+
+    def setUp(self):
+        # Only what collect_signals uses, without a terminal
+        self.bot = Bot.__new__(Bot)
+        self.bot.evaluation = SimpleNamespace(workers=2, timeout=5)
+        self.bot.evaluating = set()
+        self.bot.evaluation_started = {}
+        self.bot.signal_index = SignalIndex(ttl=60, max_age=0.2)
+        self.bot.risk_model = MagicMock()
+        self.bot.pre_trade_gate = FakeGate()
+        self.bot.current_signals = Queue()
+        self.bot.log_to_main = lambda msg: None
+        self.bot.log_to_error = lambda msg: None
+
+    def test_a_slow_evaluation_does_not_hold_back_the_fast_ones(self):
+        managers = {symbol: FakeStrategyManager(symbol) for symbol in ("EURUSD", "XAUUSD")}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            evaluations = {
+                executor.submit(evaluate, "EURUSD", 0): managers["EURUSD"],
+                # Takes longer than max_signal_age
+                executor.submit(evaluate, "XAUUSD", 0.4): managers["XAUUSD"],
+            }
+            self.bot.collect_signals(evaluations)
+
+        # Each signal is gated on its own, as soon as it is produced
+        self.assertEqual(self.bot.pre_trade_gate.batches, [["EURUSD"], ["XAUUSD"]])
+        self.assertEqual([self.bot.current_signals.get()[0].symbol for _ in range(2)], ["EURUSD", "XAUUSD"])
+        self.bot.risk_model.release.assert_not_called()
+
+
+class FakeCandleManager:
+    def __init__(self, symbols):
+        self.symbols = set(symbols)
+
+    def add_symbol(self, symbol, strategy_managers):
+        self.symbols.add(symbol)
+
+    def remove_symbol(self, symbol):
+        self.symbols.discard(symbol)
+
+
+def settings(tradable_symbols, max_concurrent_trades=3):
+    return {
+        "strategy_name": "Template", "sleep_time": 10, "start_time": "0:01", "end_time": "23:59", "active_status": True,
+        "risk_management": {"max_trade_percentage": 0.01, "max_stop_loss_percentage": 0.01, "take_profit_ratio": 2,
+                            "max_concurrent_trades": max_concurrent_trades, "max_daily_loss_percentage": 0.02},
+        "trade_management": {},
+        "tradable_symbols": tradable_symbols,
+    }
+
+
+class TestApplySettings(unittest.TestCase):
+
+    def setUp(self):
+        data = settings({"EURUSD": [{"granularity": "M5"}], "XAUUSD": [{"granularity": "M1"}]})
+        self.bot = Bot.__new__(Bot)
+        self.bot.settings_data = data
+        self.bot.tradable_symbols = data["tradable_symbols"]
+        self.bot.trading_symbols = {symbol: [MagicMock()] for symbol in data["tradable_symbols"]}
+        self.bot.bot_config = MagicMock(spec=BotConfig, strategy_name="Template")
+        self.bot.sharding = SimpleNamespace(enabled=False)
+        self.bot.risk_management = RiskManagement(**data["risk_management"])
+        self.bot.strategy_configuration = SimpleNamespace(risk_management=self.bot.risk_management, trading_symbols=self.bot.trading_symbols)
+        for component in ("risk_model", "trade_manager", "pre_trade_gate", "stop_levels", "mt5"):
+            setattr(self.bot, component, MagicMock())
+        self.bot.candle_manager = FakeCandleManager(data["tradable_symbols"])
+        self.bot.logs = {}
+        self.bot.betterstack_token = None
+        self.bot.log_message = lambda msg, key: None
+        self.bot.log_to_main = lambda msg: None
+        self.bot.log_to_error = lambda msg: None
+
+        patcher = patch("bot.bot.build_strategy_managers", side_effect=lambda symbol, *args: [MagicMock(symbol=symbol)])
+        self.build_strategy_managers = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("bot.bot.LogWrapper")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_adds_and_removes_symbols(self):
+        self.bot.apply_settings(settings({"EURUSD": [{"granularity": "M5"}], "GBPUSD": [{"granularity": "M15"}]}))
+
+        self.assertEqual(self.bot.candle_manager.symbols, {"EURUSD", "GBPUSD"})
+        self.assertEqual(set(self.bot.trading_symbols), {"EURUSD", "GBPUSD"})
+        self.assertIs(self.bot.candle_manager.trading_symbols, self.bot.trading_symbols)
+        self.bot.stop_levels.remove_symbol.assert_called_once_with("XAUUSD")
+        # The unchanged symbol keeps its strategy managers and their state
+        self.assertEqual([call.args[0] for call in self.build_strategy_managers.call_args_list], ["GBPUSD"])
+        self.assertEqual(self.bot.trading_times, {300, 900})
+
+    def test_changes_risk_settings_in_place(self):
+        self.bot.apply_settings(settings(self.bot.tradable_symbols, max_concurrent_trades=5))
+
+        for holder in (self.bot, self.bot.risk_model, self.bot.trade_manager, self.bot.pre_trade_gate, self.bot.strategy_configuration):
+            self.assertEqual(holder.risk_management.max_concurrent_trades, 5)
+        self.bot.trade_manager.compile_policies.assert_called_once()
+        self.build_strategy_managers.assert_not_called()
+
+    def test_an_invalid_granularity_changes_nothing(self):
+        data = settings({"EURUSD": [{"granularity": "M7"}]}, max_concurrent_trades=5)
+        with self.assertRaises(ValueError):
+            self.bot.apply_settings(data)
+        self.assertEqual(self.bot.risk_management.max_concurrent_trades, 3)
+        self.assertEqual(self.bot.candle_manager.symbols, {"EURUSD", "XAUUSD"})
+
+
 if __name__ == '__main__':
     unittest.main()
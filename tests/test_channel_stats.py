@@ -0,0 +1,133 @@
+import datetime as dt
+import math
+import unittest
+from collections import namedtuple
+
+from bot.channel_stats import DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_TYPE_BUY, DEAL_TYPE_SELL, ChannelStats
+from models.signal_decision import SignalDecision
+
+Deal = namedtuple("Deal", "ticket order time time_msc type entry magic position_id volume price commission swap profit fee comment")
+Order = namedtuple("Order", "ticket sl")
+
+NOW = 1_700_000_000.0
+MAGIC = 234000
+
+
+class Terminal:
+    def __init__(self):
+        self.deals = []
+        self.orders = []
+        self.queries = []
+
+    def history_deals_get(self, date_from, date_to):
+        self.queries.append((date_from.timestamp(), date_to.timestamp()))
+        return tuple(deal for deal in self.deals if date_from.timestamp() <= deal.time <= date_to.timestamp())
+
+    def history_orders_get(self, date_from, date_to):
+        return tuple(self.orders)
+
+
+class FakeMT5:
+    MAGIC = MAGIC
+
+    def __init__(self):
+        self.mt5 = Terminal()
+
+
+def make_deal(ticket, position_id, entry, deal_type, price, volume=1.0, profit=0.0, time=NOW, comment="alpha", magic=MAGIC):
+    return Deal(ticket, position_id, int(time), int(time * 1000), deal_type, entry, magic, position_id, volume, price, 0.0, 0.0, profit, 0.0, comment)
+
+
+def make_signal(signal=1, stop_loss=90.0, current_price=100.0):
+    return SignalDecision(
+        symbol="XAUUSD",
+        signal=signal,
+        order_type="BUY_MARKET",
+        current_price=current_price,
+        volume=1.0,
+        risk=0.01,
+        take_profit=120.0,
+        stop_loss=stop_loss,
+        signal_timestamp=dt.datetime.fromtimestamp(NOW - 5, tz=dt.timezone.utc),
+        comment="alpha",
+        signal_created_at=dt.datetime.fromtimestamp(NOW - 30, tz=dt.timezone.utc),
+    )
+
+
+class TestChannelStats(unittest.TestCase):
+
+    def setUp(self):
+        self.mt5 = FakeMT5()
+        self.now = NOW
+        self.stats = ChannelStats(self.mt5, lookback_days=1, min_trades=2, min_average_r=-0.2, clock=lambda: self.now)
+
+    def test_fill_and_partial_closes(self):
+        self.stats.register(make_signal(), 11)
+        self.mt5.mt5.deals.append(make_deal(1, 11, DEAL_ENTRY_IN, DEAL_TYPE_BUY, 101.0))
+        self.assertEqual(self.stats.poll(), 1)
+
+        stat = self.stats.lookup("alpha")
+        self.assertEqual(stat.fills, 1)
+        self.assertAlmostEqual(stat.average_slippage, 0.1)
+        self.assertAlmostEqual(stat.average_latency, 30.0)
+        self.assertEqual(stat.trades, 0)
+
+        # Half at 111 then half at 121: exit at 116, 15 from the entry with a risk of 11
+        self.now += 60
+        self.mt5.mt5.deals.append(make_deal(2, 11, DEAL_ENTRY_OUT, DEAL_TYPE_SELL, 111.0, volume=0.5, profit=5.0, time=self.now))
+        self.stats.poll()
+        self.assertEqual(self.stats.lookup("alpha").trades, 0)
+        self.mt5.mt5.deals.append(make_deal(3, 11, DEAL_ENTRY_OUT, DEAL_TYPE_SELL, 121.0, volume=0.5, profit=10.0, time=self.now + 1))
+        self.stats.poll()
+
+        stat = self.stats.lookup("alpha")
+        self.assertEqual((stat.trades, stat.wins), (1, 1))
+        self.assertAlmostEqual(stat.average_r, 15 / 11)
+        self.assertEqual(self.stats.trades, {})
+
+    def test_polls_only_read_new_deals(self):
+        self.mt5.mt5.deals.append(make_deal(1, 11, DEAL_ENTRY_IN, DEAL_TYPE_BUY, 100.0))
+        self.assertEqual(self.stats.poll(), 1)
+        # Deals inside the overlap are read again but applied once
+        self.assertEqual(self.stats.poll(), 0)
+        self.assertGreaterEqual(self.mt5.mt5.queries[-1][0], NOW - ChannelStats.OVERLAP)
+        self.assertEqual(self.stats.lookup("alpha").fills, 1)
+
+    def test_unregistered_positions_and_skipping(self):
+        self.mt5.mt5.orders = [Order(21, 110.0), Order(22, 110.0)]
+        self.mt5.mt5.deals += [
+            make_deal(1, 21, DEAL_ENTRY_IN, DEAL_TYPE_SELL, 100.0),
+            make_deal(2, 21, DEAL_ENTRY_OUT, DEAL_TYPE_BUY, 110.0, profit=-10.0, time=NOW + 1),
+            make_deal(3, 22, DEAL_ENTRY_IN, DEAL_TYPE_SELL, 100.0, time=NOW + 2),
+            make_deal(4, 22, DEAL_ENTRY_OUT, DEAL_TYPE_BUY, 105.0, profit=-5.0, time=NOW + 3),
+            # Someone else's position
+            make_deal(5, 23, DEAL_ENTRY_IN, DEAL_TYPE_SELL, 100.0, comment="beta", magic=1),
+        ]
+        self.stats.poll()
+
+        stat = self.stats.lookup("alpha")
+        self.assertEqual((stat.trades, stat.wins), (2, 0))
+        self.assertAlmostEqual(stat.average_r, -0.75)
+        self.assertTrue(math.isnan(stat.average_slippage))
+        self.assertFalse(self.stats.allows("alpha"))
+        self.assertTrue(self.stats.allows("beta"))
+
+    def test_registrations_without_a_fill_are_dropped(self):
+        self.stats.register(make_signal(), 11)
+        self.stats.register(make_signal(), 12)
+        # A late deal is still matched within the overlap
+        self.now += ChannelStats.OVERLAP
+        self.stats.poll()
+        self.assertEqual(set(self.stats.registered), {11, 12})
+        self.mt5.mt5.deals.append(make_deal(1, 12, DEAL_ENTRY_IN, DEAL_TYPE_BUY, 101.0))
+        self.stats.poll()
+        self.assertEqual(set(self.stats.registered), {11})
+
+        self.now += 1
+        self.stats.poll()
+        self.assertEqual(self.stats.registered, {})
+        self.assertAlmostEqual(self.stats.lookup("alpha").average_latency, 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import datetime as dt
+import os
+import tempfile
+import unittest
+
+from bot.bar_aggregator import BarAggregator
+from models.candle_timing import CandleTiming
+from models.pending_entry import PendingEntry
+from models.signal_decision import SignalDecision
+from utils import checkpoint_file
+from utils.checkpoint_file import (
+    DAILY_LOSS_SECTION, ENTRIES_SECTION, QUEUED, SIGNALS_SECTION, TIMINGS_SECTION, WATCHING,
+    decode_daily_loss, decode_entries, decode_signals, decode_state, decode_timings,
+    encode_daily_loss, encode_entries, encode_signals, encode_state, encode_timings, read_checkpoint, write_checkpoint,
+)
+
+
+def make_signal(symbol, **kwargs):
+    return SignalDecision(symbol=symbol, signal=1, order_type="BUY_STOP", current_price=101.5, volume=0.3, risk=0.01,
+                          take_profit=110.0, stop_loss=99.0, signal_timestamp=dt.datetime(2024, 5, 1, 12, 30), **kwargs)
+
+
+class TestCheckpointFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "checkpoint.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        timings = {"NAS100_M5": CandleTiming(last_time=dt.datetime(2024, 5, 1, 12, 25), tries=2, is_ready=True)}
+        signals = [
+            (QUEUED, "NAS100", 0, make_signal("NAS100")),
+            (WATCHING, "SP500", 1, make_signal("SP500", id=42, comment="pullback", priority=3, break_of_structure=True)),
+        ]
+        entries = [PendingEntry(7001, make_signal("XAUUSD", id=43, comment="breakout"), "M5", 2350.5, 1714566300, 1714567500.0)]
+        write_checkpoint(self.path, {
+            DAILY_LOSS_SECTION: encode_daily_loss(125.5, dt.date(2024, 5, 1)),
+            TIMINGS_SECTION: encode_timings(timings),
+            SIGNALS_SECTION: encode_signals(signals),
+            ENTRIES_SECTION: encode_entries(entries),
+        }, written_at=1714566600.0)
+
+        written_at, sections = read_checkpoint(self.path)
+        self.assertEqual(written_at, 1714566600.0)
+        self.assertEqual(decode_daily_loss(sections[DAILY_LOSS_SECTION]), (125.5, dt.date(2024, 5, 1)))
+        self.assertEqual(decode_timings(sections[TIMINGS_SECTION]), timings)
+        self.assertEqual(decode_signals(sections[SIGNALS_SECTION]), signals)
+        self.assertEqual(decode_entries(sections[ENTRIES_SECTION]), entries)
+
+    def test_skips_sections_with_another_version(self):
+        write_checkpoint(self.path, {
+            DAILY_LOSS_SECTION: encode_daily_loss(10.0, dt.date(2024, 5, 1)),
+            SIGNALS_SECTION: encode_signals([(QUEUED, "NAS100", 0, make_signal("NAS100"))]),
+        }, written_at=0.0)
+
+        versions = dict(checkpoint_file.SECTION_VERSIONS)
+        checkpoint_file.SECTION_VERSIONS[SIGNALS_SECTION] = versions[SIGNALS_SECTION] + 1
+        try:
+            _, sections = read_checkpoint(self.path)
+        finally:
+            checkpoint_file.SECTION_VERSIONS.update(versions)
+
+        self.assertIn(DAILY_LOSS_SECTION, sections)
+        self.assertNotIn(SIGNALS_SECTION, sections)
+
+    def test_state_round_trip(self):
+        aggregator = BarAggregator("XAUUSD", ["M1", "M5"], history=50)
+        rates = [{"time": 1714566000 + 60 * minute, "open": 100.0 + minute, "high": 101.0 + minute, "low": 99.0 + minute,
+                  "close": 100.5 + minute, "tick_volume": 10, "spread": 2, "real_volume": 0} for minute in range(8)]
+        aggregator.on_rates(rates)
+        state = {
+            "daily_loss": 12.5,
+            "tiers_done": {7: 1},
+            "pending_signals": [(QUEUED, "NAS100", 0, make_signal("NAS100"))],
+            "aggregators": {"XAUUSD": aggregator},
+            "last_polls": {"XAUUSD": 1714566480.5},
+        }
+        write_checkpoint(self.path, encode_state(state), written_at=0.0)
+        restored = decode_state(read_checkpoint(self.path)[1])
+
+        self.assertEqual({key: value for key, value in restored.items() if key != "aggregators"},
+                         {key: value for key, value in state.items() if key != "aggregators"})
+        restored_aggregator = restored["aggregators"]["XAUUSD"]
+        for name, series in aggregator.series.items():
+            restored_series = restored_aggregator.series[name]
+            self.assertEqual(list(restored_series.closed), list(series.closed))
+            self.assertEqual(restored_series.closed.maxlen, 50)
+            self.assertEqual((restored_series.partial, restored_series.forming, restored_series.fed_until),
+                             (series.partial, series.forming, series.fed_until))
+
+
+if __name__ == "__main__":
+    unittest.main()
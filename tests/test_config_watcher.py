@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.config_watcher import ConfigWatcher
+
+
+class FakeBot:
+    def __init__(self):
+        self.applied = []
+        self.errors = []
+        self.changed = threading.Event()
+
+    def apply_settings(self, data):
+        if "invalid" in data:
+            raise ValueError("invalid setting")
+        self.applied.append(data)
+        self.changed.set()
+
+    def log_to_main(self, msg):
+        pass
+
+    def log_to_error(self, msg):
+        self.errors.append(msg)
+        self.changed.set()
+
+
+class TestConfigWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "configuration.json")
+        self.mtime = time.time()
+        self.write({"risk": 1})
+        self.bot = FakeBot()
+        self.watcher = ConfigWatcher(self.bot, self.path, interval=0.01)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.running = False
+        self.watcher.join(1)
+        self.directory.cleanup()
+
+    def write(self, data, text=None):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(text if text is not None else json.dumps(data))
+        # Later than the previous write even where modification times are kept to the second
+        self.mtime += 10
+        os.utime(temporary, (self.mtime, self.mtime))
+        os.replace(temporary, self.path)
+
+    def wait(self):
+        self.assertTrue(self.bot.changed.wait(2))
+        self.bot.changed.clear()
+
+    def test_applies_a_changed_file_once(self):
+        time.sleep(0.05)
+        self.assertEqual(self.bot.applied, [])
+
+        self.write({"risk": 2})
+        self.wait()
+        time.sleep(0.05)
+        self.assertEqual(self.bot.applied, [{"risk": 2}])
+
+    def test_keeps_running_after_an_invalid_file(self):
+        self.write(None, text="{not json")
+        self.wait()
+        self.write({"invalid": True})
+        self.wait()
+        self.assertEqual(len(self.bot.errors), 2)
+
+        self.write({"risk": 3})
+        self.wait()
+        self.assertEqual(self.bot.applied, [{"risk": 3}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from db.journal import MARK_HANDLED, SET_POSITION_ID, STATEMENTS, DBJournal
+
+
+class FakeDB:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def execute_batch(self, statements):
+        if self.fail:
+            raise ConnectionError("database down")
+        self.batches.append(list(statements))
+
+    def close(self):
+        pass
+
+
+def append_from_worker(path, signal_ids):
+    # Like a shard worker: its own connection to the file, no flush
+    journal = DBJournal(path, log_to_error=lambda msg: None)
+    for signal_id in signal_ids:
+        journal.append(SET_POSITION_ID, signal_id, 1000 + signal_id)
+
+
+class TestDBJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.db")
+        self.db = FakeDB()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, **kwargs):
+        return DBJournal(self.path, log_to_error=lambda msg: None, connect=lambda: self.db, **kwargs)
+
+    def test_warm_up_connects_once(self):
+        connects = []
+        journal = DBJournal(self.path, log_to_error=lambda msg: None, connect=lambda: connects.append(1) or self.db)
+        journal.warm_up()
+        journal.warm_up()
+        journal.append(SET_POSITION_ID, 1, 555)
+        journal.flush()
+        self.assertEqual(len(connects), 1)
+
+    def test_flushes_in_batches_of_batch_size(self):
+        journal = self.open(batch_size=2)
+        journal.append(MARK_HANDLED, 1, "2026-01-01T00:00:00+00:00", None)
+        journal.append(SET_POSITION_ID, 1, 555)
+        journal.append(SET_POSITION_ID, 2, 556)
+
+        self.assertEqual(journal.flush(), 2)
+        self.assertEqual(journal.flush(), 1)
+        self.assertEqual(journal.flush(), 0)
+        self.assertEqual(self.db.batches[0], [
+            (STATEMENTS[MARK_HANDLED], ("2026-01-01T00:00:00+00:00", None, 1)),
+            (STATEMENTS[SET_POSITION_ID], (555, 1)),
+        ])
+        self.assertEqual(journal.pending(), 0)
+
+    def test_failed_flush_keeps_updates_for_the_next_start(self):
+        self.db.fail = True
+        journal = self.open()
+        journal.append(MARK_HANDLED, 7, "2026-01-01T00:00:00+00:00", "order")
+        with self.assertRaises(ConnectionError):
+            journal.flush()
+        self.assertEqual(journal.pending_signal_ids(), {7})
+
+        self.db.fail = False
+        reopened = self.open()
+        self.assertEqual(reopened.flush(), 1)
+        self.assertEqual(reopened.pending_signal_ids(), set())
+
+    def test_flushes_updates_appended_by_another_process(self):
+        journal = self.open(batch_size=500)
+        journal.append(SET_POSITION_ID, 1, 1001)
+
+        worker = multiprocessing.get_context("spawn").Process(target=append_from_worker, args=(self.path, range(2, 202)))
+        worker.start()
+        while worker.is_alive():
+            journal.flush()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        while journal.flush():
+            pass
+
+        written = [params for batch in self.db.batches for _, params in batch]
+        self.assertEqual(sorted(written), [(1000 + signal_id, signal_id) for signal_id in range(1, 202)])
+        self.assertEqual(journal.pending(), 0)
+
+    def test_rejects_unknown_entries(self):
+        with self.assertRaises(ValueError):
+            self.open().append("delete", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import datetime as dt
+import time
+import unittest
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest import mock
+
+from bot import entry_engine
+from bot.entry_engine import EntryEngine
+from bot.risk_model import RiskModel
+from models.risk_management import RiskManagement
+from models.signal_decision import SignalDecision
+
+Result = namedtuple("Result", "retcode order volume price")
+
+
+def rate(bar_time, high, low):
+    return {"time": bar_time, "open": low, "high": high, "low": low, "close": high,
+            "tick_volume": 1, "spread": 0, "real_volume": 0}
+
+
+class Terminal:
+    def __init__(self):
+        self.tick = SimpleNamespace(ask=2000.0, bid=1999.9)
+        self.positions = {}
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(trade_tick_value=1.0, trade_tick_size=0.01, volume_step=0.01)
+
+    def account_info(self):
+        return SimpleNamespace(balance=10_000.0)
+
+    def symbol_info_tick(self, symbol):
+        return self.tick
+
+    def positions_get(self, ticket=None):
+        position = self.positions.get(ticket)
+        return (position,) if position is not None else ()
+
+
+class FakeMT5:
+    def __init__(self):
+        self.mt5 = Terminal()
+        self.rates = []
+        self.orders = {}
+        self.sent = []
+        self.next_ticket = 100
+
+    def query_historic_data(self, symbol, count, granularity=None):
+        return self.rates[-count:]
+
+    def place_order(self, order_type, symbol, volume, price, stop_loss, take_profit, comment, **kwargs):
+        self.next_ticket += 1
+        self.sent.append((order_type, price))
+        if order_type.endswith("_STOP"):
+            self.orders[self.next_ticket] = price
+        return Result(10009, self.next_ticket, volume, price)
+
+    def cancel_order(self, order):
+        self.orders.pop(order, None)
+        return Result(10009, order, 0, 0)
+
+    def modify_order(self, order, price, stop_loss, take_profit):
+        self.orders[order] = price
+        return True
+
+    def get_pending_orders(self):
+        return [SimpleNamespace(ticket=ticket, symbol="XAUUSD") for ticket in self.orders]
+
+
+def make_signal():
+    return SignalDecision(symbol="XAUUSD", signal=1, order_type="BUY_STOP", current_price=2001.0, volume=0.1, risk=0.01,
+                          take_profit=2021.0, stop_loss=1991.0, signal_timestamp=dt.datetime.now(dt.timezone.utc))
+
+
+class TestEntryEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.mt5 = FakeMT5()
+        risk_management = RiskManagement(max_trade_percentage=0.05, max_stop_loss_percentage=0.02, take_profit_ratio=2,
+                                         max_concurrent_trades=3, max_daily_loss_percentage=0.1)
+        self.risk_model = RiskModel(self.mt5, risk_management, lambda msg, key: None, lambda msg: None)
+        self.engine = EntryEngine(self.mt5, self.risk_model, 3, lambda msg, key: None, lambda msg: None)
+        patcher = mock.patch.object(entry_engine, "update_position_id")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The last closed M1 candle, then the one still forming
+        self.minute = int(time.time()) // 60 * 60
+        self.mt5.rates = [rate(self.minute - 60, 2001.0, 1995.0), rate(self.minute, 2000.5, 1999.0)]
+
+    def submit(self):
+        signal_decision = make_signal()
+        self.risk_model.reserve(signal_decision)
+        self.engine.submit(signal_decision, "M1")
+        return signal_decision
+
+    def test_rests_a_stop_at_the_candle_high_and_settles_its_fill(self):
+        self.submit()
+        self.assertEqual(self.mt5.sent, [("BUY_STOP", 2001.0)])
+        order = next(iter(self.mt5.orders))
+
+        del self.mt5.orders[order]
+        self.mt5.mt5.positions[order] = SimpleNamespace(volume=0.1, price_open=2001.2, sl=1991.0)
+        self.engine.update()
+
+        self.assertEqual(self.engine.entries(), [])
+        self.assertIn(order, self.risk_model.positions)
+        self.assertEqual(self.risk_model.reserved()[0], 0)
+
+    def test_removed_and_expired_orders_release_their_reservation(self):
+        self.submit()
+        self.mt5.orders.clear()
+        self.engine.update()
+        self.assertEqual(self.risk_model.reserved()[0], 0)
+
+        self.submit()
+        self.engine.entries()[0].expires_at = time.time() - 1
+        self.engine.update()
+        self.assertEqual(self.engine.entries(), [])
+        self.assertEqual(self.mt5.orders, {})
+        self.assertEqual(self.risk_model.reserved()[0], 0)
+
+    def test_moves_the_stop_to_the_next_closed_candle(self):
+        self.submit()
+        entry = self.engine.entries()[0]
+        entry.bar_time -= 120
+        self.mt5.rates = [rate(self.minute - 60, 2000.8, 1996.0), rate(self.minute, 2000.5, 1999.0)]
+
+        self.engine.update()
+        self.assertEqual(self.mt5.orders[entry.order], 2000.8)
+        self.assertEqual(entry.trigger, 2000.8)
+
+    def test_enters_at_market_when_the_breakout_already_happened(self):
+        self.mt5.mt5.tick = SimpleNamespace(ask=2002.0, bid=2001.9)
+        self.submit()
+
+        self.assertEqual(self.mt5.sent, [("BUY_MARKET", 2002.0)])
+        self.assertEqual(self.engine.entries(), [])
+        self.assertEqual(len(self.risk_model.positions), 1)
+        self.assertEqual(self.risk_model.reserved()[0], 0)
+
+    def test_restore_reserves_again_or_cancels(self):
+        self.submit()
+        entries = self.engine.entries()
+        restored = EntryEngine(self.mt5, RiskModel(self.mt5, self.risk_model.risk_management, lambda msg, key: None, lambda msg: None),
+                               3, lambda msg, key: None, lambda msg: None)
+        restored.restore(entries)
+        self.assertEqual(restored.entries(), entries)
+        self.assertEqual(restored.risk_model.reserved()[0], 1)
+
+        self.risk_model.risk_management.max_concurrent_trades = 0
+        full = EntryEngine(self.mt5, RiskModel(self.mt5, self.risk_model.risk_management, lambda msg, key: None, lambda msg: None),
+                           3, lambda msg, key: None, lambda msg: None)
+        full.restore(entries)
+        self.assertEqual(full.entries(), [])
+        self.assertEqual(self.mt5.orders, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
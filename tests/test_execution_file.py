@@ -0,0 +1,52 @@
+import math
+import tempfile
+import unittest
+
+from api.order_execution import RETCODE_DONE
+from utils.execution_analytics import summarize
+from utils.execution_file import CLOSE, ORDER, ExecutionFileWriter, read_executions
+
+
+class TestExecutionFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip_across_chunks(self):
+        writer = ExecutionFileWriter(self.directory.name, chunk_rows=2)
+        writer.append(ORDER, "XAUUSD", 1, 11, 7, RETCODE_DONE, 0.1, 0.1, 2000.0, 2000.5, 12.0)
+        writer.append(ORDER, "EURUSD", -1, 12, None, RETCODE_DONE, 0.2, 0.2, 1.1, 1.1, 8.0)
+        writer.append(CLOSE, "XAUUSD", -1, 11, None, RETCODE_DONE, 0.1, 0.1, 2001.0, 2001.0, 9.0)
+        writer.close()
+
+        columns, symbols = read_executions(self.directory.name, ["symbol_id", "signal_id", "price_filled"])
+        self.assertEqual(set(columns), {"symbol_id", "signal_id", "price_filled"})
+        self.assertEqual([symbols[i] for i in columns["symbol_id"]], ["XAUUSD", "EURUSD", "XAUUSD"])
+        self.assertEqual(columns["signal_id"].tolist(), [7, -1, -1])
+
+        # A new writer continues the sequence instead of overwriting chunks
+        writer = ExecutionFileWriter(self.directory.name)
+        writer.append(ORDER, "XAUUSD", 1, 13, 8, 10004, 0.1, 0.0, 2000.0, math.nan, 30.0)
+        writer.close()
+        columns, _ = read_executions(self.directory.name, ["ticket"])
+        self.assertEqual(columns["ticket"].tolist(), [11, 12, 11, 13])
+
+    def test_summarize_slippage_and_fill_rate(self):
+        writer = ExecutionFileWriter(self.directory.name)
+        writer.append(ORDER, "XAUUSD", 1, 1, 1, RETCODE_DONE, 0.1, 0.1, 2000.0, 2000.5, 10.0)
+        writer.append(ORDER, "XAUUSD", -1, 2, 2, RETCODE_DONE, 0.1, 0.1, 2000.0, 1999.0, 20.0)
+        writer.append(ORDER, "XAUUSD", 1, 3, 3, 10004, 0.1, 0.0, 2000.0, math.nan, 30.0)
+        writer.append(CLOSE, "XAUUSD", -1, 1, None, RETCODE_DONE, 0.1, 0.1, 2001.0, 2003.0, 5.0)
+        writer.close()
+
+        columns, symbols = read_executions(self.directory.name)
+        stats = summarize(columns, symbols, ORDER, percentiles=(50,))["XAUUSD"]
+        self.assertEqual(stats["count"], 3)
+        self.assertAlmostEqual(stats["fill_rate"], 2 / 3)
+        self.assertAlmostEqual(stats["slippage_mean"], 0.75)
+        self.assertAlmostEqual(stats["latency_ms"][50], 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
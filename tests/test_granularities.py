@@ -0,0 +1,31 @@
+import unittest
+
+from constants.granularities import GRANULARITIES, get_granularity
+from utils.utils import granularity_to_minutes
+
+
+class TestGranularities(unittest.TestCase):
+
+    def test_lookup(self):
+        self.assertEqual(get_granularity("M5").seconds, 300)
+        self.assertEqual(get_granularity("H2").seconds, 7200)
+        self.assertEqual(get_granularity("S20").seconds, 20)
+
+    def test_aliases(self):
+        self.assertIs(get_granularity("D"), GRANULARITIES["D1"])
+        self.assertEqual(granularity_to_minutes("W"), 604800)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            get_granularity("M7")
+
+    def test_parents_divide_evenly(self):
+        for granularity in GRANULARITIES.values():
+            if granularity.parent is None or granularity.name == "MN1":
+                continue
+            parent = GRANULARITIES[granularity.parent]
+            self.assertLess(parent.seconds, granularity.seconds)
+            self.assertEqual(granularity.seconds % parent.seconds, 0, granularity.name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from utils.handoff import Handoff
+
+
+class ExitedProcess:
+    def poll(self):
+        return 1
+
+
+class TestHandoff(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.handoff = Handoff(os.path.join(self.directory.name, "state"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_state_round_trip(self):
+        state = {"daily_loss": 12.5, "tiers_done": {7: 1}, "pending_signals": []}
+        self.handoff.write_state(state)
+        self.assertEqual(self.handoff.load_state(), state)
+        self.assertFalse(os.path.exists(f"{self.handoff.state_path}.tmp"))
+
+    def test_ready_and_released(self):
+        self.assertFalse(self.handoff.wait_ready(None, timeout=0.1))
+        self.handoff.announce_ready()
+        self.assertTrue(self.handoff.wait_ready(None, timeout=0.1))
+
+        self.assertFalse(self.handoff.wait_released(timeout=0.1))
+        self.handoff.release()
+        self.assertTrue(self.handoff.wait_released(timeout=0.1))
+
+    def test_stops_waiting_for_a_process_that_exited(self):
+        self.assertFalse(self.handoff.wait_ready(ExitedProcess(), timeout=5))
+
+    def test_acquire_takes_the_orders_lock(self):
+        self.assertIsNone(self.handoff.owner())
+        self.assertFalse(self.handoff.owns_orders())
+
+        self.handoff.write_state({})
+        self.handoff.announce_ready()
+        self.handoff.release()
+        self.handoff.acquire()
+        self.assertEqual(self.handoff.owner(), os.getpid())
+        self.assertTrue(self.handoff.owns_orders())
+        for path in (self.handoff.state_path, self.handoff.ready_path, self.handoff.released_path):
+            self.assertFalse(os.path.exists(path))
+
+        # The process taking over writes its own pid
+        self.handoff.write_atomic(self.handoff.lock_path, str(os.getpid() + 1).encode())
+        self.assertFalse(self.handoff.owns_orders())
+
+
+if __name__ == "__main__":
+    unittest.main()
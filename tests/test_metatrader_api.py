@@ -0,0 +1,61 @@
+import unittest
+from collections import namedtuple
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from api.metatrader_api import MT5
+
+# Like the terminal's OrderSendResult, a named tuple starting with the retcode
+Result = namedtuple("Result", "retcode order volume price")
+
+
+class Gateway:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, request):
+        self.submitted.append(request)
+        future = Future()
+        future.set_result(Result(10009, 0, 0.0, 0.0))
+        return future
+
+
+class OrdersLock:
+    def __init__(self, owned):
+        self.owned = owned
+
+    def owns_orders(self):
+        return self.owned
+
+    def owner(self):
+        return None if self.owned else 4242
+
+
+class TestModifyPositionAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.mt5 = MT5()
+        self.mt5.mt5 = SimpleNamespace(TRADE_ACTION_SLTP=6)
+        self.gateway = Gateway()
+        self.mt5.attach_gateway(self.gateway)
+
+    def test_sends_through_the_gateway_while_owning_the_orders_lock(self):
+        self.mt5.attach_orders_lock(OrdersLock(owned=True))
+        self.assertTrue(self.mt5.modify_position_async(7, 1990.0).result(timeout=1))
+        self.assertEqual(self.gateway.submitted, [{"action": 6, "position": 7, "sl": 1990.0}])
+
+    def test_refuses_when_another_process_owns_the_orders_lock(self):
+        self.mt5.attach_orders_lock(OrdersLock(owned=False))
+        with self.assertRaises(ConnectionError):
+            self.mt5.modify_position_async(7, 1990.0).result(timeout=1)
+        self.assertEqual(self.gateway.submitted, [])
+
+    def test_refuses_once_order_submission_was_handed_over(self):
+        self.mt5.orders_enabled = False
+        with self.assertRaises(ConnectionError):
+            self.mt5.modify_position_async(7, 1990.0).result(timeout=1)
+        self.assertEqual(self.gateway.submitted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
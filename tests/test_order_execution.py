@@ -0,0 +1,111 @@
+import time
+import unittest
+from types import SimpleNamespace
+
+from api.order_execution import (
+    RETCODE_DONE, RETCODE_INVALID_FILL, RETCODE_PLACED, RETCODE_REQUOTE, RETCODE_TIMEOUT, RETCODE_TOO_MANY_REQUESTS,
+    ExecutionEngine, is_success,
+)
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+
+class Terminal:
+    ORDER_FILLING_FOK = ORDER_FILLING_FOK
+    ORDER_FILLING_IOC = ORDER_FILLING_IOC
+    ORDER_FILLING_RETURN = ORDER_FILLING_RETURN
+
+    def __init__(self):
+        self.ask = 2000.5
+        self.positions = []
+
+    def symbol_info(self, symbol):
+        # Allows FOK and IOC
+        return SimpleNamespace(filling_mode=3)
+
+    def symbol_info_tick(self, symbol):
+        return SimpleNamespace(ask=self.ask, bid=self.ask - 0.3)
+
+
+class FakeMT5:
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+
+    def __init__(self, retcodes):
+        self.mt5 = Terminal()
+        self.retcodes = list(retcodes)
+        self.requests = []
+
+    def order_send(self, request):
+        self.requests.append(dict(request))
+        retcode = self.retcodes.pop(0)
+        if retcode == RETCODE_TIMEOUT:
+            # The server filled the deal but the answer never arrived
+            self.mt5.positions.append(dict(request))
+        # Quotes move between attempts
+        self.mt5.ask += 0.1
+        return None if retcode is None else (retcode, request["price"])
+
+
+def buy_request():
+    return {"symbol": "XAUUSD", "type": FakeMT5.ORDER_TYPE_BUY, "price": 2000.0, "type_filling": ORDER_FILLING_RETURN}
+
+
+class TestExecutionEngine(unittest.TestCase):
+
+    def test_success_retcodes(self):
+        self.assertTrue(is_success((RETCODE_DONE,)))
+        self.assertTrue(is_success((RETCODE_PLACED,)))
+        self.assertFalse(is_success((RETCODE_REQUOTE,)))
+        self.assertFalse(is_success(None))
+
+    def test_resends_a_requote_at_the_fresh_price(self):
+        mt5 = FakeMT5([RETCODE_REQUOTE, RETCODE_DONE])
+        result = ExecutionEngine(mt5, base_backoff=0.001).send(buy_request())
+
+        self.assertTrue(is_success(result))
+        self.assertEqual([request["price"] for request in mt5.requests], [2000.0, 2000.6])
+        self.assertEqual(result[1], 2000.6)
+
+    def test_falls_through_the_filling_modes(self):
+        mt5 = FakeMT5([RETCODE_INVALID_FILL, RETCODE_INVALID_FILL, RETCODE_DONE])
+        request = buy_request()
+        request["type_filling"] = ORDER_FILLING_FOK
+        engine = ExecutionEngine(mt5)
+        self.assertTrue(is_success(engine.send(request)))
+
+        self.assertEqual([request["type_filling"] for request in mt5.requests], [ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN])
+        self.assertEqual(engine.stats()["retries"], {"filling": 2})
+
+    def test_stops_retrying_at_the_deadline(self):
+        mt5 = FakeMT5([RETCODE_TOO_MANY_REQUESTS] * 10)
+        engine = ExecutionEngine(mt5, max_retries=10, deadline=0.05, base_backoff=0.2, max_backoff=0.2)
+        started = time.monotonic()
+        result = engine.send(buy_request())
+
+        self.assertFalse(is_success(result))
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertLess(len(mt5.requests), 10)
+
+    def test_no_answer_is_reported_as_a_failure_without_resending(self):
+        mt5 = FakeMT5([None, None])
+        result = ExecutionEngine(mt5, max_retries=1, base_backoff=0.001).send(buy_request())
+        self.assertIsNone(result)
+        self.assertFalse(is_success(result))
+        self.assertEqual(len(mt5.requests), 1)
+
+    def test_a_timed_out_deal_is_not_sent_twice(self):
+        mt5 = FakeMT5([RETCODE_TIMEOUT, RETCODE_DONE])
+        engine = ExecutionEngine(mt5, base_backoff=0.001)
+        result = engine.send(buy_request())
+
+        self.assertFalse(is_success(result))
+        self.assertEqual(len(mt5.requests), 1)
+        self.assertEqual(len(mt5.mt5.positions), 1)
+        self.assertEqual(engine.stats()["retries"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
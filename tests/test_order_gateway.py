@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from api.order_gateway import OrderGateway
+
+ACTION_DEAL = 1
+ACTION_SLTP = 6
+
+
+class Terminal:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def order_send(self, request):
+        with self.lock:
+            self.sent.append((time.monotonic(), dict(request)))
+        return request
+
+
+class TestOrderGateway(unittest.TestCase):
+
+    def setUp(self):
+        self.terminal = Terminal()
+
+    def start(self, **kwargs):
+        gateway = OrderGateway(self.terminal.order_send, ACTION_SLTP, **kwargs)
+        gateway.start()
+        self.addCleanup(gateway.stop)
+        return gateway
+
+    def test_coalesces_modifications_of_a_position(self):
+        gateway = self.start(coalesce_window=0.1)
+        futures = [gateway.submit({"action": ACTION_SLTP, "position": 7, "sl": sl}) for sl in (1.0, 2.0, 3.0)]
+        futures.append(gateway.submit({"action": ACTION_SLTP, "position": 7, "sl": 4.0, "tp": 9.0}))
+
+        results = [future.result(timeout=2) for future in futures]
+        self.assertEqual(len(self.terminal.sent), 1)
+        self.assertEqual(self.terminal.sent[0][1], {"action": ACTION_SLTP, "position": 7, "sl": 4.0, "tp": 9.0})
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(gateway.coalesced, 3)
+
+    def test_token_bucket_caps_the_send_rate(self):
+        gateway = self.start(max_requests_per_second=20)
+        futures = [gateway.submit({"action": ACTION_DEAL, "position": ticket}) for ticket in range(30)]
+        for future in futures:
+            future.result(timeout=5)
+
+        # The bucket starts full, the 10 sends after it wait for tokens
+        times = [sent_at for sent_at, _ in self.terminal.sent]
+        self.assertGreaterEqual(times[-1] - times[0], 9 / 20 * 0.9)
+
+    def test_a_deal_does_not_overtake_the_modification_of_its_position(self):
+        gateway = self.start(coalesce_window=5)
+        modified = gateway.submit({"action": ACTION_SLTP, "position": 7, "sl": 1.0})
+        closed = gateway.submit({"action": ACTION_DEAL, "position": 7})
+        modified.result(timeout=2)
+        closed.result(timeout=2)
+
+        self.assertEqual([request["action"] for _, request in self.terminal.sent], [ACTION_SLTP, ACTION_DEAL])
+
+    def test_sends_inline_once_stopped(self):
+        gateway = self.start()
+        gateway.stop()
+
+        future = gateway.submit({"action": ACTION_DEAL, "position": 7})
+        self.assertTrue(future.done())
+        self.assertEqual(future.result()["position"], 7)
+        self.assertEqual(gateway.sent, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from bot.position_policy import compile_policies
+from bot.position_rules import POSITION_DTYPE, SymbolTable, evaluate_positions, simulate_positions
+from models.position_policy import PositionPolicy
+
+BUY = 0
+SELL = 1
+
+
+def make_policies(**policies):
+    policies.setdefault("default", {"break_even_points": 5000, "partial_close": [{"points": 5000, "fraction": 1 / 3}]})
+    return compile_policies({name: PositionPolicy(**policy) for name, policy in policies.items()}, 0.01)
+
+
+def make_table(policies, atr=np.nan, atr_stop_buy=np.nan, atr_stop_sell=np.nan):
+    return SymbolTable(
+        symbols=["NAS100"],
+        tick_size=np.array([0.01]),
+        volume_step=np.array([0.01]),
+        policy=np.array([policies.row("NAS100")]),
+        atr=np.array([atr]),
+        atr_stop_buy=np.array([atr_stop_buy]),
+        atr_stop_sell=np.array([atr_stop_sell]),
+    )
+
+
+def make_positions(*rows):
+    # (ticket, type, volume, price_open, price_current, sl)
+    return np.array([(ticket, 0, order_type, volume, price_open, price_current, sl)
+                     for ticket, order_type, volume, price_open, price_current, sl in rows], dtype=POSITION_DTYPE)
+
+
+class TestPositionRules(unittest.TestCase):
+
+    def evaluate(self, positions, policies=None, tiers_done=None, **table):
+        policies = policies or make_policies()
+        return evaluate_positions(positions, make_table(policies, **table), policies, BUY, tiers_done)
+
+    def test_unchanged_positions_emit_no_action(self):
+        positions = make_positions((1, BUY, 0.3, 100.0, 100.5, 99.0), (2, SELL, 0.3, 100.0, 99.5, 101.0))
+        self.assertEqual(len(self.evaluate(positions)), 0)
+
+    def test_break_even_and_partial_close(self):
+        positions = make_positions((1, BUY, 0.3, 100.0, 150.5, 90.0), (2, SELL, 0.3, 200.0, 149.5, 210.0))
+        actions = self.evaluate(positions)
+
+        # Trailing (150.5 - 1 and 149.5 + 2) is more protective than break even for both
+        np.testing.assert_allclose(actions["stop_loss"], [149.5, 151.5])
+        np.testing.assert_allclose(actions["close_volume"], [0.1, 0.1])
+        self.assertEqual(list(actions["tiers_done"]), [1, 1])
+
+        # The tier is not repeated once done
+        actions = self.evaluate(positions, tiers_done=np.array([1, 1], dtype=np.int32))
+        np.testing.assert_allclose(actions["close_volume"], [0.0, 0.0])
+
+    def test_trailing_only_moves_in_favour(self):
+        positions = make_positions((1, BUY, 0.3, 100.0, 102.0, 101.5), (2, BUY, 0.3, 100.0, 102.0, 100.5))
+        actions = self.evaluate(positions)
+
+        self.assertEqual(list(actions["ticket"]), [2])
+        np.testing.assert_allclose(actions["stop_loss"], [101.0])
+
+    def test_missing_stop_loss_gets_atr_stop(self):
+        positions = make_positions((1, BUY, 0.3, 100.0, 100.2, 0.0), (2, SELL, 0.3, 100.0, 100.2, 0.0))
+        actions = self.evaluate(positions, atr_stop_buy=97.0)
+
+        # No ATR stop is available for the sell, it is left alone
+        self.assertEqual(list(actions["ticket"]), [1])
+        np.testing.assert_allclose(actions["stop_loss"], [97.0])
+
+    def test_atr_and_stepped_trailing(self):
+        positions = make_positions((1, BUY, 0.3, 100.0, 103.0, 99.0))
+
+        policies = make_policies(NAS100={"break_even_points": 1e9, "trailing": {"mode": "atr", "multiplier": 2.0}})
+        np.testing.assert_allclose(self.evaluate(positions, policies, atr=0.5)["stop_loss"], [102.0])
+
+        # 300 points of profit are three steps of 100, the stop sits two steps above the open price
+        policies = make_policies(NAS100={"break_even_points": 1e9, "trailing": {"mode": "stepped", "step": 100}})
+        np.testing.assert_allclose(self.evaluate(positions, policies)["stop_loss"], [102.0])
+
+    def test_simulate_locks_in_break_even(self):
+        policies = make_policies(NAS100={"break_even_points": 100, "trailing": {"mode": "none"}})
+        positions = make_positions((1, BUY, 0.3, 100.0, 100.0, 99.0), (2, BUY, 0.3, 100.0, 100.0, 99.0))
+        prices = np.array([[100.5, 100.5], [101.5, 100.5], [99.0, 98.0]])
+
+        realized = simulate_positions(positions, prices, make_table(policies), policies, BUY)
+        # The first moved to break even before the drop, the second was stopped out
+        np.testing.assert_allclose(realized, [0.0, -0.3])
+
+
+if __name__ == "__main__":
+    unittest.main()
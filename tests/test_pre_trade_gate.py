@@ -0,0 +1,110 @@
+import datetime as dt
+import unittest
+from types import SimpleNamespace
+
+from bot.pre_trade_gate import PreTradeGate
+from bot.risk_model import RiskModel
+from models.risk_management import RiskManagement
+from models.signal_decision import SignalDecision
+
+
+class Terminal:
+    def symbol_info(self, symbol):
+        return SimpleNamespace(trade_tick_value=1.0, trade_tick_size=0.01, volume_step=0.01)
+
+    def account_info(self):
+        return SimpleNamespace(balance=10_000.0)
+
+
+class FakeMT5:
+    def __init__(self):
+        self.mt5 = Terminal()
+        self.positions = []
+
+    def get_account_info(self):
+        return {"balance": 10_000.0}
+
+    def get_open_positions(self):
+        return list(self.positions)
+
+
+def make_signal(symbol="XAUUSD", priority=0, stop_loss=1990.0):
+    return SignalDecision(
+        symbol=symbol,
+        signal=1,
+        order_type="BUY_MARKET",
+        current_price=2000.0,
+        volume=None,
+        risk=0.01,
+        take_profit=2020.0,
+        stop_loss=stop_loss,
+        signal_timestamp=dt.datetime.now(dt.timezone.utc),
+        priority=priority,
+    )
+
+
+class TestPreTradeGate(unittest.TestCase):
+
+    def setUp(self):
+        self.mt5 = FakeMT5()
+        risk_management = RiskManagement(max_trade_percentage=0.05, max_stop_loss_percentage=0.02, take_profit_ratio=2,
+                                         max_concurrent_trades=3, max_daily_loss_percentage=0.1)
+        self.risk_model = RiskModel(self.mt5, risk_management, lambda msg, key: None, lambda msg: None)
+        trade_manager = SimpleNamespace(update_daily_loss=lambda: 0.0)
+        self.gate = PreTradeGate(self.mt5, risk_management, self.risk_model, trade_manager, lambda msg: None, lambda msg: None)
+
+    def sized(self, *signals):
+        # The strategy path sizes each signal, which reserves a slot
+        for signal_decision in signals:
+            self.risk_model.size(signal_decision, lambda msg, key: None, lambda msg: None)
+            signal_decision.volume = 0.1
+        return [(signal_decision, None) for signal_decision in signals]
+
+    def test_one_signal_calls_do_not_accumulate(self):
+        # Shard signals arrive one by one, each filled signal frees its slot once the position closes
+        for round_ in range(10):
+            signal_decision = make_signal()
+            self.assertEqual(len(self.gate.evaluate(self.sized(signal_decision))), 1, round_)
+            self.risk_model.on_fill(round_, "XAUUSD", 0.1, 2000.0, 1990.0, signal_decision=signal_decision)
+            self.risk_model.on_close(round_)
+
+    def test_reservations_outside_the_batch_take_slots(self):
+        # A resting pending entry and a running watcher still hold their reservations
+        self.sized(make_signal("EURUSD"), make_signal("GBPUSD"))
+        self.mt5.positions = [SimpleNamespace(ticket=1)]
+
+        admitted = self.gate.evaluate(self.sized(make_signal()))
+        self.assertEqual(admitted, [])
+        self.assertEqual(self.risk_model.reserved()[0], 2)
+
+    def test_batch_is_ranked_by_priority(self):
+        low, high = make_signal("EURUSD", priority=0), make_signal("GBPUSD", priority=5)
+        self.sized(make_signal("USDJPY"))
+        self.mt5.positions = [SimpleNamespace(ticket=1)]
+
+        admitted = self.gate.evaluate(self.sized(low, high))
+        self.assertEqual([signal_decision.symbol for signal_decision, _ in admitted], ["GBPUSD"])
+        self.assertIsNone(low.reservation)
+        self.assertIsNotNone(high.reservation)
+
+    def test_a_signal_capped_to_zero_volume_takes_no_slot(self):
+        self.mt5.positions = [SimpleNamespace(ticket=1), SimpleNamespace(ticket=2)]
+        # Its stop loss is so far that not even one volume step fits max_trade_percentage
+        far = make_signal("EURUSD", priority=5, stop_loss=1000.0)
+        near = make_signal("GBPUSD")
+
+        admitted = self.gate.evaluate(self.sized(far, near))
+        self.assertEqual([signal_decision.symbol for signal_decision, _ in admitted], ["GBPUSD"])
+
+    def test_open_risk_counts_against_the_loss_budget(self):
+        # 950 of the 1000 daily loss budget is at risk in an open position
+        self.risk_model.on_fill(1, "XAUUSD", 1.0, 2000.0, 1990.5)
+        self.mt5.positions = [SimpleNamespace(ticket=1)]
+        signal_decision = make_signal()
+
+        self.assertEqual(self.gate.evaluate(self.sized(signal_decision)), [])
+        self.assertIsNone(signal_decision.reservation)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import datetime as dt
+import unittest
+from types import SimpleNamespace
+
+from bot.risk_model import RiskModel
+from models.risk_management import RiskManagement
+from models.signal_decision import SignalDecision
+
+
+class Terminal:
+    def __init__(self, balance=10_000.0):
+        self.account = SimpleNamespace(balance=balance)
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(trade_tick_value=1.0, trade_tick_size=0.01, volume_step=0.01)
+
+    def account_info(self):
+        return self.account
+
+
+def make_signal(symbol="XAUUSD", signal_id=None):
+    return SignalDecision(
+        symbol=symbol,
+        signal=1,
+        order_type="BUY_MARKET",
+        current_price=2000.0,
+        volume=None,
+        risk=0.01,
+        take_profit=2020.0,
+        stop_loss=1990.0,
+        signal_timestamp=dt.datetime.now(dt.timezone.utc),
+        id=signal_id,
+    )
+
+
+class TestRiskModel(unittest.TestCase):
+
+    def setUp(self):
+        self.terminal = Terminal()
+        risk_management = RiskManagement(max_trade_percentage=0.05, max_stop_loss_percentage=0.02, take_profit_ratio=2,
+                                         max_concurrent_trades=2, max_daily_loss_percentage=0.1)
+        self.model = RiskModel(SimpleNamespace(mt5=self.terminal), risk_management, lambda msg, key: None, lambda msg: None)
+
+    def size(self, signal_decision):
+        return self.model.size(signal_decision, lambda msg, key: None, lambda msg: None)
+
+    def test_release_frees_the_signals_own_reservation(self):
+        first, second = make_signal(), make_signal("EURUSD")
+        self.assertIsNotNone(self.size(first))
+        self.assertIsNotNone(self.size(second))
+        self.assertIsNone(self.size(make_signal()))
+
+        self.assertTrue(self.model.release(second))
+        self.assertEqual(list(self.model.reservations), [first.reservation])
+        # Releasing again, or a signal that never reserved, frees nothing
+        self.assertFalse(self.model.release(second))
+        self.assertFalse(self.model.release(make_signal()))
+        self.assertEqual(len(self.model.reservations), 1)
+
+    def test_fill_turns_the_reservation_into_a_position(self):
+        signal_decision = make_signal()
+        volume, _, _ = self.size(signal_decision)
+        self.assertAlmostEqual(self.model.reserved()[1], volume * 1000)
+
+        self.model.on_fill(1, "XAUUSD", volume, 2000.0, 1990.0, signal_decision=signal_decision)
+        self.assertEqual(self.model.reserved(), (0, 0))
+        self.assertIsNone(signal_decision.reservation)
+        self.assertAlmostEqual(self.model.account_risk, volume * 1000)
+
+    def test_reserve_respects_max_concurrent_trades(self):
+        restored = [make_signal(), make_signal(), make_signal()]
+        for signal_decision in restored:
+            signal_decision.volume = 0.1
+        self.assertEqual([self.model.reserve(signal_decision) for signal_decision in restored], [True, True, False])
+        self.assertEqual(self.model.reserved(excluding={restored[0].reservation})[0], 1)
+
+    def test_sync_keeps_the_reservations_of_waiting_signals(self):
+        # A pending entry or watcher may wait for hours, its slot stays taken until it ends
+        signal_decision = make_signal()
+        self.size(signal_decision)
+        self.model.sync([])
+        self.assertEqual(list(self.model.reservations), [signal_decision.reservation])
+
+    def test_size_without_account_info(self):
+        self.terminal.account = None
+        self.assertIsNone(self.size(make_signal()))
+
+
+if __name__ == "__main__":
+    unittest.main()
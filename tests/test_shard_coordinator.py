@@ -0,0 +1,105 @@
+import collections
+import multiprocessing
+import threading
+import unittest
+
+from api.mt5_proxy import MT5Proxy
+from bot.shard_coordinator import ShardCoordinator, partition_symbols
+from bot.strategy_manager import build_strategy_managers
+from models.signal_decision import SignalDecision
+from strategy.base import Strategy
+from strategy.registry import register_strategy
+
+SymbolInfo = collections.namedtuple("SymbolInfo", "name trade_tick_size volume_step")
+OrderSendResult = collections.namedtuple("OrderSendResult", "retcode order volume price")
+
+
+class Terminal:
+    def __init__(self):
+        self.calls = []
+
+    def symbol_info(self, symbol):
+        self.calls.append(("symbol_info", symbol))
+        return SymbolInfo(symbol, 0.01, 0.01)
+
+    def account_info(self):
+        raise RuntimeError("terminal disconnected")
+
+
+class CoordinatorMT5:
+    def __init__(self):
+        self.mt5 = Terminal()
+        self.orders = []
+
+    def order_send(self, request):
+        self.orders.append(request)
+        return OrderSendResult(10009, 555, request["volume"], 2000.0)
+
+
+class FixedStrategy(Strategy):
+    def evaluate(self, candle_data, features=None):
+        return SignalDecision(symbol=self.symbol, signal=1, order_type="BUY_MARKET", current_price=2000.0, volume=None, risk=0.01,
+                              take_profit=2020.123, stop_loss=1990.123, signal_timestamp=None)
+
+
+class Candles(list):
+    empty = False
+
+
+class TestPartitionSymbols(unittest.TestCase):
+
+    def test_balances_on_the_number_of_strategies(self):
+        tradable_symbols = {"XAUUSD": [{}] * 3, "EURUSD": [{}], "GBPUSD": [{}], "USDJPY": [{}], "NAS100": [{}] * 2}
+        groups = partition_symbols(tradable_symbols, 2)
+
+        self.assertEqual(sorted(sum(len(c) for c in group.values()) for group in groups), [4, 4])
+        self.assertEqual(sorted(symbol for group in groups for symbol in group), sorted(tradable_symbols))
+
+    def test_never_more_groups_than_symbols(self):
+        self.assertEqual(len(partition_symbols({"XAUUSD": [{}]}, 4)), 1)
+        self.assertEqual(partition_symbols({}, 4), [{}])
+
+
+class TestShardRoundTrips(unittest.TestCase):
+
+    def setUp(self):
+        self.mt5 = CoordinatorMT5()
+        self.signals = []
+        self.coordinator = ShardCoordinator(self.mt5, {}, 1, lambda *signal: self.signals.append(signal), lambda msg, key: None, lambda msg: None)
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.proxy = MT5Proxy(child_conn)
+        # The coordinator side of one shard, the worker side runs in the test's thread
+        threading.Thread(target=self.coordinator.serve, args=(0, parent_conn), daemon=True).start()
+        self.addCleanup(self.coordinator.stop_event.set)
+        self.addCleanup(child_conn.close)
+
+    def test_terminal_calls_come_back_as_named_tuples(self):
+        info = self.proxy.mt5.symbol_info("XAUUSD")
+        self.assertEqual((info.name, info.trade_tick_size), ("XAUUSD", 0.01))
+        self.assertEqual(self.mt5.mt5.calls, [("symbol_info", "XAUUSD")])
+
+    def test_terminal_errors_are_raised_in_the_worker(self):
+        with self.assertRaises(ConnectionError):
+            self.proxy.mt5.account_info()
+
+    def test_orders_go_through_the_coordinators_mt5(self):
+        result = self.proxy.order_send({"symbol": "XAUUSD", "volume": 0.1})
+        self.assertEqual((result.retcode, result.order), (10009, 555))
+        self.assertEqual(self.mt5.orders, [{"symbol": "XAUUSD", "volume": 0.1}])
+
+    def test_worker_signals_are_sent_unsized(self):
+        register_strategy("fixed", FixedStrategy)
+        strategy_manager = build_strategy_managers("XAUUSD", [{"granularity": "M1", "indicators": {}, "risk": 0.01, "profit_ratio": 2, "strategy": "fixed"}],
+                                                   self.proxy, lambda msg, key: None, lambda msg: None, size_signals=False)[0]
+        signal_decision = strategy_manager.generate_signal(Candles([1]), features=object())
+        self.proxy.send_signal("XAUUSD", 0, signal_decision)
+        # A terminal call after the signal, answered once the coordinator handled the signal
+        self.proxy.mt5.symbol_info("XAUUSD")
+
+        self.assertIsNone(signal_decision.volume)
+        self.assertEqual(self.mt5.mt5.calls, [("symbol_info", "XAUUSD")])
+        self.assertEqual([(symbol, index, signal.volume) for symbol, index, signal in self.signals], [("XAUUSD", 0, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import datetime as dt
+import unittest
+
+from bot.signal_index import DUPLICATE_BAR, DUPLICATE_ID, STALE, SignalIndex
+from models.signal_decision import SignalDecision
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_signal(timestamp, signal_id=None, symbol="XAUUSD", signal=1):
+    return SignalDecision(
+        symbol=symbol,
+        signal=signal,
+        order_type="BUY_MARKET",
+        current_price=2000.0,
+        volume=0.1,
+        risk=0.01,
+        take_profit=2010.0,
+        stop_loss=1995.0,
+        signal_timestamp=dt.datetime.fromtimestamp(timestamp, tz=dt.timezone.utc),
+        id=signal_id,
+    )
+
+
+class TestSignalIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock(1_700_000_000.0)
+        self.index = SignalIndex(ttl=600, max_age=15, clock=self.clock)
+
+    def test_drops_duplicate_id(self):
+        self.assertTrue(self.index.admit(make_signal(self.clock.now, signal_id=7), 60))
+        self.assertFalse(self.index.admit(make_signal(self.clock.now, signal_id=7, symbol="EURUSD"), 60))
+        self.assertEqual(self.index.dropped[DUPLICATE_ID], 1)
+
+    def test_drops_same_symbol_direction_and_bar(self):
+        bar_start = self.clock.now - self.clock.now % 60
+        self.clock.now = bar_start + 10
+        self.assertTrue(self.index.admit(make_signal(bar_start + 1), 60))
+        self.assertFalse(self.index.admit(make_signal(bar_start + 5), 60))
+        self.assertTrue(self.index.admit(make_signal(bar_start + 5, signal=-1), 60))
+        self.assertEqual(self.index.dropped[DUPLICATE_BAR], 1)
+
+    def test_keys_expire_after_ttl(self):
+        self.assertTrue(self.index.admit(make_signal(self.clock.now, signal_id=7), 60))
+        self.clock.now += 601
+        self.assertTrue(self.index.admit(make_signal(self.clock.now, signal_id=7), 60))
+        self.assertEqual(self.index.stats()["tracked"], 2)
+
+    def test_drops_stale_signals(self):
+        signal = make_signal(self.clock.now - 20)
+        self.assertFalse(self.index.admit(signal, 60))
+
+        signal = make_signal(self.clock.now)
+        self.assertTrue(self.index.admit(signal, 60))
+        self.clock.now += 16
+        self.assertFalse(self.index.is_fresh(signal))
+        self.assertEqual(self.index.dropped[STALE], 2)
+
+    def test_seeded_signals_stay_fresh_for_one_bar(self):
+        signal = make_signal(self.clock.now - 40, signal_id=7)
+        self.assertTrue(self.index.seed(signal, 60))
+        self.assertFalse(self.index.admit(make_signal(self.clock.now, signal_id=7), 60))
+        self.assertTrue(self.index.is_fresh(signal))
+        self.assertFalse(self.index.seed(make_signal(self.clock.now - 61), 60))
+
+        # The allowance is used once, when the signal leaves the queue
+        self.assertFalse(self.index.is_fresh(signal))
+
+
+if __name__ == "__main__":
+    unittest.main()
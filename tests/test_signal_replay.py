@@ -0,0 +1,101 @@
+import datetime as dt
+import tempfile
+import unittest
+
+import numpy as np
+
+from models.copy_signal_thresholds import CopySignalThresholds
+from strategy.signal_replay import (ACCEPTED, LOSS, NO_HISTORY, NOT_MARKET, OPEN, TOO_FAR, WIN,
+                                    replay, summarize_replay, wilder_atr)
+
+START = 1_700_000_040  # a minute boundary
+THRESHOLDS = CopySignalThresholds(atr_period=3, atr_multiple=1, max_distance=5, level_window=5, max_age=600)
+
+
+def make_bars(closes):
+    closes = np.asarray(closes, dtype=float)
+    bars = np.zeros(len(closes), dtype=[("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8")])
+    bars["time"] = START + 60 * np.arange(len(closes))
+    bars["open"] = closes
+    bars["high"] = closes + 1
+    bars["low"] = closes - 1
+    bars["close"] = closes
+    return bars
+
+
+def make_row(signal_id, minute, order_type="BUY_MARKET", price=None, channel="alpha", symbol="XAUUSD"):
+    return {
+        "id": signal_id,
+        "symbol": symbol,
+        "order_type": order_type,
+        "price": price,
+        "created_at": dt.datetime.utcfromtimestamp(START + 60 * minute + 30),
+        "channel_name": channel,
+    }
+
+
+class TestSignalReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Flat, then a rally to 140, then a drop to 60
+        closes = [100.0] * 10 + list(range(101, 141)) + list(range(139, 59, -1))
+        np.save(f"{self.directory.name}/XAUUSD.npy", make_bars(closes))
+
+    def test_wilder_atr_matches_constant_range(self):
+        atr = wilder_atr(np.full(10, 2.0), np.zeros(10), np.ones(10), 3)
+        self.assertTrue(np.isnan(atr[:3]).all())
+        self.assertTrue(np.allclose(atr[3:], 2.0))
+
+    def test_decisions_and_outcomes(self):
+        rows = [
+            make_row(1, 1),                                # before the ATR warmup
+            make_row(2, 10, price=200.0),                  # far from the close
+            make_row(3, 10, order_type="BUY_STOP"),        # not a market signal
+            make_row(4, 10, channel="beta"),               # rally reaches the take profit
+            make_row(5, 48, order_type="SELL_MARKET"),     # top of the rally, then the drop
+            make_row(6, 60, channel="beta"),               # bought into the drop
+            make_row(7, 130),                              # after the last candle
+        ]
+        results = replay(rows, self.directory.name, "M1", profit_ratio=2, thresholds=THRESHOLDS)
+
+        self.assertEqual(results["reason"].tolist(), [NO_HISTORY, TOO_FAR, NOT_MARKET, ACCEPTED, ACCEPTED, ACCEPTED, NO_HISTORY])
+        self.assertEqual(results["outcome"][3:6].tolist(), [WIN, WIN, LOSS])
+        self.assertEqual(results["r"][3:6].tolist(), [2.0, 2.0, -1.0])
+        # Entered at the close of the candle after the signal
+        self.assertEqual(results["entry"][3], 101.0)
+
+        stats = summarize_replay(results)
+        self.assertEqual(stats["beta"], {"signals": 2, "accepted": 2, "win_rate": 0.5, "average_r": 0.5, "rejected": {}})
+        self.assertEqual(stats["alpha"]["rejected"], {"not_market": 1, "no_history": 2, "too_far": 1})
+
+    def test_position_still_open_at_the_end_of_the_history(self):
+        results = replay([make_row(1, 128)], self.directory.name, "M1", profit_ratio=50, thresholds=THRESHOLDS)
+        self.assertEqual(results["outcome"].tolist(), [OPEN])
+        self.assertEqual(results["bars_held"].tolist(), [1])
+
+    def test_server_time_candles_are_shifted_to_utc(self):
+        rows = [make_row(4, 10, channel="beta"), make_row(5, 48, order_type="SELL_MARKET")]
+        expected = replay(rows, self.directory.name, "M1", profit_ratio=2, thresholds=THRESHOLDS)
+
+        # The same candles exported from a server two hours ahead of UTC
+        bars = np.load(f"{self.directory.name}/XAUUSD.npy")
+        bars["time"] += 7200
+        with tempfile.TemporaryDirectory() as server:
+            np.save(f"{server}/XAUUSD.npy", bars)
+            shifted = replay(rows, server, "M1", profit_ratio=2, thresholds=THRESHOLDS, utc_offset=7200)
+            unshifted = replay(rows, server, "M1", profit_ratio=2, thresholds=THRESHOLDS)
+
+        for column in ("reason", "entry", "outcome", "r"):
+            np.testing.assert_array_equal(shifted[column], expected[column])
+        # Read as UTC, the signals land on the first candles, before the ATR warmup
+        self.assertEqual(unshifted["reason"].tolist(), [NO_HISTORY, NO_HISTORY])
+
+    def test_symbol_without_history(self):
+        results = replay([make_row(1, 10, symbol="EURUSD")], self.directory.name, "M1", profit_ratio=2, thresholds=THRESHOLDS)
+        self.assertEqual(results["reason"].tolist(), [NO_HISTORY])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import random
+import unittest
+from types import SimpleNamespace
+
+from bot.stop_levels import RollingLevels, StopLevelService
+from models.bar import Bar
+
+
+def make_bars(count, seed=7):
+    rng = random.Random(seed)
+    bars, close = [], 100.0
+    for index in range(count):
+        open_ = close
+        close = open_ + rng.uniform(-1, 1)
+        bars.append(Bar(time=60 * index, open=open_, high=max(open_, close) + rng.uniform(0, 0.5),
+                        low=min(open_, close) - rng.uniform(0, 0.5), close=close))
+    return bars
+
+
+def wilder_atr(bars, period):
+    true_ranges = [max(bar.high - bar.low, abs(bar.high - previous.close), abs(bar.low - previous.close))
+                   for previous, bar in zip(bars, bars[1:])]
+    atr = sum(true_ranges[:period]) / period
+    for true_range in true_ranges[period:]:
+        atr = (atr * (period - 1) + true_range) / period
+    return atr
+
+
+class TestRollingLevels(unittest.TestCase):
+
+    def test_matches_full_recomputation(self):
+        bars = make_bars(400)
+        levels = RollingLevels(period=15, window=180)
+        for bar in bars:
+            levels.add(bar)
+
+        level = levels.level()
+        self.assertAlmostEqual(level.atr, wilder_atr(bars, 15))
+        self.assertEqual(level.high, max(bar.high for bar in bars[-180:]))
+        self.assertEqual(level.low, min(bar.low for bar in bars[-180:]))
+        self.assertEqual(level.close, bars[-1].close)
+
+    def test_needs_period_bars_and_ignores_repeats(self):
+        bars = make_bars(16)
+        levels = RollingLevels(period=15, window=180)
+        for bar in bars[:15]:
+            levels.add(bar)
+        self.assertIsNone(levels.level())
+
+        levels.add(bars[15])
+        levels.add(bars[15])
+        self.assertEqual(levels.count, 16)
+        self.assertIsNotNone(levels.level())
+
+
+class CandleManager:
+    def __init__(self, bars):
+        self.aggregators = {"XAUUSD": SimpleNamespace(series={"M1": SimpleNamespace(closed=bars)})}
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+
+class TestStopLevelService(unittest.TestCase):
+
+    def test_each_period_and_window_has_its_own_series(self):
+        bars = make_bars(400)
+        candle_manager = CandleManager(bars[:399])
+        service = StopLevelService(None, lambda msg: None)
+        service.attach(candle_manager)
+
+        default = service.level("XAUUSD", "M1")
+        short = service.level("XAUUSD", "M1", period=5, window=20)
+        # Seeded from the last window + period + 1 closed bars
+        self.assertAlmostEqual(default.atr, wilder_atr(bars[399 - 196:399], 15))
+        self.assertAlmostEqual(short.atr, wilder_atr(bars[399 - 26:399], 5))
+        self.assertEqual(short.high, max(bar.high for bar in bars[379:399]))
+
+        # A closed bar updates both
+        for listener in candle_manager.listeners:
+            listener("XAUUSD", "M1", bars[399])
+        self.assertAlmostEqual(service.level("XAUUSD", "M1").atr, wilder_atr(bars[399 - 196:], 15))
+        self.assertAlmostEqual(service.level("XAUUSD", "M1", period=5, window=20).atr, wilder_atr(bars[399 - 26:], 5))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from api.tick_replay import TickReplay
+from utils.tick_file import Tick, TickFileReader, TickFileWriter
+
+
+def make_tick(time_msc, bid):
+    return Tick(time_msc // 1000, bid, bid + 0.5, 0.0, 0, time_msc, 6, 0.0)
+
+
+class TestTickFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "ticks.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, ticks, chunk_ticks=3):
+        writer = TickFileWriter(self.path, chunk_ticks=chunk_ticks)
+        for symbol, tick in ticks:
+            writer.append(symbol, tick)
+        writer.close()
+
+    def test_round_trip(self):
+        ticks = [("NAS100" if i % 2 else "SP500", make_tick(1000 * i, 100.0 + i)) for i in range(10)]
+        self.write(ticks)
+
+        self.assertEqual(len(TickFileReader(self.path).index()), 4)
+        self.assertEqual(list(TickFileReader(self.path).read()), ticks)
+
+    def test_read_range_and_append(self):
+        self.write([("NAS100", make_tick(1000 * i, 100.0 + i)) for i in range(6)])
+        self.write([("NAS100", make_tick(1000 * i, 100.0 + i)) for i in range(6, 8)])
+
+        read = [tick.time_msc for _, tick in TickFileReader(self.path).read(start_msc=4000, end_msc=6000)]
+        self.assertEqual(read, [4000, 5000, 6000])
+
+    def test_torn_chunk_is_ignored(self):
+        self.write([("NAS100", make_tick(1000 * i, 100.0 + i)) for i in range(6)])
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+
+        self.assertEqual(len(list(TickFileReader(self.path).read())), 3)
+
+    def test_replay_clock(self):
+        self.write([("NAS100", make_tick(1000 * i, 100.0 + i)) for i in range(6)])
+        replay = TickReplay(self.path, speed=None)
+
+        replay.advance_to(2500)
+        self.assertEqual(replay.symbol_info_tick("NAS100").bid, 102.0)
+        self.assertEqual(len(replay.copy_ticks_from("NAS100", 1, 100)), 2)
+        self.assertIsNone(replay.symbol_info_tick("XAUUSD"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import datetime as dt
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from bot import watcher_manager
+from bot.signal_management import OrderFailed
+from bot.watcher_manager import CANCELLED, EXPIRED, FAILED, FIRED, REJECTED, WatcherManager
+from models.signal_decision import SignalDecision
+
+
+class RiskModel:
+    def __init__(self):
+        self.released = []
+
+    def release(self, signal_decision):
+        self.released.append(signal_decision)
+
+
+def make_container(symbol="XAUUSD"):
+    signal_decision = SignalDecision(symbol=symbol, signal=1, order_type="BUY_MARKET", current_price=2000.0, volume=0.1, risk=0.01,
+                                     take_profit=2020.0, stop_loss=1990.0, signal_timestamp=dt.datetime.now(dt.timezone.utc))
+    return signal_decision, SimpleNamespace(symbol=symbol, strategy=SimpleNamespace(granularity="M1"))
+
+
+class TestWatcherManager(unittest.TestCase):
+
+    def setUp(self):
+        self.risk_model = RiskModel()
+        self.manager = WatcherManager(None, self.risk_model, 2, 3, lambda msg, key: None, lambda msg: None)
+        self.addCleanup(self.manager.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def watch(self, outcome):
+        """Patches process_signal with a watcher that waits for self.release or the stop event, then ends with outcome."""
+        def process_signal(stop_event, signal_decision, mt5, strategy_manager, log_message, log_to_error, deadline):
+            while not stop_event.is_set() and not self.release.is_set():
+                time.sleep(0.01)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return None if stop_event.is_set() else outcome
+
+        patcher = mock.patch.object(watcher_manager, "process_signal", process_signal)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def finish(self, futures):
+        self.release.set()
+        for future in futures:
+            try:
+                future.result(timeout=2)
+            except Exception:
+                pass
+        # Done callbacks run right after the result is set
+        time.sleep(0.05)
+
+    def test_rejects_signals_beyond_capacity(self):
+        self.watch(outcome="placed")
+        futures = [self.manager.submit(make_container()) for _ in range(2)]
+        rejected = make_container()
+        self.assertIsNone(self.manager.submit(rejected))
+        self.assertEqual(self.risk_model.released, [rejected[0]])
+        self.assertEqual(self.manager.metrics()["active"], 2)
+
+        self.finish(futures)
+        self.assertEqual(self.manager.metrics(), {"active": 0, REJECTED: 1, FIRED: 2})
+
+    def test_deadline_covers_the_deadline_candles(self):
+        deadlines = []
+        with mock.patch.object(watcher_manager, "process_signal", lambda *args: deadlines.append(args[-1])):
+            started = time.time()
+            future = self.manager.submit(make_container())
+            self.finish([future])
+
+        self.assertAlmostEqual(deadlines[0] - started, 3 * 60, delta=1)
+        self.assertEqual(self.manager.counts[EXPIRED], 1)
+        self.assertEqual(len(self.risk_model.released), 1)
+
+    def test_releases_a_watcher_that_failed_before_ordering(self):
+        self.watch(outcome=AttributeError("'NoneType' object has no attribute 'iloc'"))
+        container = make_container()
+        self.finish([self.manager.submit(container)])
+        self.assertEqual(self.risk_model.released, [container[0]])
+        self.assertEqual(self.manager.counts[FAILED], 1)
+
+    def test_refused_orders_are_not_released_again(self):
+        self.watch(outcome=OrderFailed("Failed to place order"))
+        self.finish([self.manager.submit(make_container())])
+        self.assertEqual(self.risk_model.released, [])
+        self.assertEqual(self.manager.counts[FAILED], 1)
+
+    def test_stop_keeps_running_watchers_for_the_handoff(self):
+        self.watch(outcome="placed")
+        future = self.manager.submit(make_container())
+        self.manager.stop()
+        future.result(timeout=2)
+        time.sleep(0.05)
+
+        self.assertEqual(self.manager.counts[CANCELLED], 1)
+        self.assertEqual(self.manager.metrics()["active"], 1)
+        self.assertEqual(self.risk_model.released, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
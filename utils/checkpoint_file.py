@@ -0,0 +1,321 @@
+import datetime as dt
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from bot.bar_aggregator import BarAggregator
+from models.bar import Bar
+from models.candle_timing import CandleTiming
+from models.pending_entry import PendingEntry
+from models.signal_decision import SignalDecision
+
+# File layout
+#   header: MAGIC, file version, section count, written_at
+#   sections: SECTION block (name, section version, payload size) followed by its payload
+# Each section carries its own version. A reader skips sections it doesn't know
+# or whose version changed, so a schema change only loses that section.
+MAGIC = b"BCKP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHd")
+SECTION = struct.Struct("<4sHI")
+STRING = struct.Struct("<H")
+
+DAILY_LOSS_SECTION = b"LOSS"
+TIMINGS_SECTION = b"TIME"
+SIGNALS_SECTION = b"SIGN"
+TIERS_SECTION = b"TIER"
+ENTRIES_SECTION = b"ENTR"
+AGGREGATORS_SECTION = b"AGGR"
+POLLS_SECTION = b"POLL"
+
+DAILY_LOSS = struct.Struct("<dI")
+TIMING = struct.Struct("<dHB")
+SIGNAL = struct.Struct("<BHbddddddBbqi")
+TIER = struct.Struct("<qH")
+ENTRY = struct.Struct("<qdqd")
+AGGREGATOR = struct.Struct("<qHH")
+SERIES = struct.Struct("<qBBH")
+BAR = struct.Struct("<qddddqiq")
+POLL = struct.Struct("<d")
+
+SECTION_VERSIONS = {
+    DAILY_LOSS_SECTION: 1,
+    TIMINGS_SECTION: 1,
+    SIGNALS_SECTION: 1,
+    TIERS_SECTION: 1,
+    ENTRIES_SECTION: 1,
+    AGGREGATORS_SECTION: 1,
+    POLLS_SECTION: 1,
+}
+
+# Where a pending signal was when the checkpoint was taken
+QUEUED = 0
+WATCHING = 1
+
+# (kind, symbol, strategy index, signal)
+PendingSignal = Tuple[int, str, int, SignalDecision]
+
+
+def pack_string(value: Optional[str]) -> bytes:
+    data = (value or "").encode()
+    return STRING.pack(len(data)) + data
+
+
+def unpack_string(payload: bytes, position: int) -> Tuple[Optional[str], int]:
+    (length,) = STRING.unpack_from(payload, position)
+    position += STRING.size
+    return payload[position:position + length].decode() or None, position + length
+
+
+def encode_daily_loss(daily_loss: float, day: dt.date) -> bytes:
+    return DAILY_LOSS.pack(daily_loss, day.toordinal())
+
+
+def decode_daily_loss(payload: bytes) -> Tuple[float, dt.date]:
+    daily_loss, ordinal = DAILY_LOSS.unpack(payload)
+    return daily_loss, dt.date.fromordinal(ordinal)
+
+
+def encode_timings(timings: Dict[str, CandleTiming]) -> bytes:
+    payload = bytearray()
+    for name, timing in timings.items():
+        payload += pack_string(name) + TIMING.pack(timing.last_time.timestamp(), timing.tries, timing.is_ready)
+    return bytes(payload)
+
+
+def decode_timings(payload: bytes) -> Dict[str, CandleTiming]:
+    timings = {}
+    position = 0
+    while position < len(payload):
+        name, position = unpack_string(payload, position)
+        last_time, tries, is_ready = TIMING.unpack_from(payload, position)
+        position += TIMING.size
+        timings[name] = CandleTiming(last_time=dt.datetime.fromtimestamp(last_time), tries=tries, is_ready=bool(is_ready))
+    return timings
+
+
+def encode_signal(kind: int, symbol: str, index: int, signal: SignalDecision) -> bytes:
+    timestamp = signal.signal_timestamp
+    break_of_structure = -1 if signal.break_of_structure is None else int(signal.break_of_structure)
+    payload = bytearray(SIGNAL.pack(
+        kind, index, signal.signal, signal.current_price, signal.volume, signal.risk,
+        signal.take_profit, signal.stop_loss, timestamp.timestamp(), timestamp.tzinfo is not None,
+        break_of_structure, -1 if signal.id is None else signal.id, signal.priority,
+    ))
+    for value in (symbol, signal.order_type, signal.granularity_ctf_granularity, signal.comment):
+        payload += pack_string(value)
+    return bytes(payload)
+
+
+def decode_signal(payload: bytes, position: int) -> Tuple[PendingSignal, int]:
+    (kind, index, signal, current_price, volume, risk, take_profit, stop_loss,
+     timestamp, is_aware, break_of_structure, signal_id, priority) = SIGNAL.unpack_from(payload, position)
+    position += SIGNAL.size
+    symbol, position = unpack_string(payload, position)
+    order_type, position = unpack_string(payload, position)
+    granularity_ctf_granularity, position = unpack_string(payload, position)
+    comment, position = unpack_string(payload, position)
+
+    return (kind, symbol, index, SignalDecision(
+        symbol=symbol,
+        signal=signal,
+        order_type=order_type,
+        current_price=current_price,
+        volume=volume,
+        risk=risk,
+        take_profit=take_profit,
+        stop_loss=stop_loss,
+        signal_timestamp=dt.datetime.fromtimestamp(timestamp, tz=dt.timezone.utc if is_aware else None),
+        break_of_structure=None if break_of_structure < 0 else bool(break_of_structure),
+        granularity_ctf_granularity=granularity_ctf_granularity,
+        id=None if signal_id < 0 else signal_id,
+        comment=comment,
+        priority=priority,
+    )), position
+
+
+def encode_signals(signals: List[PendingSignal]) -> bytes:
+    return b"".join(encode_signal(kind, symbol, index, signal) for kind, symbol, index, signal in signals)
+
+
+def decode_signals(payload: bytes) -> List[PendingSignal]:
+    signals = []
+    position = 0
+    while position < len(payload):
+        signal, position = decode_signal(payload, position)
+        signals.append(signal)
+    return signals
+
+
+def encode_entries(entries: List[PendingEntry]) -> bytes:
+    payload = bytearray()
+    for entry in entries:
+        payload += ENTRY.pack(entry.order, entry.trigger, entry.bar_time, entry.expires_at) + pack_string(entry.granularity)
+        payload += encode_signal(QUEUED, entry.signal_decision.symbol, 0, entry.signal_decision)
+    return bytes(payload)
+
+
+def decode_entries(payload: bytes) -> List[PendingEntry]:
+    entries = []
+    position = 0
+    while position < len(payload):
+        order, trigger, bar_time, expires_at = ENTRY.unpack_from(payload, position)
+        position += ENTRY.size
+        granularity, position = unpack_string(payload, position)
+        (_, _, _, signal_decision), position = decode_signal(payload, position)
+        entries.append(PendingEntry(order, signal_decision, granularity, trigger, bar_time, expires_at))
+    return entries
+
+
+def encode_tiers(tiers_done: Dict[int, int]) -> bytes:
+    return b"".join(TIER.pack(ticket, tiers) for ticket, tiers in tiers_done.items())
+
+
+def decode_tiers(payload: bytes) -> Dict[int, int]:
+    return {ticket: tiers for ticket, tiers in TIER.iter_unpack(payload)}
+
+
+def encode_bar(bar: Bar) -> bytes:
+    return BAR.pack(bar.time, bar.open, bar.high, bar.low, bar.close, bar.tick_volume, bar.spread, bar.real_volume)
+
+
+def decode_bar(payload: bytes, position: int) -> Tuple[Bar, int]:
+    return Bar(*BAR.unpack_from(payload, position)), position + BAR.size
+
+
+def encode_aggregators(aggregators: Dict[str, BarAggregator]) -> bytes:
+    payload = bytearray()
+    for symbol, aggregator in aggregators.items():
+        history = next(iter(aggregator.series.values())).closed.maxlen if aggregator.series else 0
+        payload += pack_string(symbol) + AGGREGATOR.pack(aggregator.last_tick_msc, history, len(aggregator.series))
+        for name, series in aggregator.series.items():
+            payload += pack_string(name) + SERIES.pack(series.fed_until, series.partial is not None, series.forming is not None, len(series.closed))
+            for bar in (series.partial, series.forming):
+                if bar is not None:
+                    payload += encode_bar(bar)
+            for bar in series.closed:
+                payload += encode_bar(bar)
+    return bytes(payload)
+
+
+def decode_aggregators(payload: bytes) -> Dict[str, BarAggregator]:
+    aggregators = {}
+    position = 0
+    while position < len(payload):
+        symbol, position = unpack_string(payload, position)
+        last_tick_msc, history, count = AGGREGATOR.unpack_from(payload, position)
+        position += AGGREGATOR.size
+
+        series = []
+        for _ in range(count):
+            name, position = unpack_string(payload, position)
+            fed_until, has_partial, has_forming, closed_count = SERIES.unpack_from(payload, position)
+            position += SERIES.size
+            partial = forming = None
+            if has_partial:
+                partial, position = decode_bar(payload, position)
+            if has_forming:
+                forming, position = decode_bar(payload, position)
+            closed = []
+            for _ in range(closed_count):
+                bar, position = decode_bar(payload, position)
+                closed.append(bar)
+            series.append((name, fed_until, partial, forming, closed))
+
+        aggregator = BarAggregator(symbol, [name for name, *_ in series], history)
+        aggregator.last_tick_msc = last_tick_msc
+        for name, fed_until, partial, forming, closed in series:
+            aggregator.series[name].closed.extend(closed)
+            aggregator.series[name].partial = partial
+            aggregator.series[name].forming = forming
+            aggregator.series[name].fed_until = fed_until
+        aggregators[symbol] = aggregator
+    return aggregators
+
+
+def encode_polls(last_polls: Dict[str, float]) -> bytes:
+    return b"".join(pack_string(symbol) + POLL.pack(polled_at) for symbol, polled_at in last_polls.items())
+
+
+def decode_polls(payload: bytes) -> Dict[str, float]:
+    last_polls = {}
+    position = 0
+    while position < len(payload):
+        symbol, position = unpack_string(payload, position)
+        (last_polls[symbol],) = POLL.unpack_from(payload, position)
+        position += POLL.size
+    return last_polls
+
+
+# Key of a handoff or candle cache state -> its section, encoder and decoder
+STATE_SECTIONS = {
+    "tiers_done": (TIERS_SECTION, encode_tiers, decode_tiers),
+    "pending_signals": (SIGNALS_SECTION, encode_signals, decode_signals),
+    "pending_entries": (ENTRIES_SECTION, encode_entries, decode_entries),
+    "aggregators": (AGGREGATORS_SECTION, encode_aggregators, decode_aggregators),
+    "timings": (TIMINGS_SECTION, encode_timings, decode_timings),
+    "last_polls": (POLLS_SECTION, encode_polls, decode_polls),
+}
+
+
+def encode_state(state: dict) -> Dict[bytes, bytes]:
+    """Sections of a state dict like collect_state()'s, for write_checkpoint."""
+    sections = {}
+    if "daily_loss" in state:
+        sections[DAILY_LOSS_SECTION] = encode_daily_loss(state["daily_loss"], dt.date.today())
+    for key, (name, encode, _) in STATE_SECTIONS.items():
+        if key in state:
+            sections[name] = encode(state[key])
+    return sections
+
+
+def decode_state(sections: Dict[bytes, bytes]) -> dict:
+    """The state dict of the sections read_checkpoint() kept, yesterday's daily loss is left out."""
+    state = {}
+    if DAILY_LOSS_SECTION in sections:
+        daily_loss, day = decode_daily_loss(sections[DAILY_LOSS_SECTION])
+        if day == dt.date.today():
+            state["daily_loss"] = daily_loss
+    for key, (name, _, decode) in STATE_SECTIONS.items():
+        if name in sections:
+            state[key] = decode(sections[name])
+    return state
+
+
+def write_checkpoint(path: str, sections: Dict[bytes, bytes], written_at: float):
+    """Writes all sections to path atomically, a crash leaves the previous checkpoint in place."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    data = bytearray(HEADER.pack(MAGIC, VERSION, len(sections), written_at))
+    for name, payload in sections.items():
+        data += SECTION.pack(name, SECTION_VERSIONS[name], len(payload)) + payload
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path: str) -> Tuple[float, Dict[bytes, bytes]]:
+    """Returns (written_at, sections), keeping only sections this version can decode."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, count, written_at = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+
+    sections = {}
+    position = HEADER.size
+    for _ in range(count):
+        name, section_version, size = SECTION.unpack_from(data, position)
+        position += SECTION.size
+        if SECTION_VERSIONS.get(name) == section_version:
+            sections[name] = data[position:position + size]
+        position += size
+
+    return written_at, sections
@@ -0,0 +1,34 @@
+import json
+import os
+import threading
+import time
+
+class ConfigWatcher(threading.Thread):
+    """Reloads bot/configuration.json into the running bot whenever the file changes."""
+
+    def __init__(self, bot_instance, path, interval=2):
+        super().__init__(name="config_watcher_thread")
+        self.bot = bot_instance
+        self.path = path
+        self.interval = interval
+        self.daemon = True
+        self.running = True
+        self.last_mtime = os.stat(path).st_mtime
+
+    def run(self):
+        while self.running:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self.last_mtime:
+                    self.last_mtime = mtime
+                    with open(self.path, "r") as f:
+                        data = json.loads(f.read())
+
+                    started = time.perf_counter()
+                    self.bot.apply_settings(data)
+                    self.bot.log_to_main(f"ConfigWatcher: configuration applied in {(time.perf_counter() - started) * 1000:.1f} ms")
+            except Exception as error:
+                # Keep the running configuration if the new one is invalid
+                self.bot.log_to_error(f"ConfigWatcher: Failed to apply {self.path}: {error}")
+
+            time.sleep(self.interval)
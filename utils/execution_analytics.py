@@ -0,0 +1,60 @@
+import sys
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from api.order_execution import SUCCESS_RETCODES
+from utils.execution_file import ACTIONS, ORDER, read_executions
+
+
+def slippage(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Price units lost to slippage, positive when filled worse than requested, nan when not filled."""
+    return columns["side"] * (columns["price_filled"] - columns["price_requested"])
+
+
+def summarize(columns: Dict[str, np.ndarray], symbols: List[str], action: int = ORDER,
+              percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, dict]:
+    """Counts, fill rate, and slippage and latency percentiles per symbol for one action.
+
+    Rows are grouped with one stable sort by symbol, so the work is a sort plus one
+    vectorized pass per symbol.
+    """
+    mask = columns["action"] == action
+    symbol_id = columns["symbol_id"][mask]
+    filled = np.isin(columns["retcode"][mask], SUCCESS_RETCODES)
+    slipped = slippage(columns)[mask]
+    latency = columns["latency_ms"][mask]
+
+    order = np.argsort(symbol_id, kind="stable")
+    symbol_id, filled, slipped, latency = symbol_id[order], filled[order], slipped[order], latency[order]
+    bounds = np.flatnonzero(np.diff(symbol_id)) + 1
+
+    summary = {}
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(symbol_id)]):
+        if start == end:
+            continue
+        group_slippage = slipped[start:end][filled[start:end]]
+        group_slippage = group_slippage[~np.isnan(group_slippage)]
+        group_latency = latency[start:end]
+
+        summary[symbols[symbol_id[start]]] = {
+            "count": int(end - start),
+            "fill_rate": float(filled[start:end].mean()),
+            "slippage_mean": float(group_slippage.mean()) if len(group_slippage) else float("nan"),
+            "slippage": dict(zip(percentiles, np.percentile(group_slippage, percentiles).tolist())) if len(group_slippage) else {},
+            "latency_ms": dict(zip(percentiles, np.percentile(group_latency, percentiles).tolist())),
+        }
+    return summary
+
+
+def load_summary(path: str, action: int = ORDER, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, dict]:
+    columns, symbols = read_executions(path, ["action", "symbol_id", "side", "retcode", "price_requested", "price_filled", "latency_ms"])
+    return summarize(columns, symbols, action, percentiles)
+
+
+if __name__ == "__main__":
+    # python -m utils.execution_analytics ./data/executions [order|modify|partial_close|close|cancel]
+    path = sys.argv[1] if len(sys.argv) > 1 else "./data/executions"
+    action = {name: value for value, name in ACTIONS.items()}[sys.argv[2] if len(sys.argv) > 2 else "order"]
+    for symbol, stats in sorted(load_summary(path, action).items()):
+        print(f"{symbol}: {stats}")
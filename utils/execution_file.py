@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Directory layout
+#   one chunk_<sequence>.npz per flush, one array per column plus the chunk's symbol names
+# Chunks are written to a temporary name and renamed, so a crash never leaves a half
+# written chunk. A reader loads only the columns it asks for.
+ORDER = 0
+MODIFY = 1
+PARTIAL_CLOSE = 2
+CLOSE = 3
+CANCEL = 4
+
+ACTIONS = {ORDER: "order", MODIFY: "modify", PARTIAL_CLOSE: "partial_close", CLOSE: "close", CANCEL: "cancel"}
+
+# side is 1 for buys and -1 for sells, 0 when it doesn't apply; prices and volumes are nan when unknown
+COLUMNS = {
+    "time": np.float64,
+    "action": np.uint8,
+    "symbol_id": np.uint16,
+    "side": np.int8,
+    "ticket": np.int64,
+    "signal_id": np.int64,
+    "retcode": np.int32,
+    "volume_requested": np.float64,
+    "volume_filled": np.float64,
+    "price_requested": np.float64,
+    "price_filled": np.float64,
+    "latency_ms": np.float64,
+}
+
+
+class ExecutionFileWriter:
+    """Append-only writer, records are buffered and written as one columnar chunk.
+
+    A chunk is written when chunk_rows records are buffered or flush_seconds after
+    the first buffered record, whichever comes first.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 4096, flush_seconds: float = 5.0):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.sequence = max((chunk_sequence(name) for name in chunk_names(path)), default=-1) + 1
+        self.reset_chunk()
+
+    def reset_chunk(self):
+        self.rows: List[tuple] = []
+        self.symbol_ids: Dict[str, int] = {}
+
+    def append(self, action: int, symbol: str, side: int, ticket: int, signal_id: Optional[int], retcode: int,
+               volume_requested: float, volume_filled: float, price_requested: float, price_filled: float, latency_ms: float):
+        with self.lock:
+            symbol_id = self.symbol_ids.setdefault(symbol, len(self.symbol_ids))
+            self.rows.append((time.time(), action, symbol_id, side, ticket, -1 if signal_id is None else signal_id, retcode,
+                              volume_requested, volume_filled, price_requested, price_filled, latency_ms))
+            if len(self.rows) >= self.chunk_rows:
+                self.write_chunk()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.flush_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            self.write_chunk()
+
+    def write_chunk(self):
+        """Call with the lock held"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.rows:
+            return
+
+        values = list(zip(*self.rows))
+        arrays = {name: np.array(values[index], dtype=dtype) for index, (name, dtype) in enumerate(COLUMNS.items())}
+        arrays["symbols"] = np.array(list(self.symbol_ids), dtype=str)
+
+        path = os.path.join(self.path, f"chunk_{self.sequence:08d}.npz")
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+
+        self.sequence += 1
+        self.reset_chunk()
+
+    def close(self):
+        self.flush()
+
+
+def chunk_names(path: str) -> List[str]:
+    return sorted(name for name in os.listdir(path) if name.startswith("chunk_") and name.endswith(".npz"))
+
+
+def chunk_sequence(name: str) -> int:
+    return int(name[len("chunk_"):-len(".npz")])
+
+
+def read_executions(path: str, columns: Optional[List[str]] = None) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """Returns every chunk's columns concatenated, with symbol_id remapped to an index in the returned symbols."""
+    columns = list(columns or COLUMNS)
+    names = ["symbol_id"] + [name for name in columns if name != "symbol_id"]
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+    symbols: Dict[str, int] = {}
+
+    for name in chunk_names(path) if os.path.exists(path) else []:
+        with np.load(os.path.join(path, name)) as chunk:
+            # Chunk symbol ids -> ids of the result
+            mapping = np.array([symbols.setdefault(symbol, len(symbols)) for symbol in chunk["symbols"]], dtype=np.uint16)
+            for column in names:
+                values = chunk[column]
+                parts[column].append(mapping[values] if column == "symbol_id" else values)
+
+    result = {column: np.concatenate(arrays) if arrays else np.array([], dtype=COLUMNS[column]) for column, arrays in parts.items()}
+    return result, list(symbols)
@@ -2,30 +2,102 @@ import threading
 import subprocess
 import time
 import os
-import sys
+
+from bot.state_snapshot import collect_state
+from utils.handoff import Handoff
 
 class GitWatcher(threading.Thread):
-    def __init__(self, bot_instance):
+    def __init__(self, bot_instance, interval=10):
         super().__init__()
         self.bot = bot_instance
+        self.interval = interval
         self.daemon = True
         self.running = True
 
+    def local_head(self):
+        """Reads the checked out commit from .git without spawning git."""
+        with open(os.path.join('.git', 'HEAD')) as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return None, head
+
+        ref = head[5:]
+        ref_path = os.path.join('.git', ref)
+        if os.path.exists(ref_path):
+            with open(ref_path) as f:
+                return ref, f.read().strip()
+
+        # 引用被打包后只在packed-refs里
+        packed_path = os.path.join('.git', 'packed-refs')
+        if os.path.exists(packed_path):
+            with open(packed_path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return ref, parts[0]
+        return ref, None
+
+    def remote_head(self, ref):
+        """One ls-remote round trip instead of fetch + status."""
+        result = subprocess.run(['git', 'ls-remote', 'origin', ref], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0 or not result.stdout:
+            return None
+        return result.stdout.decode().split()[0]
+
     def run(self):
+        # Remote commit a pull could not bring in, retried once the remote moves again
+        skipped = None
         while self.running:
-            # 检查git状态
-            status = subprocess.run(['git', 'fetch'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            status = subprocess.run(['git', 'status', '-uno'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
-            # 如果有更新
-            if b'Your branch is behind' in status.stdout:
-                print("检测到代码更新，正在拉取最新代码...")
-                subprocess.run(['git', 'pull'])
-                print("代码更新完成，正在重启bot...")
-                
-                # 重启bot
-                self.bot.stop()
-                os.execv(sys.executable, ['python'] + [sys.argv[0]])
-            
+            try:
+                ref, local = self.local_head()
+                remote = self.remote_head(ref) if ref else None
+
+                # 如果有更新
+                if remote and remote != local and remote != skipped:
+                    if self.pull(local, remote):
+                        skipped = None
+                    else:
+                        skipped = remote
+            except Exception as e:
+                print(f"GitWatcher: {e}")
+
             # 每10秒检查一次
-            time.sleep(10)
\ No newline at end of file
+            time.sleep(self.interval)
+
+    def pull(self, local, remote) -> bool:
+        """Fast-forwards to the remote commit and hands off or reloads, False when HEAD didn't reach it."""
+        print("检测到代码更新，正在拉取最新代码...")
+        # A checkout ahead of or diverged from the remote isn't merged into, only fast-forwarded
+        pulled = subprocess.run(['git', 'pull', '--ff-only'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, head = self.local_head()
+        if pulled.returncode != 0 or head != remote:
+            print(f"GitWatcher: pull did not reach {remote[:8]}, keep running {str(head)[:8]}: {pulled.stderr.decode().strip()}")
+            return False
+
+        # 只有配置文件变化时由ConfigWatcher热加载，不重启
+        changed = subprocess.run(['git', 'diff', '--name-only', local, head], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        changed_files = set(changed.stdout.decode().split())
+        if changed.returncode == 0 and changed_files and changed_files <= {'bot/configuration.json'}:
+            print("仅配置文件更新，已热加载")
+        else:
+            print("代码更新完成，正在交接给新进程...")
+            self.hand_off()
+        return True
+
+    def hand_off(self):
+        """Starts the upgraded bot and passes it the running state, positions stay open."""
+        handoff = Handoff()
+        handoff.write_state(collect_state(self.bot))
+        process = handoff.spawn()
+
+        # 新进程预热完成前旧进程继续交易
+        if not handoff.wait_ready(process):
+            print("GitWatcher: new process did not become ready, keep running the current one")
+            if process.poll() is None:
+                process.kill()
+            return
+
+        self.bot.stop(close_positions=False)
+        handoff.write_state(collect_state(self.bot))
+        handoff.release()
+        self.running = False
@@ -0,0 +1,101 @@
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+from utils.checkpoint_file import decode_state, encode_state, read_checkpoint, write_checkpoint
+
+STATE_DIR = "./state"
+
+
+class Handoff:
+    """File based handoff between the running bot and its upgraded replacement.
+
+    old process                          new process
+    -----------                          -----------
+    write_state(snapshot), spawn()  ->   load_state(), warm up
+                                    <-   announce_ready()
+    wait_ready(), stop trading,
+    write_state(final), release()   ->   wait_released(), load_state(), acquire()
+    exit                                 run
+
+    The orders lock file names the pid allowed to submit orders, MT5.order_send
+    checks it before every request. The state is written in the checkpoint file
+    format, so a new version of the classes can still read it.
+    """
+
+    def __init__(self, directory: str = STATE_DIR):
+        self.directory = directory
+        self.state_path = os.path.join(directory, "handoff.bin")
+        # Written by versions that pickled the state
+        self.legacy_state_path = os.path.join(directory, "handoff.pkl")
+        self.ready_path = os.path.join(directory, "handoff.ready")
+        self.released_path = os.path.join(directory, "handoff.released")
+        self.lock_path = os.path.join(directory, "orders.lock")
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def write_atomic(self, path, data: bytes):
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def write_state(self, state: dict):
+        write_checkpoint(self.state_path, encode_state(state), time.time())
+
+    def load_state(self) -> dict:
+        if not os.path.exists(self.state_path) and os.path.exists(self.legacy_state_path):
+            # Handed over by a process started before the state was versioned
+            with open(self.legacy_state_path, "rb") as f:
+                return pickle.load(f)
+        _, sections = read_checkpoint(self.state_path)
+        return decode_state(sections)
+
+    def spawn(self):
+        for path in (self.ready_path, self.released_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return subprocess.Popen([sys.executable, sys.argv[0], "--handoff"])
+
+    def announce_ready(self):
+        self.write_atomic(self.ready_path, str(os.getpid()).encode())
+
+    def wait_for(self, path, timeout, process=None) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.exists(path):
+                return True
+            if process is not None and process.poll() is not None:
+                return False
+            time.sleep(0.1)
+        return False
+
+    def wait_ready(self, process, timeout=120) -> bool:
+        return self.wait_for(self.ready_path, timeout, process)
+
+    def release(self):
+        self.write_atomic(self.released_path, str(os.getpid()).encode())
+
+    def wait_released(self, timeout=120) -> bool:
+        return self.wait_for(self.released_path, timeout)
+
+    def acquire(self):
+        """Takes the orders lock for this process."""
+        self.write_atomic(self.lock_path, str(os.getpid()).encode())
+        for path in (self.ready_path, self.released_path, self.state_path, self.legacy_state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def owner(self):
+        if not os.path.exists(self.lock_path):
+            return None
+        with open(self.lock_path, "r") as f:
+            return int(f.read() or 0)
+
+    def owns_orders(self) -> bool:
+        return self.owner() == os.getpid()
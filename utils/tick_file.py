@@ -0,0 +1,159 @@
+import collections
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional
+
+# File layout
+#   header: MAGIC, version
+#   chunks: INDEX block (tick count, first/last time_msc, payload size) followed by its payload
+#   payload: SYMBOL records for every symbol used in the chunk, then TICK records
+# Chunks are self-contained, so a reader can hop from index block to index block
+# and only decode the chunks covering the time range it needs.
+MAGIC = b"TICK"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+INDEX = struct.Struct("<cIqqI")
+SYMBOL = struct.Struct("<cHB")
+TICK = struct.Struct("<cHqddddI")
+
+INDEX_BLOCK = b"I"
+SYMBOL_BLOCK = b"S"
+TICK_BLOCK = b"T"
+
+# Same fields as the Tick returned by symbol_info_tick
+Tick = collections.namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real"])
+ChunkIndex = collections.namedtuple("ChunkIndex", ["offset", "count", "first_time_msc", "last_time_msc", "size"])
+
+
+class TickFileWriter:
+    """Append-only writer, ticks are buffered and written a chunk at a time."""
+
+    def __init__(self, path: str, chunk_ticks: int = 1024, flush_seconds: float = 5.0):
+        self.path = path
+        self.chunk_ticks = chunk_ticks
+        self.flush_seconds = flush_seconds
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            # Drop a chunk left half written by a crash before appending after it
+            chunks = TickFileReader(path).index()
+            end = chunks[-1].offset + INDEX.size + chunks[-1].size if chunks else HEADER.size
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+
+        self.file = open(path, "ab")
+        if is_new:
+            self.file.write(HEADER.pack(MAGIC, VERSION, 0))
+            self.file.flush()
+
+        self.symbol_ids: Dict[str, int] = {}
+        self.reset_chunk()
+
+    def reset_chunk(self):
+        self.ticks: List[bytes] = []
+        self.chunk_symbols: Dict[str, int] = {}
+        self.first_time_msc = None
+        self.last_time_msc = None
+        self.last_flush = time.monotonic()
+
+    def append(self, symbol: str, tick):
+        symbol_id = self.symbol_ids.setdefault(symbol, len(self.symbol_ids))
+        self.chunk_symbols[symbol] = symbol_id
+
+        self.ticks.append(TICK.pack(TICK_BLOCK, symbol_id, tick.time_msc, tick.bid, tick.ask, tick.last, tick.volume_real, tick.flags))
+        if self.first_time_msc is None:
+            self.first_time_msc = tick.time_msc
+        self.last_time_msc = tick.time_msc
+
+        if len(self.ticks) >= self.chunk_ticks:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self.ticks:
+            return
+
+        payload = bytearray()
+        for symbol, symbol_id in self.chunk_symbols.items():
+            name = symbol.encode()
+            payload += SYMBOL.pack(SYMBOL_BLOCK, symbol_id, len(name)) + name
+        payload += b"".join(self.ticks)
+
+        self.file.write(INDEX.pack(INDEX_BLOCK, len(self.ticks), self.first_time_msc, self.last_time_msc, len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+        self.reset_chunk()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class TickFileReader:
+    def __init__(self, path: str):
+        self.path = path
+
+    def index(self) -> List[ChunkIndex]:
+        """Reads only the index blocks. A chunk cut short by a crash is ignored."""
+        chunks = []
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a version {VERSION} tick file")
+
+            offset = HEADER.size
+            while offset + INDEX.size <= size:
+                f.seek(offset)
+                kind, count, first_time_msc, last_time_msc, payload_size = INDEX.unpack(f.read(INDEX.size))
+                if kind != INDEX_BLOCK or offset + INDEX.size + payload_size > size:
+                    break
+                chunks.append(ChunkIndex(offset, count, first_time_msc, last_time_msc, payload_size))
+                offset += INDEX.size + payload_size
+
+        return chunks
+
+    def read(self, start_msc: Optional[int] = None, end_msc: Optional[int] = None, symbols=None) -> Iterator[tuple]:
+        """Yields (symbol, Tick) in file order, skipping chunks outside [start_msc, end_msc]."""
+        with open(self.path, "rb") as f:
+            for chunk in self.index():
+                if start_msc is not None and chunk.last_time_msc < start_msc:
+                    continue
+                if end_msc is not None and chunk.first_time_msc > end_msc:
+                    continue
+
+                f.seek(chunk.offset + INDEX.size)
+                payload = f.read(chunk.size)
+                names: Dict[int, str] = {}
+                position = 0
+                while position < len(payload):
+                    kind = payload[position:position + 1]
+                    if kind == SYMBOL_BLOCK:
+                        _, symbol_id, length = SYMBOL.unpack_from(payload, position)
+                        position += SYMBOL.size
+                        names[symbol_id] = payload[position:position + length].decode()
+                        position += length
+                        continue
+
+                    _, symbol_id, time_msc, bid, ask, last, volume_real, flags = TICK.unpack_from(payload, position)
+                    position += TICK.size
+
+                    if start_msc is not None and time_msc < start_msc:
+                        continue
+                    if end_msc is not None and time_msc > end_msc:
+                        continue
+                    symbol = names[symbol_id]
+                    if symbols is not None and symbol not in symbols:
+                        continue
+
+                    yield symbol, Tick(time_msc // 1000, bid, ask, last, int(volume_real), time_msc, flags, volume_real)
@@ -1,24 +1,11 @@
 import decimal
+import datetime as dt
+
+from constants.granularities import get_granularity
 
 def granularity_to_minutes(granularity: str) -> int:
     """Convert granularity string to total seconds"""
-    granularity_map = {
-        'S20': 20,  # 20 seconds
-        'M1': 60,   # 1 minute
-        'M5': 300,  # 5 minutes
-        'M15': 900, # 15 minutes
-        'M30': 1800, # 30 minutes
-        'H1': 3600, # 1 hour
-        'H4': 14400, # 4 hours
-        'D': 86400,  # 24 hours
-        'W': 604800, # 7 days
-        'M': 2592000 # 30 days (approximation)
-    }
-
-    if granularity not in granularity_map:
-        raise ValueError(f"Unsupported granularity: {granularity}")
-    
-    return granularity_map[granularity]
+    return get_granularity(granularity).seconds
 
 def get_trade_multipler(price_1):
     if str(price_1).index('.') >= 3:  # JPY pair
@@ -34,3 +21,18 @@ def get_decimals_places(value):
     
     # Decimals places
     return d_p
+
+def get_next_interval(trading_times) -> dt.datetime:
+    """Returns the next candle boundary for the smallest granularity (in seconds) being traded"""
+    now = dt.datetime.now()
+    minimum_duration = min(trading_times)
+
+    # Convert current time to total seconds since last full hour
+    current_seconds = (now.minute * 60) + now.second
+    seconds_to_add = minimum_duration - (current_seconds % minimum_duration)
+
+    next_interval = now + dt.timedelta(seconds=seconds_to_add)
+    # Set microseconds to zero
+    next_interval = next_interval.replace(microsecond=0)
+
+    return next_interval